@@ -0,0 +1,157 @@
+import re
+import functools
+import nltk
+
+from nltk.corpus import stopwords
+from nltk.stem.snowball import SnowballStemmer
+from nltk.tokenize import NLTKWordTokenizer
+
+
+class Analyzer:
+    """
+    Pipeline text analysis yang dipakai bersama oleh indexing (parse_block,
+    spimi_invert) dan query (retrieval di BSBIIndex):
+
+        lowercase -> tokenization -> stemming -> buang stopwords
+
+    Hasilnya identik dengan pipeline awal, yaitu nltk.word_tokenize, lalu
+    SnowballStemmer.stem untuk setiap token, lalu membuang token yang ada di
+    stopwords.words(language). Bedanya:
+
+    1. Stopwords disimpan di frozenset, sehingga membership test O(1).
+    2. Hasil stemming (beserta keputusan stopword) di-cache di sebuah LRU cache.
+       Karena hukum Zipf, sebagian besar token adalah pengulangan token yang
+       sudah pernah di-stem.
+    3. Tokenization tetap menggunakan sentence splitter (punkt) dan NLTKWordTokenizer
+       seperti nltk.word_tokenize, tetapi NLTKWordTokenizer (regex-regex Treebank)
+       dijalankan per chunk (potongan text yang dipisahkan whitespace) dan hasilnya
+       di-cache. Aturan-aturan Treebank hanya melihat satu karakter whitespace di
+       sekitar chunk dan apakah chunk tersebut berada di akhir kalimat, sehingga
+       ketiganya dijadikan key cache. Chunk alfanumerik (mayoritas chunk) selalu
+       menjadi satu token apa adanya, kecuali beberapa kontraksi seperti "cannot",
+       sehingga tidak perlu melalui NLTKWordTokenizer sama sekali. Begitu juga
+       chunk "polos" (lihat PLAIN_RE), yaitu kata alfanumerik (boleh mengandung
+       "-", "/", atau "." di antara huruf/angka) yang diapit kurung dan diikuti
+       tanda baca seperti "," atau ")", serta titik di akhir kalimat: aturan
+       Treebank selalu memisahkan setiap karakter kurung dan tanda baca tersebut
+       menjadi token sendiri, sehingga chunk ini dipecah langsung dengan regex
+       tanpa cache (yang tidak membantu ketika cache masih kosong).
+    4. Kalimat yang seluruhnya "polos" (lihat PLAIN_SENTENCE_RE dan NOT_PLAIN_RE;
+       sebagian besar kalimat di koleksi) bahkan tidak dipecah per chunk: semua
+       tokennya diambil dengan satu findall PLAIN_TOKEN_RE, setelah titik akhir
+       kalimat dipisahkan dari kata sebelumnya.
+
+    Attributes
+    ----------
+    language(str): Bahasa untuk sentence splitter, stemmer, dan stopwords
+    cache_size(int): Banyaknya entry maksimum di masing-masing LRU cache
+    """
+    # (whitespace sebelum chunk, chunk, whitespace setelah chunk)
+    CHUNK_RE = re.compile(r'(\s?)(\S+)(?=(\s*))')
+    SIMPLE_RE = re.compile(r'[A-Za-z0-9]+')
+    # chunk yang hanya berisi kurung tutup dan tanda kutip
+    CLOSING_RE = re.compile(r'[\]\)}>"\'\u00bb\u201d\u2019]+')
+    # (kurung buka, kata, kurung tutup/tanda baca, titik akhir kalimat)
+    PLAIN_RE = re.compile(r'([(\[{<]*)([A-Za-z0-9]+(?:[-/.][A-Za-z0-9]+)*-?)([,;:)\]}>?!%]*)(\.?)')
+    # kata alfanumerik yang dipecah oleh NLTKWordTokenizer (CONTRACTIONS2)
+    CONTRACTIONS = frozenset(["cannot", "gimme", "gonna", "gotta", "lemme", "wanna"])
+    # kalimat polos: hanya huruf/angka ASCII, whitespace, dan tanda baca yang aturan
+    # Treebank-nya tidak bergantung konteks, tanpa "--", "..", ",," (atau ":"),
+    # dan kontraksi
+    PLAIN_SENTENCE_RE = re.compile(r'[A-Za-z0-9\s()\[\]{}<>;@#$%&?!*,:/.\-]*')
+    NOT_PLAIN_RE = re.compile(r'--|\.\.|[,:][,:]|\b(?:' + '|'.join(sorted(CONTRACTIONS)) + r')\b', re.I | re.A)
+    # token kalimat polos: kata (termasuk "-", "/", ".", serta "," dan ":" sebelum angka),
+    # atau satu karakter tanda baca
+    PLAIN_TOKEN_RE = re.compile(r'(?:[A-Za-z0-9/.\-]+|[,:](?=\d))+|\S')
+    # setelah titik akhir kalimat hanya boleh ada kurung tutup dan whitespace
+    SENTENCE_END_RE = re.compile(r'[\]\)}> ]*\s*')
+
+    def __init__(self, language = "english", cache_size = 2 ** 16):
+        self.language = language
+        self.stemmer = SnowballStemmer(language)
+        self.stop_words = frozenset(stopwords.words(language))
+        self.word_tokenizer = NLTKWordTokenizer()
+        self.tokenize_chunk = functools.lru_cache(maxsize = cache_size)(self._tokenize_chunk)
+        self.term = functools.lru_cache(maxsize = cache_size)(self._term)
+
+    def _tokenize_chunk(self, prev, chunk, next, last):
+        """
+        Tokenization sebuah chunk dengan NLTKWordTokenizer. prev adalah karakter
+        whitespace sebelum chunk ('' jika chunk berada di awal kalimat) dan next
+        adalah whitespace setelahnya. Untuk chunk yang tidak berada di akhir
+        kalimat (last = False), ditambahkan sebuah token dummy setelahnya agar
+        aturan akhir kalimat tidak berlaku, lalu token dummy tersebut dibuang.
+        Chunk terakhir sebuah kalimat mencakup chunk-chunk kurung tutup dan
+        tanda kutip setelahnya (lihat tokenize).
+        """
+        if last:
+            return tuple(self.word_tokenizer.tokenize(prev + chunk + next))
+        return tuple(self.word_tokenizer.tokenize(prev + chunk + next[0] + 'a')[:-1])
+
+    def _term(self, token):
+        """Mengembalikan hasil stemming token, atau None jika hasilnya stopword."""
+        term = self.stemmer.stem(token)
+        return None if term in self.stop_words else term
+
+    def tokenize(self, text):
+        """Sama dengan nltk.word_tokenize(text, language)."""
+        tokens = []
+        simple = self.SIMPLE_RE.fullmatch
+        plain = self.PLAIN_RE.fullmatch
+        closers = self.CLOSING_RE.fullmatch
+        contractions = self.CONTRACTIONS
+        append = tokens.append
+        plain_sentence = self.PLAIN_SENTENCE_RE.fullmatch
+        not_plain = self.NOT_PLAIN_RE.search
+        plain_tokens = self.PLAIN_TOKEN_RE.findall
+        sentence_end = self.SENTENCE_END_RE.fullmatch
+        for sentence in nltk.sent_tokenize(text, self.language):
+            if plain_sentence(sentence) and not not_plain(sentence):
+                # titik akhir kalimat dipisahkan dari kata sebelumnya
+                period = sentence.rfind('.')
+                if period > 0 and sentence_end(sentence, period + 1):
+                    sentence = sentence[:period] + ' ' + sentence[period:]
+                tokens.extend(plain_tokens(sentence))
+                continue
+            chunks = sentence.split()
+            last = len(chunks) - 1
+            # aturan titik akhir kalimat Treebank melewati kurung tutup dan tanda
+            # kutip di akhir kalimat, sehingga chunk-chunk tersebut di-tokenize
+            # sekaligus dengan chunk terakhir sebelumnya (beserta whitespace-nya)
+            while last > 0 and closers(chunks[last]):
+                last -= 1
+            if last < len(chunks) - 1:
+                chunks = chunks[:last] + [sentence.split(None, last)[-1].rstrip()]
+            context = None
+            for i, chunk in enumerate(chunks):
+                if simple(chunk):
+                    if chunk.lower() not in contractions:
+                        append(chunk)
+                        continue
+                else:
+                    match = plain(chunk)
+                    # titik yang tidak di akhir kalimat (misal singkatan) tidak dipisahkan
+                    if match is not None and (i == last or not match.group(4)) and not self.has_contraction(match.group(2)):
+                        opening, word, closing, period = match.groups()
+                        tokens.extend(opening)
+                        append(word)
+                        tokens.extend(closing)
+                        tokens.extend(period)
+                        continue
+                # whitespace di sekitar chunk hanya diperlukan oleh NLTKWordTokenizer
+                if context is None:
+                    context = self.CHUNK_RE.findall(sentence)
+                prev, _, next = context[i] if i < last else (context[i][0], None, context[-1][2])
+                tokens.extend(self.tokenize_chunk(prev, chunk, next, i == last))
+        return tokens
+
+    def has_contraction(self, word):
+        """Apakah salah satu bagian alfanumerik word adalah kontraksi (lihat CONTRACTIONS)."""
+        return any(part.lower() in self.CONTRACTIONS for part in self.SIMPLE_RE.findall(word))
+
+    def analyze(self, text):
+        """
+        Mengubah text menjadi list of terms: lowercase, tokenization,
+        stemming, lalu membuang stopwords.
+        """
+        return [term for term in map(self.term, self.tokenize(text.lower())) if term is not None]
@@ -0,0 +1,759 @@
+"""
+Benchmark untuk komponen indexing dan retrieval, pada koleksi sintetis
+maupun pada koleksi di folder collection.
+
+Jalankan dari root repository, contoh:
+    python -m search.benchmark merge
+"""
+import argparse
+import collections
+import contextlib
+import heapq
+import itertools
+import json
+import math
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem.snowball import SnowballStemmer
+
+from .bsbi import BSBIIndex, BM25_K, BM25_B
+from .searcher import Searcher
+from .analyzer import Analyzer
+from .index import InvertedIndexReader, InvertedIndexWriter, TermDictionary, PostingsCache
+from .compression import VBEPostings, NumpyVBEPostings, BlockPostings, AdaptivePostings
+from .util import IdMap, FrozenIdMap, ScoreAccumulator, sorted_merge_posts_and_tfs, intersect_cursors
+
+
+def synthetic_collection(num_docs, num_terms, doc_length, zipf_s = 1.1, seed = 1906292881):
+    """
+    Membuat koleksi sintetis dengan distribusi term yang skewed (Zipf),
+    sehingga beberapa term (seperti stopwords yang lolos) muncul di hampir
+    semua dokumen dan mempunyai postings list yang sangat panjang.
+
+    Returns
+    -------
+    List[Dict[int, int]]
+        Untuk setiap docID, dictionary termID -> TF
+    """
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / (rank ** zipf_s) for rank in range(1, num_terms + 1)))
+    terms = range(num_terms)
+    docs = []
+    for _ in range(num_docs):
+        tf_doc = {}
+        for term_id in rng.choices(terms, cum_weights = cum_weights, k = doc_length):
+            tf_doc[term_id] = tf_doc.get(term_id, 0) + 1
+        docs.append(tf_doc)
+    return docs
+
+
+def write_runs(docs, num_runs, directory, postings_encoding = VBEPostings):
+    """
+    Menulis koleksi sintetis sebagai num_runs intermediate indices. Dokumen
+    dibagi secara round-robin (docID % num_runs), sehingga postings setiap
+    term di semua run saling overlap (kasus terburuk untuk merging).
+
+    Returns
+    -------
+    List[str]
+        Nama-nama intermediate index yang ditulis
+    """
+    index_ids = []
+    for run in range(num_runs):
+        term_postings = {}
+        for doc_id in range(run, len(docs), num_runs):
+            for term_id, tf in docs[doc_id].items():
+                postings, tfs = term_postings.setdefault(term_id, ([], []))
+                postings.append(doc_id)
+                tfs.append(tf)
+        index_id = 'intermediate_index_' + str(run)
+        with InvertedIndexWriter(index_id, postings_encoding, directory = directory) as index:
+            for term_id in sorted(term_postings):
+                index.append(term_id, *term_postings[term_id])
+        index_ids.append(index_id)
+    return index_ids
+
+
+def pairwise_merge(indices, merged_index):
+    """Merging lama: fold postings sepasang demi sepasang sebagai list of tuples."""
+    merged_iter = heapq.merge(*indices, key = lambda x: x[0])
+    curr, postings, tf_list = next(merged_iter)
+    for t, postings_, tf_list_ in merged_iter:
+        if t == curr:
+            zip_p_tf = sorted_merge_posts_and_tfs(list(zip(postings, tf_list)),
+                                                  list(zip(postings_, tf_list_)))
+            postings = [doc_id for (doc_id, _) in zip_p_tf]
+            tf_list = [tf for (_, tf) in zip_p_tf]
+        else:
+            merged_index.append(curr, postings, tf_list)
+            curr, postings, tf_list = t, postings_, tf_list_
+    merged_index.append(curr, postings, tf_list)
+
+
+def timed_merge(merge, index_ids, merged_name, directory, postings_encoding = VBEPostings):
+    """Menjalankan merge(indices, merged_index) dan mengembalikan durasinya (detik)."""
+    with InvertedIndexWriter(merged_name, postings_encoding, directory = directory) as merged_index:
+        with contextlib.ExitStack() as stack:
+            indices = [stack.enter_context(InvertedIndexReader(index_id, postings_encoding, directory = directory))
+                       for index_id in index_ids]
+            start = time.perf_counter()
+            merge(indices, merged_index)
+            return time.perf_counter() - start
+
+
+def check_merged(docs, merged_name, directory, postings_encoding = VBEPostings):
+    """Memastikan index hasil merging sama dengan postings yang diharapkan dari docs."""
+    expected = {}
+    for doc_id, tf_doc in enumerate(docs):
+        for term_id, tf in tf_doc.items():
+            postings, tfs = expected.setdefault(term_id, ([], []))
+            postings.append(doc_id)
+            tfs.append(tf)
+    with InvertedIndexReader(merged_name, postings_encoding, directory = directory) as merged:
+        for term_id, postings, tf_list in merged:
+            assert (postings, tf_list) == expected.pop(term_id), "hasil merging salah"
+    assert not expected, "ada term yang hilang setelah merging"
+
+
+def bench_merge(num_docs = 20000, num_terms = 20000, doc_length = 100, num_runs = 8):
+    """
+    Regression benchmark untuk BSBIIndex.merge (k-way merge) dibandingkan
+    dengan merging lama yang melakukan fold sepasang demi sepasang.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    num_postings = sum(len(tf_doc) for tf_doc in docs)
+    with tempfile.TemporaryDirectory() as directory:
+        index_ids = write_runs(docs, num_runs, directory)
+        bsbi = BSBIIndex(data_dir = None, output_dir = directory, postings_encoding = VBEPostings)
+
+        kway_time = timed_merge(bsbi.merge, index_ids, 'main_index', directory)
+        check_merged(docs, 'main_index', directory)
+        pairwise_time = timed_merge(pairwise_merge, index_ids, 'pairwise_index', directory)
+        check_merged(docs, 'pairwise_index', directory)
+
+    print(f"docs: {num_docs}, terms: {num_terms}, postings: {num_postings}, runs: {num_runs}")
+    print(f"k-way merge    : {kway_time:.3f} s ({num_postings / kway_time:,.0f} postings/s)")
+    print(f"pairwise merge : {pairwise_time:.3f} s ({num_postings / pairwise_time:,.0f} postings/s)")
+
+
+def collection_texts(data_dir = os.path.join(os.path.dirname(__file__), 'collection')):
+    """Membaca isi semua dokumen di data_dir (satu sub-directory per block)."""
+    texts = []
+    for block_dir in sorted(next(os.walk(data_dir))[1]):
+        for file in sorted(os.listdir(os.path.join(data_dir, block_dir))):
+            with open(os.path.join(data_dir, block_dir, file)) as f:
+                texts.append(f.read())
+    return texts
+
+
+def bench_analyzer():
+    """
+    Membandingkan Analyzer dengan pipeline awal (nltk.word_tokenize, stemming
+    setiap token, dan stopwords berupa list) pada koleksi di folder collection.
+    Hasil keduanya harus identik. Waktu Analyzer diukur dua kali: dengan cache
+    yang awalnya kosong (cold), lalu dengan cache yang sudah terisi (warm),
+    seperti saat indexing koleksi besar atau melayani query.
+
+    Hasil terakhir (punkt english dari nltk_data, 5 kali run): cold ~4.7-5.4x
+    (median ~4.9x), warm ~8.1-10.1x. Sisa waktu cold didominasi sentence
+    splitter punkt (~0.2 s, juga dibayar pipeline awal) dan stemming token
+    unik (~0.35 s), yang tidak bisa di-cache pada run pertama.
+    """
+    texts = collection_texts()
+    stemmer = SnowballStemmer("english")
+    stop_words = stopwords.words("english")
+
+    start = time.perf_counter()
+    expected = []
+    for text in texts:
+        words = nltk.word_tokenize(text.lower())
+        words = [stemmer.stem(token) for token in words]
+        expected.append([token for token in words if token not in stop_words])
+    baseline_time = time.perf_counter() - start
+
+    analyzer = Analyzer("english")
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        terms = [analyzer.analyze(text) for text in texts]
+        times.append(time.perf_counter() - start)
+        assert terms == expected, "hasil Analyzer berbeda dengan pipeline awal"
+
+    num_terms = sum(len(doc_terms) for doc_terms in terms)
+    print(f"docs: {len(texts)}, terms: {num_terms}")
+    print(f"pipeline awal   : {baseline_time:.3f} s")
+    for name, analyzer_time in zip(["cold", "warm"], times):
+        print(f"Analyzer ({name}) : {analyzer_time:.3f} s ({baseline_time / analyzer_time:.1f}x)")
+
+
+def timed(function, arguments, repeat = 3):
+    """Waktu terbaik (detik) dari repeat kali menjalankan function untuk setiap argumen."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_codec(num_docs = 20000, num_terms = 20000, doc_length = 100):
+    """
+    Membandingkan VBEPostings (loop Python) dengan NumpyVBEPostings (vectorized)
+    untuk decoding postings dan TF lists, dikelompokkan berdasarkan panjang
+    postings list, serta encoding satu per satu dibandingkan encode_batch.
+    Bytestream dan hasil decoding keduanya harus identik.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    term_postings = {}
+    for doc_id, tf_doc in enumerate(docs):
+        for term_id, tf in tf_doc.items():
+            postings, tfs = term_postings.setdefault(term_id, ([], []))
+            postings.append(doc_id)
+            tfs.append(tf)
+
+    groups = {"df < 16": [], "16 <= df < 1024": [], "df >= 1024": []}
+    for postings, tfs in term_postings.values():
+        encoded = (VBEPostings.encode(postings), VBEPostings.encode_tf(tfs))
+        assert encoded == (NumpyVBEPostings.encode(postings), NumpyVBEPostings.encode_tf(tfs)), \
+               "hasil encoding NumpyVBEPostings berbeda"
+        assert NumpyVBEPostings.decode(encoded[0]).tolist() == postings, "hasil decoding NumpyVBEPostings salah"
+        assert NumpyVBEPostings.decode_tf(encoded[1]).tolist() == tfs, "hasil decoding NumpyVBEPostings salah"
+        group = "df < 16" if len(postings) < 16 else "16 <= df < 1024" if len(postings) < 1024 else "df >= 1024"
+        groups[group].append(encoded)
+
+    print(f"docs: {num_docs}, terms: {len(term_postings)}")
+    for group, encoded_lists in groups.items():
+        num_postings = sum(len(VBEPostings.vb_decode(postings)) for postings, _ in encoded_lists)
+        times = [timed(lambda encoded: (codec.decode(encoded[0]), codec.decode_tf(encoded[1])), encoded_lists)
+                 for codec in (VBEPostings, NumpyVBEPostings)]
+        print(f"decode {group:<16}: {len(encoded_lists):>6} lists, {num_postings:>9} postings, "
+              f"VBEPostings {times[0]:.3f} s, NumpyVBEPostings {times[1]:.3f} s ({times[0] / times[1]:.1f}x)")
+
+    postings_lists = [postings for postings, _ in term_postings.values()]
+    encode_time = timed(VBEPostings.encode, postings_lists, repeat = 1)
+    batch_time = timed(NumpyVBEPostings.encode_batch, [postings_lists], repeat = 1)
+    print(f"encode semua postings: VBEPostings {encode_time:.3f} s, "
+          f"NumpyVBEPostings.encode_batch {batch_time:.3f} s ({encode_time / batch_time:.1f}x)")
+
+
+def bench_intersection(num_docs = 50000, num_terms = 20000, doc_length = 100, num_queries = 200):
+    """
+    Conjunctive query (intersection) antara sebuah term jarang dan sebuah term
+    yang sangat sering muncul: VBEPostings (kedua postings list di-decode
+    seluruhnya lalu di-intersect dengan set) dibandingkan dengan BlockPostings
+    (cursor next_geq yang melompati block yang tidak dibutuhkan).
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    rng = random.Random(1906292881)
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = {}
+        for codec in (VBEPostings, BlockPostings):
+            os.makedirs(os.path.join(directory, codec.__name__))
+            write_runs(docs, 1, os.path.join(directory, codec.__name__), postings_encoding = codec)
+            sizes[codec] = os.path.getsize(os.path.join(directory, codec.__name__, 'intermediate_index_0.index'))
+
+        with InvertedIndexReader('intermediate_index_0', VBEPostings,
+                                 directory = os.path.join(directory, 'VBEPostings')) as vbe_index, \
+             InvertedIndexReader('intermediate_index_0', BlockPostings,
+                                 directory = os.path.join(directory, 'BlockPostings')) as block_index:
+            dfs = {term_id: entry[1] for term_id, entry in vbe_index.postings_dict.items()}
+            rare = [term_id for term_id, df in dfs.items() if 20 <= df <= 200]
+            frequent = [term_id for term_id, df in dfs.items() if df >= num_docs // 10]
+            queries = [(rng.choice(rare), rng.choice(frequent)) for _ in range(num_queries)]
+
+            start = time.perf_counter()
+            expected = []
+            for terms in queries:
+                postings = [set(vbe_index.get_postings_list(term_id)[0]) for term_id in terms]
+                expected.append(sorted(postings[0] & postings[1]))
+            vbe_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            blocks_decoded, blocks_total = 0, 0
+            for terms, expected_docs in zip(queries, expected):
+                cursors = [block_index.get_postings_cursor(term_id) for term_id in terms]
+                assert intersect_cursors(cursors) == expected_docs, "hasil intersection BlockPostings salah"
+                blocks_decoded += sum(cursor.blocks_decoded for cursor in cursors)
+                blocks_total += sum(len(cursor.lasts) for cursor in cursors)
+            block_time = time.perf_counter() - start
+
+    print(f"docs: {num_docs}, queries: {num_queries} (term jarang AND term sering)")
+    print(f"ukuran index   : VBEPostings {sizes[VBEPostings]:,} bytes, BlockPostings {sizes[BlockPostings]:,} bytes")
+    print(f"VBEPostings    : {vbe_time:.3f} s")
+    print(f"BlockPostings  : {block_time:.3f} s ({vbe_time / block_time:.1f}x), "
+          f"{blocks_decoded} dari {blocks_total} block di-decode")
+
+
+def bench_reader(num_docs = 20000, num_terms = 20000, doc_length = 100, num_lookups = 20000):
+    """
+    Membandingkan InvertedIndexReader biasa (seek + read) dengan mode mmap
+    (slice memoryview tanpa copy) untuk get_postings_list dengan term acak
+    (uniform, sehingga sebagian besar postings list pendek dan biaya membaca
+    bytes dominan), untuk setiap postings encoding.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    print(f"docs: {num_docs}, lookups: {num_lookups}")
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in (VBEPostings, NumpyVBEPostings, BlockPostings):
+            codec_dir = os.path.join(directory, codec.__name__)
+            os.makedirs(codec_dir)
+            write_runs(docs, 1, codec_dir, postings_encoding = VBEPostings if codec is NumpyVBEPostings else codec)
+            times, results = [], []
+            for use_mmap in (False, True):
+                with InvertedIndexReader('intermediate_index_0', codec, directory = codec_dir,
+                                         use_mmap = use_mmap) as index:
+                    lookups = random.Random(1906292881).choices(sorted(index.postings_dict), k = num_lookups)
+                    start = time.perf_counter()
+                    for term_id in lookups:
+                        index.get_postings_list(term_id)
+                    times.append(time.perf_counter() - start)
+                    results.append([list(values) for term_id in lookups[:100]
+                                    for values in index.get_postings_list(term_id)])
+            assert results[0] == results[1], "hasil mode mmap berbeda"
+            print(f"{codec.__name__:<17}: read {times[0]:.3f} s, mmap {times[1]:.3f} s ({times[0] / times[1]:.2f}x)")
+
+
+def bench_open(num_docs = 20000, num_terms = 200000, doc_length = 100, repeat = 5):
+    """
+    Membandingkan waktu membuka sebuah index lalu membaca satu postings list,
+    antara postings_dict yang di-pickle di file .dict (format lama) dan
+    TermDictionary yang di-memory-map dari file .terms.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    with tempfile.TemporaryDirectory() as directory:
+        write_runs(docs, 1, directory)
+        term_dictionary = TermDictionary.open(os.path.join(directory, 'intermediate_index_0.terms'))
+        postings_dict = dict(term_dictionary.items())
+        term_dictionary.close()
+        with open(os.path.join(directory, 'intermediate_index_0.dict'), 'rb') as f:
+            doc_length = pickle.load(f)["doc_length"]
+        shutil.copy(os.path.join(directory, 'intermediate_index_0.index'), os.path.join(directory, 'legacy.index'))
+        with open(os.path.join(directory, 'legacy.dict'), 'wb') as f:
+            pickle.dump([postings_dict, sorted(postings_dict), doc_length], f)
+        term_id = max(postings_dict)
+        print(f"docs: {num_docs}, terms: {len(postings_dict)}")
+        results = {}
+        for label, name in (("pickle .dict", 'legacy'), ("mmap .terms", 'intermediate_index_0')):
+            def open_and_read(name):
+                with InvertedIndexReader(name, VBEPostings, directory = directory) as index:
+                    return index.get_postings_list(term_id)
+            elapsed = timed(open_and_read, [name], repeat)
+            results[label] = open_and_read(name)
+            print(f"{label:<13}: {elapsed * 1000:.2f} ms per open")
+        assert len(set(map(str, results.values()))) == 1, "hasil berbeda"
+
+
+def bench_idmap(num_strings = 500000, num_lookups = 100000):
+    """
+    Membandingkan IdMap yang di-pickle dengan FrozenIdMap yang di-memory-map:
+    waktu dan memori (tracemalloc) untuk memuat, serta waktu lookup
+    string -> id dan id -> string.
+    """
+    rng = random.Random(1906292881)
+    id_map = IdMap()
+    for i in range(num_strings):
+        id_map[f"{rng.randrange(100)}/{i}.txt"]
+    strings = rng.choices(id_map.id_to_str, k = num_lookups)
+    ids = [rng.randrange(num_strings) for _ in range(num_lookups)]
+    print(f"strings: {num_strings}, lookups: {num_lookups}")
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'docs.dict')
+        frozen_path = os.path.join(directory, 'docs.ids')
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(id_map, f)
+        FrozenIdMap.write(frozen_path, id_map)
+
+        def load_pickle(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        for label, load, path in (("pickle IdMap", load_pickle, pickle_path),
+                                  ("FrozenIdMap", FrozenIdMap.open, frozen_path)):
+            start = time.perf_counter()
+            loaded = load(path)
+            load_time = time.perf_counter() - start
+            # memori diukur terpisah karena tracemalloc memperlambat loading
+            tracemalloc.start()
+            traced = load(path)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del traced
+            str_time = timed(loaded.__getitem__, strings)
+            id_time = timed(loaded.__getitem__, ids)
+            assert [loaded[s] for s in strings[:100]] == [id_map[s] for s in strings[:100]], "hasil berbeda"
+            print(f"{label:<13}: load {load_time * 1000:.1f} ms, {memory / 2 ** 20:.1f} MB, "
+                  f"str->id {str_time / num_lookups * 1e6:.2f} us, id->str {id_time / num_lookups * 1e6:.2f} us")
+            if isinstance(loaded, FrozenIdMap):
+                loaded.close()
+
+
+def bench_adaptive(num_docs = 20000, num_terms = 20000, doc_length = 100):
+    """
+    Membandingkan AdaptivePostings (codec dipilih per term) dengan VBEPostings:
+    ukuran file index, waktu menulis index, dan waktu decoding semua postings
+    dan TF lists (scan seluruh index), serta banyaknya term per codec.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    print(f"docs: {num_docs}")
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        for codec in (VBEPostings, AdaptivePostings):
+            codec_dir = os.path.join(directory, codec.__name__)
+            os.makedirs(codec_dir)
+            start = time.perf_counter()
+            index_id, = write_runs(docs, 1, codec_dir, postings_encoding = codec)
+            write_time = time.perf_counter() - start
+            with InvertedIndexReader(index_id, codec, directory = codec_dir) as index:
+                start = time.perf_counter()
+                results.append(list(index))
+                decode_time = time.perf_counter() - start
+                size = os.path.getsize(index.index_file_path)
+                usage = {}
+                for pos, _, len_postings, len_tf in index.postings_dict.values():
+                    if codec is AdaptivePostings:
+                        postings_codec = AdaptivePostings.CODECS[AdaptivePostings.read_tag(index.read(pos, len_postings))[0]]
+                        tf_codec = AdaptivePostings.TF_CODECS[AdaptivePostings.read_tag(index.read(pos + len_postings, len_tf))[0]]
+                        usage[postings_codec] = usage.get(postings_codec, 0) + 1
+                        usage["TF " + tf_codec] = usage.get("TF " + tf_codec, 0) + 1
+            print(f"{codec.__name__:<16}: index {size / 2 ** 20:.2f} MB, write {write_time:.2f} s, "
+                  f"decode {decode_time:.3f} s")
+            if usage:
+                print("    terms per codec: " + ", ".join(f"{name} {count}" for name, count in sorted(usage.items())))
+        assert results[0] == results[1], "hasil decoding AdaptivePostings berbeda"
+
+
+def bench_cache(num_docs = 20000, num_terms = 20000, doc_length = 100, num_queries = 2000, terms_per_query = 4,
+                max_bytes = 16 * 2 ** 20):
+    """
+    Mengukur PostingsCache: query-query (term dipilih dengan distribusi Zipf,
+    sehingga head terms sering berulang) dijalankan dengan satu reader per
+    query, seperti retrieval di BSBIIndex, tanpa dan dengan cache bersama.
+    Juga mengukur lookup head term yang sudah ada di cache (warm).
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    rng = random.Random(1906292881)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, num_terms + 1)))
+    queries = [rng.choices(range(num_terms), cum_weights = cum_weights, k = terms_per_query) for _ in range(num_queries)]
+    print(f"docs: {num_docs}, queries: {num_queries}, budget: {max_bytes / 2 ** 20:.0f} MB")
+    with tempfile.TemporaryDirectory() as directory:
+        index_id, = write_runs(docs, 1, directory)
+        results = []
+        for cache in (None, PostingsCache(max_bytes)):
+            start = time.perf_counter()
+            result = []
+            for query in queries:
+                with InvertedIndexReader(index_id, VBEPostings, directory = directory, cache = cache) as index:
+                    result.append([len(index.get_postings_list(term_id)[0]) for term_id in query])
+            elapsed = time.perf_counter() - start
+            results.append(result)
+            label = "tanpa cache" if cache is None else "dengan cache"
+            print(f"{label:<12}: {elapsed:.3f} s ({elapsed / num_queries * 1000:.3f} ms per query)")
+            if cache is not None:
+                stats = cache.stats()
+                print(f"    hits {stats['hits']}, misses {stats['misses']}, hit rate {stats['hit_rate']:.1%}, "
+                      f"evictions {stats['evictions']}, {stats['bytes'] / 2 ** 20:.1f} MB")
+        assert results[0] == results[1], "hasil dengan cache berbeda"
+
+        head_term = 0
+        for cache in (None, PostingsCache(max_bytes)):
+            with InvertedIndexReader(index_id, VBEPostings, directory = directory, cache = cache) as index:
+                df = index.postings_dict[head_term][1]
+                index.get_postings_list(head_term)
+                elapsed = timed(index.get_postings_list, [head_term] * 100) / 100
+            label = "decode" if cache is None else "warm cache"
+            print(f"head term (df {df}) {label:<10}: {elapsed * 1e6:.1f} us")
+
+
+def index_bytes(directory):
+    """Total ukuran file .index semua segment yang live (postings, TF, dan posisi)."""
+    with open(os.path.join(directory, 'segments.dict'), 'rb') as f:
+        segments = pickle.load(f)["segments"]
+    return sum(os.path.getsize(os.path.join(directory, name + '.index')) for name, _ in segments)
+
+
+def collection_queries(path = os.path.join(os.path.dirname(__file__), 'queries.txt')):
+    """Query-query di queries.txt (tanpa query id)."""
+    with open(path) as f:
+        return [line.split(' ', 1)[1].strip() for line in f if line.strip()]
+
+
+def bench_reorder(strategies = ("path", "bisection"), postings_encodings = (VBEPostings, AdaptivePostings)):
+    """
+    Mengukur docID reordering (BSBIIndex.reorder_documents) pada koleksi di
+    folder collection: ukuran postings (file .index) dan latency bm_25 untuk
+    semua query di queries.txt, sebelum dan sesudah reordering. Hasil
+    retrieval (semua dokumen dan score-nya) harus sama.
+    """
+    data_dir = os.path.join(os.path.dirname(__file__), 'collection')
+    queries = collection_queries()
+
+    def run_queries(instance):
+        return [sorted(instance.bm_25(query, k = 10 ** 6)) for query in queries]
+
+    print(f"queries: {len(queries)}")
+    for postings_encoding in postings_encodings:
+        with tempfile.TemporaryDirectory() as directory:
+            original = os.path.join(directory, 'original')
+            os.mkdir(original)
+            BSBIIndex(data_dir, original, postings_encoding).index()
+            expected = run_queries(BSBIIndex(data_dir, original, postings_encoding))
+            size = index_bytes(original)
+            latency = timed(run_queries, [BSBIIndex(data_dir, original, postings_encoding)], repeat = 5) / len(queries)
+            print(f"{postings_encoding.__name__}")
+            print(f"    {'asli':<10}: {size:>8,} bytes, {latency * 1000:.2f} ms per query")
+            for strategy in strategies:
+                output_dir = os.path.join(directory, strategy)
+                shutil.copytree(original, output_dir)
+                instance = BSBIIndex(data_dir, output_dir, postings_encoding)
+                start = time.perf_counter()
+                instance.reorder_documents(strategy)
+                elapsed = time.perf_counter() - start
+                instance = BSBIIndex(data_dir, output_dir, postings_encoding)
+                assert run_queries(instance) == expected, "hasil retrieval berubah setelah reordering"
+                reordered_size = index_bytes(output_dir)
+                reordered_latency = timed(run_queries, [instance], repeat = 5) / len(queries)
+                print(f"    {strategy:<10}: {reordered_size:>8,} bytes ({reordered_size / size:.3f}x), "
+                      f"{reordered_latency * 1000:.2f} ms per query ({latency / reordered_latency:.2f}x), "
+                      f"reordering {elapsed:.2f} s")
+
+
+def bench_searcher(postings_encoding = VBEPostings, repeat = 5):
+    """
+    Mengukur latency per query (semua query di queries.txt, dengan retrieve_tfidf
+    dan bm_25) pada koleksi di folder collection: BSBIIndex yang memuat id maps,
+    statistik, dan segment-segment untuk setiap query, dibandingkan dengan
+    Searcher yang memuatnya sekali saja. Hasil keduanya harus sama.
+    """
+    data_dir = os.path.join(os.path.dirname(__file__), 'collection')
+    queries = collection_queries()
+    with tempfile.TemporaryDirectory() as directory:
+        BSBIIndex(data_dir, directory, postings_encoding).index()
+        for method in ('retrieve_tfidf', 'bm_25'):
+            instance = BSBIIndex(data_dir, directory, postings_encoding)
+            expected = [getattr(instance, method)(query) for query in queries]
+            latency = timed(getattr(instance, method), queries, repeat) / len(queries)
+            with Searcher(BSBIIndex(data_dir, directory, postings_encoding)) as searcher:
+                assert [getattr(searcher, method)(query) for query in queries] == expected, \
+                    "hasil Searcher berbeda"
+                searcher_latency = timed(getattr(searcher, method), queries, repeat) / len(queries)
+                reloads = searcher.reloads
+            print(f"{method:<15}: load per query {latency * 1000:.2f} ms, Searcher {searcher_latency * 1000:.2f} ms "
+                  f"({latency / searcher_latency:.1f}x), reloads {reloads}")
+
+        with Searcher(BSBIIndex(data_dir, directory, postings_encoding)) as searcher:
+            searcher.refresh()
+            check = timed(lambda _: searcher.refresh(), range(1000)) / 1000
+            start = time.perf_counter()
+            searcher.version = None
+            searcher.refresh()
+            reload = time.perf_counter() - start
+        print(f"cek versi index: {check * 1e6:.1f} us, reload: {reload * 1000:.2f} ms")
+
+
+def bench_accumulator(postings_encoding = VBEPostings, k = 10, repeat = 5):
+    """
+    Akumulasi score term-at-a-time untuk semua query di queries.txt (postings
+    dan weight BM25 setiap term sudah dihitung): dictionary dengan key nama
+    dokumen (lookup doc_id_map untuk setiap posting) lalu sort semua kandidat,
+    dibandingkan dengan ScoreAccumulator (array yang diindeks docID dan
+    heapq.nlargest, nama dokumen hanya untuk top-k). Hasil keduanya harus sama.
+    """
+    data_dir = os.path.join(os.path.dirname(__file__), 'collection')
+    queries = collection_queries()
+    with tempfile.TemporaryDirectory() as directory:
+        BSBIIndex(data_dir, directory, postings_encoding).index()
+        with Searcher(BSBIIndex(data_dir, directory, postings_encoding)) as searcher:
+            index = searcher.index
+            with index.reading() as readers:
+                doc_id_map = index.doc_id_map
+                query_lists = []
+                for query in queries:
+                    lists = []
+                    for term in index.analyze(query):
+                        if term not in index.term_id_map:
+                            continue
+                        df, segment_lists = index.segment_postings(readers, index.term_id_map[term])
+                        if df == 0:
+                            continue
+                        idf = math.log(index.num_docs / df)
+                        for postings_list, tf_list in segment_lists:
+                            norms = [BM25_K * ((1 - BM25_B) + BM25_B * index.dl_all[doc_id] / index.avdl)
+                                     for doc_id in postings_list]
+                            lists.append((postings_list, [(BM25_K + 1) * tf / (norm + tf) * idf
+                                                          for tf, norm in zip(tf_list, norms)]))
+                    query_lists.append(lists)
+
+                def dict_top_k(lists):
+                    result = {}
+                    for postings_list, weights in lists:
+                        for doc_id, weight in zip(postings_list, weights):
+                            doc = doc_id_map[doc_id]
+                            result[doc] = result.get(doc, 0) + weight
+                    result = sorted(zip(result.values(), result.keys()), key = lambda x: x[0], reverse = True)
+                    return result[:k]
+
+                def array_top_k(lists):
+                    accumulator = ScoreAccumulator(len(doc_id_map))
+                    for postings_list, weights in lists:
+                        accumulator.add(postings_list, weights)
+                    return index.top_k_documents(accumulator, k)
+
+                assert [array_top_k(lists) for lists in query_lists] == [dict_top_k(lists) for lists in query_lists], \
+                    "hasil ScoreAccumulator berbeda"
+                postings = sum(len(postings_list) for lists in query_lists for postings_list, _ in lists)
+                dict_time = timed(dict_top_k, query_lists, repeat) / len(queries)
+                array_time = timed(array_top_k, query_lists, repeat) / len(queries)
+            print(f"{postings / len(queries):,.0f} postings per query: dict + sort {dict_time * 1000:.2f} ms, "
+                  f"ScoreAccumulator {array_time * 1000:.2f} ms ({dict_time / array_time:.1f}x)")
+            for method in ('retrieve_tfidf', 'bm_25'):
+                latency = timed(lambda query: getattr(searcher, method)(query, k), queries, repeat) / len(queries)
+                print(f"{method:<15}: {latency * 1000:.2f} ms per query")
+
+
+def bench_vectorized(num_docs = 20000, num_terms = 20000, doc_length = 100, num_queries = 20, repeat = 3):
+    """
+    Scoring term-at-a-time dengan loop Python per posting dibandingkan dengan
+    scoring vectorized (vectorized = True) untuk retrieve_tfidf dan bm_25, pada
+    koleksi sintetis (lihat synthetic_collection) yang di-index dengan
+    index_packed. Query terdiri dari term-term yang sering muncul (postings
+    list panjang). Index dibaca dengan VBEPostings (hasil decoding berupa list)
+    dan NumpyVBEPostings (bytestream yang sama, hasil decoding berupa
+    np.ndarray). Score kedua cara harus sama sampai toleransi floating point.
+    """
+    docs = synthetic_collection(num_docs, num_terms, doc_length)
+    rng = random.Random(1906292881)
+    queries = [" ".join(f"w{term_id}x" for term_id in rng.sample(range(50), 3)) for _ in range(num_queries)]
+    with tempfile.TemporaryDirectory() as directory:
+        packed_path = os.path.join(directory, 'docs.jsonl')
+        with open(packed_path, 'w') as f:
+            for doc_id, tf_doc in enumerate(docs):
+                text = " ".join(f"w{term_id}x" for term_id, tf in tf_doc.items() for _ in range(tf))
+                f.write(json.dumps({"id": str(doc_id), "text": text}) + "\n")
+        output_dir = os.path.join(directory, 'index')
+        os.makedirs(output_dir)
+        BSBIIndex(directory, output_dir, VBEPostings).index_packed(packed_path, docs_per_block = 5000)
+
+        for postings_encoding in (VBEPostings, NumpyVBEPostings):
+            with Searcher(BSBIIndex(directory, output_dir, postings_encoding)) as searcher:
+                with searcher.acquire() as readers:
+                    index = searcher.index
+                    postings = sum(index.segment_postings(readers, index.term_id_map[term])[0]
+                                   for query in queries for term in index.analyze(query) if term in index.term_id_map)
+                for method in ('retrieve_tfidf', 'bm_25'):
+                    retrieve = getattr(searcher, method)
+                    for query in queries:
+                        expected = retrieve(query, vectorized = False)
+                        result = retrieve(query, vectorized = True)
+                        assert all(math.isclose(score, expected_score, rel_tol = 1e-12)
+                                   for (score, _), (expected_score, _) in zip(result, expected)), \
+                            "hasil scoring vectorized berbeda"
+                    loop = timed(lambda query: retrieve(query, vectorized = False), queries, repeat) / len(queries)
+                    vectorized = timed(lambda query: retrieve(query, vectorized = True), queries, repeat) / len(queries)
+                    print(f"{postings_encoding.__name__:<17} {method:<15}: {postings / len(queries):,.0f} postings "
+                          f"per query, loop {loop * 1000:.2f} ms, vectorized {vectorized * 1000:.2f} ms "
+                          f"({loop / vectorized:.1f}x)")
+
+
+def bench_wand(postings_encoding = VBEPostings, ks = (10, 100), repeat = 5):
+    """
+    Membandingkan bm_25 (term-at-a-time, exhaustive) dengan bm_25_wand
+    (document-at-a-time dengan WAND) untuk semua query di queries.txt pada
+    koleksi di folder collection, dengan Searcher (tanpa biaya memuat index).
+    Score top-k keduanya harus sama. Juga dilaporkan banyaknya dokumen yang
+    di-score oleh bm_25_wand dibandingkan total panjang postings list term query.
+
+    Sejak bm_25 memakai ScoreAccumulator, bm_25_wand tidak lebih cepat: hasil
+    terakhir ~1.0x untuk k = 10 dan ~0.4-0.6x untuk k = 100 (lihat catatan
+    performa di BSBIIndex.bm_25_wand).
+    """
+    data_dir = os.path.join(os.path.dirname(__file__), 'collection')
+    queries = collection_queries()
+    with tempfile.TemporaryDirectory() as directory:
+        BSBIIndex(data_dir, directory, postings_encoding).index()
+        with Searcher(BSBIIndex(data_dir, directory, postings_encoding)) as searcher:
+            for k in ks:
+                counters = collections.Counter()
+                for query in queries:
+                    expected = [score for score, _ in searcher.bm_25(query, k)]
+                    assert [score for score, _ in searcher.bm_25_wand(query, k, counters)] == expected, \
+                        "hasil bm_25_wand berbeda dengan bm_25"
+                exhaustive = timed(lambda query: searcher.bm_25(query, k), queries, repeat) / len(queries)
+                pruned = timed(lambda query: searcher.bm_25_wand(query, k), queries, repeat) / len(queries)
+                print(f"k = {k:<4}: bm_25 {exhaustive * 1000:.2f} ms, bm_25_wand {pruned * 1000:.2f} ms "
+                      f"({exhaustive / pruned:.1f}x), di-score {counters['scored']:,} dari {counters['postings']:,} "
+                      f"postings ({counters['scored'] / counters['postings']:.1%})")
+
+
+def bench_bmw(encodings = (VBEPostings, BlockPostings), ks = (10, 100), repeat = 5):
+    """
+    Membandingkan bm_25 (exhaustive), bm_25_wand, dan bm_25_bmw (Block-Max
+    WAND) untuk semua query di queries.txt pada koleksi di folder collection,
+    dengan Searcher. Score top-k ketiganya harus sama. Juga dilaporkan banyaknya
+    dokumen yang di-score dan (untuk BlockPostings) block yang di-decode.
+    """
+    data_dir = os.path.join(os.path.dirname(__file__), 'collection')
+    queries = collection_queries()
+    methods = ('bm_25_wand', 'bm_25_bmw')
+    for postings_encoding in encodings:
+        print(postings_encoding.__name__)
+        with tempfile.TemporaryDirectory() as directory:
+            BSBIIndex(data_dir, directory, postings_encoding).index()
+            with Searcher(BSBIIndex(data_dir, directory, postings_encoding)) as searcher:
+                for k in ks:
+                    counters = {method: collections.Counter() for method in methods}
+                    for query in queries:
+                        expected = [score for score, _ in searcher.bm_25(query, k)]
+                        for method in methods:
+                            result = getattr(searcher, method)(query, k, counters[method])
+                            assert [score for score, _ in result] == expected, f"hasil {method} berbeda dengan bm_25"
+                    exhaustive = timed(lambda query: searcher.bm_25(query, k), queries, repeat) / len(queries)
+                    print(f"  k = {k:<4}: bm_25 {exhaustive * 1000:.2f} ms")
+                    for method in methods:
+                        retrieve = getattr(searcher, method)
+                        pruned = timed(lambda query: retrieve(query, k), queries, repeat) / len(queries)
+                        count = counters[method]
+                        blocks = f", {count['blocks_decoded']:,} block di-decode" if count['blocks_decoded'] else ""
+                        print(f"    {method:<11}{pruned * 1000:.2f} ms ({exhaustive / pruned:.1f}x), di-score "
+                              f"{count['scored']:,} dari {count['postings']:,} postings "
+                              f"({count['scored'] / count['postings']:.1%}){blocks}")
+
+
+BENCHMARKS = {
+    'merge': bench_merge,
+    'analyzer': bench_analyzer,
+    'codec': bench_codec,
+    'intersection': bench_intersection,
+    'reader': bench_reader,
+    'open': bench_open,
+    'idmap': bench_idmap,
+    'adaptive': bench_adaptive,
+    'cache': bench_cache,
+    'reorder': bench_reorder,
+    'searcher': bench_searcher,
+    'accumulator': bench_accumulator,
+    'vectorized': bench_vectorized,
+    'wand': bench_wand,
+    'bmw': bench_bmw,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    # tanpa choices: argparse (3.11) memeriksa list kosong dari nargs = '*' terhadap choices
+    parser.add_argument('benchmarks', nargs = '*', metavar = 'benchmark',
+                        help = "benchmark yang dijalankan (default: semua): " + ", ".join(BENCHMARKS))
+    names = parser.parse_args().benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("benchmark tidak dikenal: " + ", ".join(unknown))
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -1,9 +1,14 @@
 import os
+import array
 import pickle
 import contextlib
 import heapq
+import itertools
 import math
+import multiprocessing
+import tempfile
 import nltk
+import numpy as np
 import ssl
 
 try:
@@ -17,12 +22,14 @@ nltk.download('stopwords')
 nltk.download('punkt')
 
 from .index import InvertedIndexReader, InvertedIndexWriter
-from .util import IdMap, sorted_merge_posts_and_tfs
+from .util import IdMap, FrozenIdMap, ScoreAccumulator, NumpyScoreAccumulator, merge_postings_and_tfs, intersect_cursors, wand, block_max_wand, phrase_matches, proximity_matches
 from .compression import VBEPostings
+from .segment import SegmentManager
+from .stats import CollectionStats
+from . import reorder
+from .analyzer import Analyzer
+from .corpus import read_block_dir, read_docs, read_packed, chunked
 from tqdm import tqdm
-from nltk import word_tokenize
-from nltk.corpus import stopwords 
-from nltk.stem.snowball import SnowballStemmer
 
 
 '''
@@ -31,6 +38,51 @@ Andre Septiano - 1906398313
 Matthew Tumbur Parluhutan - 1906308500
 '''
 
+# Perkiraan kasar penggunaan memori (dalam bytes) pada spimi_invert: overhead
+# untuk sebuah term baru (entry dictionary + dua array), dan untuk sebuah
+# posting (docID dan TF masing-masing 8 byte di array 'L'), serta untuk sebuah
+# posisi pada positional index (int di dalam list)
+SPIMI_TERM_BYTES = 256
+SPIMI_POSTING_BYTES = 16
+SPIMI_POSITION_BYTES = 36
+
+# Block dengan lebih dari SPILL_PAIRS pasangan <termID, docID> di-inversion
+# dengan external sort (lihat spill_invert_write), yang juga mengumpulkan paling
+# banyak SPILL_PAIRS triple (termID, docID, TF) di memori per run. Saat k-way
+# merge, SPILL_READ_TRIPLES triple dibaca sekaligus dari setiap run
+SPILL_PAIRS = 1 << 21
+SPILL_READ_TRIPLES = 1 << 14
+
+# Build manifest untuk melanjutkan indexing yang terhenti (lihat BSBIIndex.checkpoint)
+BUILD_MANIFEST = 'build.dict'
+
+# Statistik koleksi untuk retrieval (lihat CollectionStats dan BSBIIndex.write_stats)
+STATS_FILE = 'collection.stats'
+
+# Parameter BM25 (lihat BSBIIndex.bm_25)
+BM25_K = 1.5
+BM25_B = 0.8
+
+# BSBIIndex milik masing-masing worker process (lihat _init_parse_worker)
+_worker_index = None
+
+def _init_parse_worker(data_dir):
+    """Initializer untuk setiap worker process pada mode parallel indexing."""
+    global _worker_index
+    _worker_index = BSBIIndex(data_dir = data_dir, output_dir = None, postings_encoding = None)
+
+def _parse_block_worker(block_dir_relative):
+    """
+    Parsing sebuah block di worker process dengan term_id_map dan doc_id_map
+    LOKAL (kosong untuk setiap block). Yang dikembalikan adalah tabel term dan
+    dokumen lokal (sesuai urutan kemunculan pertama) beserta td_pairs dalam
+    ID lokal, untuk kemudian direkonsiliasi oleh BSBIIndex.reconcile_block.
+    """
+    _worker_index.term_id_map = IdMap()
+    _worker_index.doc_id_map = IdMap()
+    td_pairs = _worker_index.parse_block(block_dir_relative)
+    return (_worker_index.term_id_map.id_to_str, _worker_index.doc_id_map.id_to_str, td_pairs)
+
 class BSBIIndex:
     """
     Attributes
@@ -43,46 +95,240 @@ class BSBIIndex:
     postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
                     VBEPostings, dsb.
     index_name(str): Nama dari file yang berisi inverted index
+    segments(SegmentManager): Daftar segment index yang live. Hasil index() adalah
+                    sebuah segment bernama index_name (atau segment_<generation>
+                    jika index_name sedang live, lihat merge_intermediate);
+                    add_block menambahkan
+                    segment baru tanpa rebuild. Retrieval dilakukan di semua
+                    segment yang live.
+    positional(bool): Jika True, index juga menyimpan posisi setiap term di
+                    setiap dokumen, yaitu urutan term tersebut di hasil analyze
+                    (setelah stopwords dibuang), sehingga phrase query dan
+                    proximity query bisa dilakukan (lihat retrieve_phrase dan
+                    retrieve_proximity).
+    spill_pairs(int): Batas banyaknya pasangan <termID, docID> sebuah block
+                    yang di-inversion di memori oleh invert_write; block yang
+                    lebih besar di-inversion dengan external sort.
+    use_mmap(bool): Jika True, retrieval membaca segment-segment dengan
+                    InvertedIndexReader mode mmap (zero-copy, lihat index.py).
+    postings_cache(PostingsCache): Opsional, cache postings yang sudah di-decode
+                    yang dipakai bersama oleh semua query (lihat index.py).
+    searcher(Searcher): Searcher yang sedang terbuka untuk index ini (lihat
+                    searcher.py), atau None jika setiap query memuat index
+                    sendiri.
     """
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index"):
+    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index", merge_policy = None,
+                 positional = False, spill_pairs = SPILL_PAIRS, use_mmap = False, postings_cache = None):
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
         self.data_dir = data_dir
         self.output_dir = output_dir
         self.index_name = index_name
         self.postings_encoding = postings_encoding
+        self.positional = positional
+        self.spill_pairs = spill_pairs
+        self.use_mmap = use_mmap
+        self.postings_cache = postings_cache
+        self.searcher = None
 
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
-        self.stemmer = SnowballStemmer("english")
-        self.stop_words = stopwords.words("english")
-
+        self.analyzer = Analyzer("english")
+        self.stemmer = self.analyzer.stemmer
+        self.stop_words = self.analyzer.stop_words
+        self.segments = SegmentManager(output_dir, postings_encoding, self.merge,
+                                       merge_policy = merge_policy, default_segment = index_name)
 
     def save(self):
-        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+        """
+        Menyimpan doc_id_map and term_id_map ke output directory via pickle
+        (terms.dict dan docs.dict, untuk melanjutkan indexing), dan sebagai
+        FrozenIdMap (terms.ids dan docs.ids, untuk serving), secara atomik
+        (tulis ke file sementara lalu os.replace)
+        """
 
-        with open(os.path.join(self.output_dir, 'terms.dict'), 'wb') as f:
-            pickle.dump(self.term_id_map, f)
-        with open(os.path.join(self.output_dir, 'docs.dict'), 'wb') as f:
-            pickle.dump(self.doc_id_map, f)
+        for name, id_map in (('terms', self.term_id_map), ('docs', self.doc_id_map)):
+            path = os.path.join(self.output_dir, name)
+            with open(path + '.dict.tmp', 'wb') as f:
+                pickle.dump(id_map, f)
+            FrozenIdMap.write(path + '.ids.tmp', id_map)
+            os.replace(path + '.ids.tmp', path + '.ids')
+            os.replace(path + '.dict.tmp', path + '.dict')
 
-    def load(self):
-        """Memuat doc_id_map and term_id_map dari output directory"""
+    def load_id_maps(self, frozen = False):
+        """
+        Memuat doc_id_map and term_id_map dari output directory. Jika frozen,
+        dimuat FrozenIdMap (read-only, di-memory-map) dari terms.ids dan docs.ids
+        jika ada; jika tidak, IdMap di-unpickle dari terms.dict dan docs.dict.
+        """
 
+        if frozen and os.path.exists(os.path.join(self.output_dir, 'docs.ids')):
+            self.term_id_map = FrozenIdMap.open(os.path.join(self.output_dir, 'terms.ids'))
+            self.doc_id_map = FrozenIdMap.open(os.path.join(self.output_dir, 'docs.ids'))
+            return
         with open(os.path.join(self.output_dir, 'terms.dict'), 'rb') as f:
             self.term_id_map = pickle.load(f)
         with open(os.path.join(self.output_dir, 'docs.dict'), 'rb') as f:
             self.doc_id_map = pickle.load(f)
-        with InvertedIndexReader(
-            directory = self.output_dir,
-            index_name = self.index_name,
-            postings_encoding = self.postings_encoding) as invert_map:
-            self.dl_all = invert_map.doc_length
-            temp = 0
-            for doc in self.dl_all:
-                temp += self.dl_all[doc]
-            self.avdl = temp / len(self.dl_all)
 
+    def checkpoint(self, source, finished_blocks):
+        """
+        Menyimpan build manifest (BUILD_MANIFEST) setelah sebuah block selesai
+        di-index: daftar block yang sudah selesai, intermediate indices, dan
+        state term_id_map serta doc_id_map. Manifest ditulis secara atomik (tulis
+        ke file sementara lalu os.replace), sehingga jika indexing terhenti di
+        tengah jalan, manifest selalu berisi state setelah block terakhir yang
+        selesai.
+
+        Parameters
+        ----------
+        source: tuple
+            Identitas sumber dokumen dan opsi yang mempengaruhi pembagian block;
+            manifest hanya dipakai ulang untuk source yang sama
+        finished_blocks: List[str]
+            Nama-nama block yang intermediate index-nya sudah selesai ditulis
+        """
+        manifest = {"source": source,
+                    "positional": self.positional,
+                    "blocks": finished_blocks,
+                    "intermediate_indices": self.intermediate_indices,
+                    "term_id_map": self.term_id_map,
+                    "doc_id_map": self.doc_id_map}
+        manifest_path = os.path.join(self.output_dir, BUILD_MANIFEST)
+        with open(manifest_path + '.tmp', 'wb') as f:
+            pickle.dump(manifest, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    def restore_checkpoint(self, source):
+        """
+        Memulihkan state indexing dari build manifest (lihat checkpoint), jika
+        ada dan dibuat untuk source (dan mode positional) yang sama.
+
+        Returns
+        -------
+        List[str]
+            Nama-nama block yang sudah selesai, atau [] jika tidak ada yang
+            bisa dilanjutkan
+        """
+        try:
+            with open(os.path.join(self.output_dir, BUILD_MANIFEST), 'rb') as f:
+                manifest = pickle.load(f)
+        except FileNotFoundError:
+            return []
+        if manifest["source"] != source or manifest["positional"] != self.positional:
+            return []
+        self.term_id_map = manifest["term_id_map"]
+        self.doc_id_map = manifest["doc_id_map"]
+        self.intermediate_indices = list(manifest["intermediate_indices"])
+        return list(manifest["blocks"])
+
+    def load(self):
+        """
+        Memuat doc_id_map and term_id_map (FrozenIdMap) dari output directory,
+        serta statistik koleksi (CollectionStats, lihat write_stats): N, avdl,
+        dan panjang dokumen (yang belum dihapus) sebagai array yang diindeks
+        dengan docID. Untuk index yang belum mempunyai file statistik, panjang
+        dokumen dihitung dari doc_length semua segment yang live.
+        """
+        self.load_id_maps(frozen = True)
+        stats_path = os.path.join(self.output_dir, STATS_FILE)
+        if os.path.exists(stats_path):
+            self.stats = CollectionStats.open(stats_path)
+            self.dl_all = self.stats.doc_lengths
+            self.num_docs = self.stats.num_docs
+            self.avdl = self.stats.avdl
+            return
+        self.stats = None
+        self.dl_all = {}
+        with contextlib.ExitStack() as stack:
+            for invert_map in self.open_segments(stack):
+                for doc_id, length in invert_map.doc_length.items():
+                    if not invert_map.is_deleted(doc_id):
+                        self.dl_all[doc_id] = length
+        # N: banyaknya dokumen yang belum dihapus. doc_id_map tetap menyimpan
+        # dokumen yang sudah dihapus, sehingga tidak bisa dipakai untuk N
+        self.num_docs = len(self.dl_all)
+        temp = 0
+        for doc in self.dl_all:
+            temp += self.dl_all[doc]
+        self.avdl = temp / len(self.dl_all) if self.dl_all else 0
+
+    def write_stats(self, readers = None):
+        """
+        Menghitung dan menyimpan statistik koleksi (lihat CollectionStats) dari
+        semua segment yang live, atau dari readers (segment-segment yang live dan
+        sudah dibuka) jika diberikan. Dipanggil setiap kali isi index berubah:
+        setelah index, add_block (write_segment), dan delete_documents. Merging
+        segment tidak mengubah statistik.
+        """
+        path = os.path.join(self.output_dir, STATS_FILE)
+        if readers is not None:
+            CollectionStats.write(path, readers)
+            return
+        with contextlib.ExitStack() as stack:
+            with self.segments.lock:
+                readers = self.open_segments(stack)
+            CollectionStats.write(path, readers)
+
+    def open_segments(self, stack):
+        """
+        Membuka sebuah InvertedIndexReader untuk setiap segment yang live,
+        dengan lifetime yang diatur oleh stack (contextlib.ExitStack).
+        """
+        return [stack.enter_context(InvertedIndexReader(name, self.postings_encoding, directory = self.output_dir,
+                                                        use_mmap = self.use_mmap, cache = self.postings_cache))
+                for name in self.segments.live_segments()]
+
+    @contextlib.contextmanager
+    def reading(self):
+        """
+        Context manager untuk sebuah query: memastikan id maps dan statistik
+        koleksi sudah dimuat, dan menghasilkan readers semua segment yang live.
+        Jika ada Searcher yang terbuka, state Searcher tersebut yang dipakai
+        (dimuat ulang hanya jika index di disk berubah); jika tidak, index
+        dimuat (load) dan segment-segment dibuka untuk query ini saja.
+
+        Manifest dibaca dan segment-segment dibuka selama memegang
+        segments.lock, sehingga background merge tidak bisa menghapus segment
+        di antaranya; query sendiri berjalan tanpa lock.
+        """
+        if self.searcher is not None:
+            with self.searcher.acquire() as readers:
+                yield readers
+            return
+        with contextlib.ExitStack() as stack:
+            with self.segments.lock:
+                self.load()
+                readers = self.open_segments(stack)
+            yield readers
+
+    def segment_postings(self, readers, term_id, arrays = False):
+        """
+        Mengambil postings list (dan TF list) sebuah term dari semua segment.
+        Hasil decoding codec NumPy (np.ndarray, misal NumpyVBEPostings) diubah
+        menjadi list dengan tolist, karena iterasi per posting di Python atas
+        scalar NumPy jauh lebih lambat, kecuali jika arrays = True (untuk
+        scoring vectorized).
+
+        Returns
+        -------
+        Tuple[int, List[Tuple[List[int], List[int]]]]
+            (df, list of (postings_list, tf_list) dari setiap segment yang
+            mengandung term), dimana df adalah banyaknya dokumen (yang belum
+            dihapus) yang mengandung term di seluruh segment
+        """
+        lists = [reader.get_postings_list(term_id) for reader in readers if term_id in reader.postings_dict]
+        if not arrays:
+            lists = [tuple(values.tolist() if isinstance(values, np.ndarray) else values for values in entry)
+                     for entry in lists]
+        return sum(len(postings_list) for postings_list, _ in lists), lists
+
+    def analyze(self, text):
+        """
+        Mengubah text menjadi list of terms: lowercase, tokenization,
+        stemming, lalu membuang stopwords (lihat Analyzer).
+        """
+        return self.analyzer.analyze(text)
 
     def parse_block(self, block_dir_relative):
         """
@@ -111,30 +357,229 @@ class BSBIIndex:
         List[Tuple[Int, Int]]
             Returns all the td_pairs extracted from the block
             Mengembalikan semua pasangan <termID, docID> dari sebuah block (dalam hal
-            ini sebuah sub-direktori di dalam folder collection)
+            ini sebuah sub-direktori di dalam folder collection). Sebuah pasangan
+            muncul sebanyak TF term tersebut di dokumen, sehingga invert_write
+            dapat menghitung TF yang sebenarnya. Pasangan-pasangan sebuah
+            dokumen berurutan sesuai urutan term di dokumen, sehingga posisi
+            term juga dapat dihitung (positional index).
 
         Harus menggunakan self.term_id_map dan self.doc_id_map untuk mendapatkan
         termIDs dan docIDs. Dua variable ini harus 'persist' untuk semua pemanggilan
         parse_block(...).
         """
         # TODO
-        term_doc = set({})
-        fileList = os.listdir(os.path.join(self.data_dir, block_dir_relative))
+        return self.parse_texts(read_block_dir(self.data_dir, block_dir_relative))
 
-        for file in fileList:
-            file_dir = os.path.join(block_dir_relative, file)
-            text = open(os.path.join(self.data_dir, file_dir)).read()
-            text = text.lower()
-            words = nltk.word_tokenize(text)
-            words = [self.stemmer.stem(token) for token in words]
-            words = [token for token in words if token not in self.stop_words]
+    def parse_docs(self, doc_paths):
+        """
+        Sama seperti parse_block, tetapi untuk list of dokumen tertentu.
+
+        Parameters
+        ----------
+        doc_paths: List[str]
+            Relative path dokumen-dokumen (terhadap data_dir), misal "1/29.txt"
+
+        Returns
+        -------
+        List[Tuple[Int, Int]]
+            Semua pasangan <termID, docID> dari dokumen-dokumen tersebut
+        """
+        return self.parse_texts(read_docs(self.data_dir, doc_paths))
+
+    def parse_texts(self, docs):
+        """
+        Sama seperti parse_block, untuk dokumen-dokumen dari sumber apapun
+        (lihat modul corpus).
+
+        Parameters
+        ----------
+        docs: Iterable[Tuple[str, str]]
+            Pasangan (nama dokumen, text); nama dokumen dipetakan ke docID
+            dengan self.doc_id_map
+
+        Returns
+        -------
+        List[Tuple[Int, Int]]
+            Semua pasangan <termID, docID> dari dokumen-dokumen tersebut
+        """
+        return list(self.iter_pairs(docs))
+
+    def iter_pairs(self, docs):
+        """
+        Generator versi parse_texts: pasangan <termID, docID> dihasilkan satu
+        per satu sambil membaca dokumen, sehingga seluruh pasangan sebuah block
+        tidak perlu ada di memori sekaligus (lihat invert_write).
+        """
+        for file_dir, text in docs:
+            words = self.analyze(text)
 
             doc_id = self.doc_id_map.__getitem__(file_dir)
 
             for word in words:
                 term_id = self.term_id_map.__getitem__(word)
-                term_doc.add((term_id, doc_id))
-        return list(term_doc)
+                yield (term_id, doc_id)
+
+    def spimi_invert(self, block_dir_relative, memory_budget, docs = None):
+        """
+        Single-pass in-memory indexing (SPIMI) untuk sebuah block, dengan batas
+        penggunaan memori.
+
+        Berbeda dengan parse_block + invert_write yang mengumpulkan td_pairs
+        satu block penuh di memori, method ini langsung membangun postings
+        (docID dan TF, di dalam array) per term sambil melakukan tokenization.
+        TF (dan posisi, jika positional) dihitung per dokumen. Setiap kali
+        perkiraan penggunaan memori (lihat SPIMI_TERM_BYTES, SPIMI_POSTING_BYTES,
+        dan SPIMI_POSITION_BYTES) mencapai memory_budget,
+        postings yang terkumpul di-flush (terurut berdasarkan termID) sebagai
+        sebuah run ke intermediate InvertedIndexWriter yang baru. Flush hanya
+        dilakukan di antara dokumen, sehingga memori yang terpakai dibatasi oleh
+        memory_budget ditambah satu dokumen, berapapun besar block-nya.
+
+        Parameters
+        ----------
+        block_dir_relative : str
+            Relative Path ke directory yang mengandung text files untuk sebuah block.
+            Juga dipakai untuk penamaan intermediate index.
+        memory_budget: int
+            Batas (perkiraan) memori dalam bytes untuk postings yang belum di-flush
+        docs: Iterable[Tuple[str, str]]
+            Pasangan (nama dokumen, text) yang di-index (lihat modul corpus).
+            Default: semua file di block_dir_relative.
+
+        Returns
+        -------
+        List[str]
+            Nama-nama intermediate index (run) yang ditulis, sesuai urutan
+        """
+        index_ids = []
+        term_postings = {}
+        memory_used = 0
+        last_doc_id = -1
+        docs_sorted = True
+
+        if docs is None:
+            docs = read_block_dir(self.data_dir, block_dir_relative)
+
+        for file_dir, text in docs:
+            words = self.analyze(text)
+
+            doc_id = self.doc_id_map[file_dir]
+            if doc_id < last_doc_id:
+                docs_sorted = False
+            last_doc_id = doc_id
+
+            tf_doc = {}
+            positions_doc = {}
+            if self.positional:
+                for position, word in enumerate(words):
+                    positions_doc.setdefault(self.term_id_map[word], []).append(position)
+                tf_doc = {term_id: len(positions) for term_id, positions in positions_doc.items()}
+                memory_used += len(words) * SPIMI_POSITION_BYTES
+            else:
+                for word in words:
+                    term_id = self.term_id_map[word]
+                    tf_doc[term_id] = tf_doc.get(term_id, 0) + 1
+
+            for term_id, tf in tf_doc.items():
+                if term_id not in term_postings:
+                    term_postings[term_id] = (array.array('L'), array.array('L'), [])
+                    memory_used += SPIMI_TERM_BYTES
+                postings, tfs, positions = term_postings[term_id]
+                postings.append(doc_id)
+                tfs.append(tf)
+                if self.positional:
+                    positions.append(positions_doc[term_id])
+            memory_used += len(tf_doc) * SPIMI_POSTING_BYTES
+
+            if memory_used >= memory_budget:
+                index_ids.append(self.spimi_flush(block_dir_relative, len(index_ids),
+                                                  term_postings, docs_sorted))
+                term_postings = {}
+                memory_used = 0
+                last_doc_id = -1
+                docs_sorted = True
+
+        if term_postings:
+            index_ids.append(self.spimi_flush(block_dir_relative, len(index_ids),
+                                              term_postings, docs_sorted))
+        return index_ids
+
+    def spimi_flush(self, block_dir_relative, run, term_postings, docs_sorted = True):
+        """
+        Menulis postings hasil spimi_invert ke sebuah intermediate index
+        bernama intermediate_index_<block>_<run>, terurut berdasarkan termID.
+        Jika docID tidak di-assign secara terurut (docs_sorted = False),
+        postings setiap term diurutkan terlebih dahulu.
+
+        Returns
+        -------
+        str
+            Nama intermediate index yang ditulis
+        """
+        index_id = 'intermediate_index_' + block_dir_relative + '_' + str(run)
+        with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir) as index:
+            for term_id in sorted(term_postings):
+                postings, tfs, positions = term_postings[term_id]
+                if docs_sorted:
+                    index.append(term_id, postings.tolist(), tfs.tolist(),
+                                 positions if self.positional else None)
+                else:
+                    order = sorted(range(len(postings)), key = postings.__getitem__)
+                    index.append(term_id, [postings[j] for j in order], [tfs[j] for j in order],
+                                 [positions[j] for j in order] if self.positional else None)
+        return index_id
+
+    def reconcile_block(self, local_terms, local_docs, td_pairs):
+        """
+        Memetakan td_pairs hasil _parse_block_worker (dalam ID lokal block) ke
+        ID global di self.term_id_map dan self.doc_id_map.
+
+        Term dan dokumen lokal didaftarkan ke IdMap global sesuai urutan
+        kemunculan pertamanya di block, sama persis dengan urutan pada
+        parse_block sekuensial. Karena block juga direkonsiliasi sesuai urutan
+        sorted, ID yang dihasilkan (dan index akhirnya) identik dengan hasil
+        indexing sekuensial.
+
+        Parameters
+        ----------
+        local_terms: List[str]
+            id_to_str dari term_id_map lokal
+        local_docs: List[str]
+            id_to_str dari doc_id_map lokal
+        td_pairs: List[Tuple[Int, Int]]
+            Pasangan <termID, docID> dalam ID lokal
+
+        Returns
+        -------
+        List[Tuple[Int, Int]]
+            Pasangan <termID, docID> dalam ID global
+        """
+        term_ids = [self.term_id_map[term] for term in local_terms]
+        doc_ids = [self.doc_id_map[doc] for doc in local_docs]
+        return [(term_ids[term_id], doc_ids[doc_id]) for term_id, doc_id in td_pairs]
+
+    def parse_blocks(self, block_dirs, num_workers = 1):
+        """
+        Generator yang melakukan parsing terhadap setiap block di block_dirs
+        (sesuai urutan) dan menghasilkan (block_dir_relative, td_pairs).
+        Pada parsing sekuensial, td_pairs adalah generator (lihat iter_pairs)
+        yang melakukan parsing sambil dikonsumsi oleh invert_write.
+
+        Jika num_workers > 1, parsing (tokenization, stemming, dan stopwords
+        removal) dilakukan paralel di sebuah pool of worker processes. Hasil
+        dari worker diambil sesuai urutan block (imap) dan direkonsiliasi ke
+        IdMap global di process utama, sehingga hasilnya deterministik.
+        """
+        if num_workers <= 1:
+            for block_dir_relative in block_dirs:
+                yield block_dir_relative, self.iter_pairs(read_block_dir(self.data_dir, block_dir_relative))
+            return
+
+        with multiprocessing.Pool(num_workers, initializer = _init_parse_worker,
+                                  initargs = (self.data_dir,)) as pool:
+            parsed = pool.imap(_parse_block_worker, block_dirs)
+            for block_dir_relative, (local_terms, local_docs, td_pairs) in zip(block_dirs, parsed):
+                yield block_dir_relative, self.reconcile_block(local_terms, local_docs, td_pairs)
 
     def invert_write(self, td_pairs, index):
         """
@@ -145,21 +590,38 @@ class BSBIIndex:
         yaitu penggunaan struktur data hashtable (dalam Python bisa
         berupa Dictionary)
 
-        ASUMSI: td_pairs CUKUP di memori
+        td_pairs dibaca sampai self.spill_pairs pasangan; jika ternyata masih
+        ada sisanya (block terlalu besar untuk dictionary di memori), inversion
+        dilanjutkan dengan external sort (spill_invert_write) dengan hasil yang
+        identik. Pada positional index, td_pairs diasumsikan CUKUP di memori;
+        gunakan spimi_invert yang membatasi penggunaan memori.
 
         Di Tugas Pemrograman 1, kita hanya menambahkan term dan
         juga list of sorted Doc IDs. Sekarang di Tugas Pemrograman 2,
         kita juga perlu tambahkan list of TF.
 
+        Pada positional index, posisi sebuah term di dokumen adalah banyaknya
+        pasangan dokumen tersebut yang muncul sebelumnya di td_pairs.
+
         Parameters
         ----------
-        td_pairs: List[Tuple[Int, Int]]
-            List of termID-docID pairs
+        td_pairs: Iterable[Tuple[Int, Int]]
+            List (atau generator) of termID-docID pairs
         index: InvertedIndexWriter
             Inverted index pada disk (file) yang terkait dengan suatu "block"
         """
         # TODO
+        if not self.positional:
+            td_pairs = iter(td_pairs)
+            head = list(itertools.islice(td_pairs, self.spill_pairs + 1))
+            if len(head) > self.spill_pairs:
+                self.spill_invert_write(itertools.chain(head, td_pairs), index, self.spill_pairs)
+                return
+            td_pairs = head
+
         term_dict = {}
+        term_positions = {}
+        doc_position = {}
         for term_id, doc_id in td_pairs:
             # print(term_id, doc_id)
             if term_id not in term_dict:
@@ -168,6 +630,10 @@ class BSBIIndex:
                 term_dict[term_id][doc_id] += 1
             except KeyError:
                 term_dict[term_id][doc_id] = 1
+            if self.positional:
+                position = doc_position.get(doc_id, 0)
+                doc_position[doc_id] = position + 1
+                term_positions.setdefault(term_id, {}).setdefault(doc_id, []).append(position)
 
         for term_id in sorted(term_dict.keys()):
             # print(term_dict[term_id])
@@ -175,16 +641,131 @@ class BSBIIndex:
             # print(sorted_tf)
             postings_list = [k[0] for k in sorted_tf]
             tf_list = [k[1] for k in sorted_tf]
-            index.append(term_id, postings_list, tf_list)
+            positions = None
+            if self.positional:
+                positions = [term_positions[term_id][doc_id] for doc_id in postings_list]
+            index.append(term_id, postings_list, tf_list, positions)
 
-    def merge(self, indices, merged_index):
+    def spill_invert_write(self, td_pairs, index, max_triples = SPILL_PAIRS):
+        """
+        Inversion td_pairs seperti invert_write, dengan external sort sehingga
+        memori yang dipakai tidak bergantung pada besarnya block.
+
+        Pasangan-pasangan sebuah dokumen diakumulasikan menjadi triple
+        (termID, docID, TF), yang disimpan di array fixed-width: key
+        termID << 32 | docID di array 'Q' dan TF di array 'I' (12 bytes per
+        triple, dibandingkan ~100 bytes per pasangan di dictionary invert_write).
+        Setiap kali terkumpul max_triples triple, array di-sort berdasarkan key
+        dan ditulis ke disk sebagai sebuah sorted run (lihat write_spill_run).
+        Run-run tersebut lalu di-merge dengan k-way merge (heapq.merge) secara
+        streaming dan langsung di-append ke index. Jika semua triple muat
+        dalam satu run, tidak ada yang ditulis ke disk.
+
+        Hasilnya identik dengan invert_write (non-positional). docID dan termID
+        harus < 2^32.
+
+        Parameters
+        ----------
+        td_pairs: Iterable[Tuple[Int, Int]]
+            Pasangan termID-docID, boleh berupa generator (lihat iter_pairs)
+        index: InvertedIndexWriter
+            Inverted index tujuan
+        max_triples: int
+            Banyaknya triple maksimum di memori
+        """
+        with tempfile.TemporaryDirectory(prefix = 'spill_', dir = self.output_dir) as run_dir:
+            runs = []
+            keys, tfs = array.array('Q'), array.array('I')
+            tf_doc = {}
+            curr_doc = None
+            for term_id, doc_id in td_pairs:
+                if doc_id != curr_doc:
+                    for doc_term_id, tf in tf_doc.items():
+                        keys.append(doc_term_id << 32 | curr_doc)
+                        tfs.append(tf)
+                    tf_doc = {}
+                    curr_doc = doc_id
+                    if len(keys) >= max_triples:
+                        runs.append(self.write_spill_run(run_dir, len(runs), keys, tfs))
+                        keys, tfs = array.array('Q'), array.array('I')
+                tf_doc[term_id] = tf_doc.get(term_id, 0) + 1
+            for doc_term_id, tf in tf_doc.items():
+                keys.append(doc_term_id << 32 | curr_doc)
+                tfs.append(tf)
+
+            if not runs:
+                order = sorted(range(len(keys)), key = keys.__getitem__)
+                triples = ((keys[j], tfs[j]) for j in order)
+            else:
+                if keys:
+                    runs.append(self.write_spill_run(run_dir, len(runs), keys, tfs))
+                keys, tfs = None, None
+                triples = heapq.merge(*[self.read_spill_run(*run) for run in runs])
+
+            curr_term = None
+            postings_list, tf_list = [], []
+            for key, tf in triples:
+                term_id, doc_id = key >> 32, key & 0xFFFFFFFF
+                if term_id != curr_term:
+                    if postings_list:
+                        index.append(curr_term, postings_list, tf_list)
+                    curr_term = term_id
+                    postings_list, tf_list = [], []
+                elif postings_list[-1] == doc_id:
+                    # docID yang sama di dua run (pasangan dokumen tidak berurutan)
+                    tf_list[-1] += tf
+                    continue
+                postings_list.append(doc_id)
+                tf_list.append(tf)
+            if postings_list:
+                index.append(curr_term, postings_list, tf_list)
+
+    def write_spill_run(self, run_dir, run, keys, tfs):
+        """
+        Sort triple (keys, tfs) berdasarkan key dan menulisnya ke sebuah run
+        file: semua key (array 'Q') diikuti semua TF (array 'I').
+
+        Returns
+        -------
+        Tuple[str, int]
+            (path run file, banyaknya triple)
+        """
+        order = sorted(range(len(keys)), key = keys.__getitem__)
+        path = os.path.join(run_dir, 'run_' + str(run))
+        with open(path, 'wb') as f:
+            array.array('Q', (keys[j] for j in order)).tofile(f)
+            array.array('I', (tfs[j] for j in order)).tofile(f)
+        return path, len(keys)
+
+    @staticmethod
+    def read_spill_run(path, num_triples, buffer_triples = SPILL_READ_TRIPLES):
+        """Generator (key, TF) dari sebuah run file secara streaming (lihat write_spill_run)."""
+        keys_item, tfs_item = array.array('Q').itemsize, array.array('I').itemsize
+        with open(path, 'rb') as keys_file, open(path, 'rb') as tfs_file:
+            tfs_file.seek(num_triples * keys_item)
+            while num_triples > 0:
+                count = min(buffer_triples, num_triples)
+                keys = array.array('Q', keys_file.read(count * keys_item))
+                tfs = array.array('I', tfs_file.read(count * tfs_item))
+                num_triples -= count
+                yield from zip(keys, tfs)
+
+    def merge(self, indices, merged_index, doc_map = None):
         """
         Lakukan merging ke semua intermediate inverted indices menjadi
         sebuah single index.
 
         Ini adalah bagian yang melakukan EXTERNAL MERGE SORT
 
-        Gunakan fungsi orted_merge_posts_and_tfs(..) di modul util
+        Intermediate indices dibaca secara streaming dan di-merge berdasarkan
+        termID dengan heapq.merge. Postings dan TF lists dari term yang sama
+        digabung sekaligus dengan k-way merge (fungsi merge_postings_and_tfs
+        di modul util) dan langsung di-append ke merged_index. Postings dari
+        dokumen yang sudah dihapus tidak ikut dibaca, sehingga doc_length dan
+        document frequency di merged_index sudah tanpa dokumen tersebut.
+
+        Jika semua indices (yang tidak kosong) adalah positional index, posisi
+        ikut di-merge sehingga merged_index juga positional.
 
         Parameters
         ----------
@@ -196,22 +777,109 @@ class BSBIIndex:
         merged_index: InvertedIndexWriter
             Instance InvertedIndexWriter object yang merupakan hasil merging dari
             semua intermediate InvertedIndexWriter objects.
+
+        doc_map: List[int]
+            Opsional, docID baru untuk setiap docID lama (lihat
+            reorder_documents); postings setiap term diurutkan ulang
+            berdasarkan docID baru sebelum di-append.
         """
-        # kode berikut mengasumsikan minimal ada 1 term
+        positional = all(index.positional for index in indices if index.terms)
+        # panjang akhir setiap dokumen di merged_index sudah diketahui dari
+        # indices, sehingga bound BM25 setiap term bisa dihitung saat append
+        final_doc_length = {}
+        for index in indices:
+            for doc_id, length in index.doc_length.items():
+                if not index.is_deleted(doc_id):
+                    doc_id = doc_map[doc_id] if doc_map is not None else doc_id
+                    final_doc_length[doc_id] = final_doc_length.get(doc_id, 0) + length
+        merged_index.final_doc_length = final_doc_length
         merged_iter = heapq.merge(*indices, key = lambda x: x[0])
-        curr, postings, tf_list = next(merged_iter) # first item
-        for t, postings_, tf_list_ in merged_iter: # from the second item
-            if t == curr:
-                zip_p_tf = sorted_merge_posts_and_tfs(list(zip(postings, tf_list)), \
-                                                      list(zip(postings_, tf_list_)))
-                postings = [doc_id for (doc_id, _) in zip_p_tf]
-                tf_list = [tf for (_, tf) in zip_p_tf]
+        for term, group in itertools.groupby(merged_iter, key = lambda x: x[0]):
+            postings_lists, tf_lists, positions_lists = [], [], []
+            for entry in group:
+                postings_lists.append(entry[1])
+                tf_lists.append(entry[2])
+                if positional:
+                    positions_lists.append(entry[3])
+            positions = None
+            if positional:
+                postings, tf_list, positions = merge_postings_and_tfs(postings_lists, tf_lists, positions_lists)
             else:
-                merged_index.append(curr, postings, tf_list)
-                curr, postings, tf_list = t, postings_, tf_list_
-        merged_index.append(curr, postings, tf_list)
+                postings, tf_list = merge_postings_and_tfs(postings_lists, tf_lists)
+            if doc_map is not None:
+                order = sorted(range(len(postings)), key = lambda j: doc_map[postings[j]])
+                postings = [doc_map[postings[j]] for j in order]
+                tf_list = [tf_list[j] for j in order]
+                if positional:
+                    positions = [positions[j] for j in order]
+            # term yang semua dokumennya sudah dihapus tidak perlu disimpan
+            if postings:
+                merged_index.append(term, postings, tf_list, positions)
+
+    def reorder_documents(self, strategy = "path"):
+        """
+        Offline index optimizer: memberikan docID baru untuk semua dokumen
+        sehingga dokumen-dokumen yang mirip mendapatkan docID yang berdekatan.
+        docID awalnya diberikan sesuai urutan os.listdir di setiap block,
+        sehingga d-gap di postings list besar dan VBE kurang efektif.
+
+        Semua segment yang live ditulis ulang (di-merge, lihat merge dengan
+        doc_map) menjadi sebuah segment baru dengan docID baru, termasuk
+        doc_length-nya, lalu doc_id_map, daftar segment, dan statistik koleksi
+        diganti. Postings dokumen yang sudah dihapus ikut dibuang; dokumen
+        tersebut (tetap ada di doc_id_map, lihat update_documents) mendapatkan
+        docID setelah semua dokumen yang live. Tidak boleh dijalankan
+        bersamaan dengan indexing atau retrieval di index yang sama.
+
+        Parameters
+        ----------
+        strategy: str
+            "path" untuk urutan nama dokumen (natural sort, lihat
+            reorder.path_order), atau "bisection" untuk recursive graph
+            bisection (lihat reorder.bisection_order) yang dimulai dari
+            urutan "path"
+
+        Returns
+        -------
+        str
+            Nama segment yang baru
+        """
+        if strategy not in ("path", "bisection"):
+            raise ValueError("strategy reordering tidak dikenal: " + str(strategy))
+        self.segments.wait()
+        self.load_id_maps()
+        segment_name = self.segments.new_segment_name()
+        with contextlib.ExitStack() as stack:
+            with self.segments.lock:
+                readers = self.open_segments(stack)
+            live = [doc_id for reader in readers for doc_id in reader.doc_length if not reader.is_deleted(doc_id)]
+            order = reorder.path_order(live, self.doc_id_map.__getitem__)
+            if strategy == "bisection":
+                doc_terms = {doc_id: [] for doc_id in order}
+                for reader in readers:
+                    for term_id, postings_list, *_ in reader:
+                        for doc_id in postings_list:
+                            doc_terms[doc_id].append(term_id)
+                    reader.reset()
+                order = reorder.bisection_order(doc_terms)
+
+            live = set(live)
+            order.extend(doc_id for doc_id in range(len(self.doc_id_map)) if doc_id not in live)
+            doc_map = [0] * len(order)
+            doc_id_map = IdMap()
+            for doc_id in order:
+                doc_map[doc_id] = doc_id_map[self.doc_id_map[doc_id]]
+
+            with InvertedIndexWriter(segment_name, self.postings_encoding, directory = self.output_dir) as index:
+                self.merge(readers, index, doc_map)
+                num_docs = len(index.doc_length)
+        self.doc_id_map = doc_id_map
+        self.save()
+        self.segments.reset([(segment_name, num_docs)])
+        self.write_stats()
+        return segment_name
 
-    def retrieve_tfidf(self, query, k = 10):
+    def retrieve_tfidf(self, query, k = 10, vectorized = False):
         """
         Melakukan Ranked Retrieval dengan skema TaaT (Term-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
@@ -236,6 +904,12 @@ class BSBIIndex:
 
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
+        vectorized: bool
+            Jika True, weight seluruh postings list sebuah term dihitung
+            sekaligus dengan operasi array NumPy (lihat NumpyScoreAccumulator),
+            tanpa loop Python per posting. Score-nya sama sampai toleransi
+            floating point; dokumen dengan score yang sama diurutkan
+            berdasarkan docID.
 
         Result
         ------
@@ -248,135 +922,369 @@ class BSBIIndex:
 
         """
         # TODO
-        self.load()
-
-        terms = nltk.word_tokenize(query)
-        terms = [self.stemmer.stem(token) for token in terms]
-        terms = [term for term in terms if term not in self.stop_words]
-        
-        result = {}
-        n = len(self.doc_id_map)
-
-        with InvertedIndexReader(
-            directory = self.output_dir,
-            index_name = self.index_name,
-            postings_encoding = self.postings_encoding) as invert_map:
-            # print(invert_map.doc_length)
+        terms = self.analyze(query)
+
+        with self.reading() as readers:
+            n = self.num_docs
+            accumulator = (NumpyScoreAccumulator if vectorized else ScoreAccumulator)(len(self.doc_id_map))
             for i in terms:
                 if i not in self.term_id_map:
                     continue    
                 
-                postings_list, tf_list = invert_map.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list)):
-                    doc = self.doc_id_map[postings_list[j]]
-                    tf = tf_list[j]
-                    df = invert_map.postings_dict[postings_list[j]][1]
-                    wtq = math.log(n/df)
-                    wtd = 0
-                    if tf > 0:
-                        wtd = 1 + math.log(tf)
-                    if result.get(doc):
-                        result[doc] = result[doc] + (wtd * wtq)
+                df, segment_lists = self.segment_postings(readers, self.term_id_map[i], vectorized)
+                if df == 0:
+                    continue
+                wtq = math.log(n/df)
+                for postings_list, tf_list in segment_lists:
+                    # w(t, D) = 0 jika tf = 0
+                    if vectorized:
+                        tf = np.asarray(tf_list, dtype = np.float64)
+                        accumulator.add(postings_list, np.where(tf > 0, 1 + np.log(np.maximum(tf, 1)), 0) * wtq)
                     else:
-                        result[doc] = (wtd * wtq)
-        result = list(zip(result.values(), result.keys()))
-        result.sort(key=lambda x: x[0], reverse=True)
-
-        return result[:k]
+                        accumulator.add(postings_list, ((1 + math.log(tf) if tf > 0 else 0) * wtq for tf in tf_list))
+            return self.top_k_documents(accumulator, k)
 
     def retrieve_tfidf_binary_unary(self, query, k = 10):
         # TODO
-        self.load()
-
-        terms = nltk.word_tokenize(query)
-        terms = [self.stemmer.stem(token) for token in terms]
-        terms = [term for term in terms if term not in self.stop_words]
-        
-        result = {}
-        n = len(self.doc_id_map)
-
-        with InvertedIndexReader(
-            directory = self.output_dir,
-            index_name = self.index_name,
-            postings_encoding = self.postings_encoding) as invert_map:
-            # print(invert_map.doc_length)
+        terms = self.analyze(query)
+
+        with self.reading() as readers:
+            accumulator = ScoreAccumulator(len(self.doc_id_map))
             for i in terms:
                 if i not in self.term_id_map:
                     continue    
                 
-                postings_list, tf_list = invert_map.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list)):
-                    doc = self.doc_id_map[postings_list[j]]
-                    tf = tf_list[j]
-                    df = invert_map.postings_dict[postings_list[j]][1]
-                    wtq = 1 # unary
-                    wtd = 0
-                    if tf > 0:
-                        wtd = 1 # binary
-                    if result.get(doc):
-                        result[doc] = result[doc] + (wtd * wtq)
-                    else:
-                        result[doc] = (wtd * wtq)
-        result = list(zip(result.values(), result.keys()))
-        result.sort(key=lambda x: x[0], reverse=True)
-
-        return result[:k]
-
+                _, segment_lists = self.segment_postings(readers, self.term_id_map[i])
+                for postings_list, tf_list in segment_lists:
+                    # binary w(t, D) dan unary w(t, Q) = 1
+                    accumulator.add(postings_list, (1 if tf > 0 else 0 for tf in tf_list))
+            return self.top_k_documents(accumulator, k)
 
-    def bm_25(self, query, k = 10):
+    def bm_25(self, query, k = 10, quantized_norms = False, vectorized = False):
+        """
+        Retrieval dengan BM25. Jika quantized_norms = True (dan index mempunyai
+        file statistik), normalisasi panjang dokumen memakai norm 1 byte
+        (lihat CollectionStats): faktor normalisasi untuk 256 kode norm dihitung
+        sekali di awal query, lalu setiap posting cukup mengambilnya dari tabel.
+        Score-nya sedikit berbeda dari normalisasi dengan panjang dokumen yang
+        sebenarnya, karena panjang dokumen >= 64 dibulatkan (skala log, ~5%).
+
+        Jika vectorized = True, setiap postings list diproses sebagai array
+        (lihat retrieve_tfidf): panjang dokumen (atau kode norm) diambil dengan
+        indexing array docID, weight BM25 semua posting dihitung sekaligus, lalu
+        ditambahkan ke NumpyScoreAccumulator dengan scatter-add.
+        """
         # TODO
-        self.load()
-
-        terms = nltk.word_tokenize(query)
-        terms = [self.stemmer.stem(token) for token in terms]
-        terms = [term for term in terms if term not in self.stop_words]
-        
-        result = {}
-        n = len(self.doc_id_map)
+        terms = self.analyze(query)
 
         k1 = 1
-        k2 = 1.5
+        k2 = BM25_K
 
         b1 = 0.5
-        b2 = 0.8
+        b2 = BM25_B
 
         '''
         wtd = (k1 + 1) * tf / k1 ((1-b1) + b1*dl/avdl) + tf
         '''
+        with self.reading() as readers:
+            n = self.num_docs
+            avdl = self.avdl
+            dl_all = self.dl_all
+            norm_table = None
+            if quantized_norms and self.stats is not None:
+                norm_table = self.stats.bm25_norms(k2, b2)
+                norms = self.stats.norms
+            if vectorized:
+                if norm_table is not None:
+                    norm_table = np.array(norm_table)
+                    norms = np.frombuffer(norms, dtype = np.uint8)
+                else:
+                    dl_all = self.doc_length_array()
+                accumulator = NumpyScoreAccumulator(len(self.doc_id_map))
+            else:
+                accumulator = ScoreAccumulator(len(self.doc_id_map))
 
-        with InvertedIndexReader(
-            directory = self.output_dir,
-            index_name = self.index_name,
-            postings_encoding = self.postings_encoding) as invert_map:
             for i in terms:
                 if i not in self.term_id_map:
                     continue    
                 
-                postings_list, tf_list = invert_map.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list)):
-                    doc = self.doc_id_map[postings_list[j]]
-                    try:
-                        tf = tf_list[j]
-                    except IndexError:
-                        pass
-                    
-                    df = invert_map.postings_dict[postings_list[j]][1]
-                    wtq = math.log(n/df)
-                    wtd = 0
-                    wtd1 = (k2 + 1) * tf
-                    wtd2 = k2 * ((1 - b2) + b2 * self.dl_all[postings_list[j]] / self.avdl) + tf
-                    wtd = wtd1 / wtd2
-                    if result.get(doc):
-                        result[doc] = result[doc] + (wtd * wtq)
+                df, segment_lists = self.segment_postings(readers, self.term_id_map[i], vectorized)
+                if df == 0:
+                    continue
+                wtq = math.log(n/df)
+                for postings_list, tf_list in segment_lists:
+                    if vectorized:
+                        postings = np.asarray(postings_list, dtype = np.intp)
+                        tf = np.asarray(tf_list, dtype = np.float64)
+                        if norm_table is not None:
+                            norm = norm_table[norms[postings]]
+                        else:
+                            norm = k2 * ((1 - b2) + b2 * dl_all[postings] / avdl)
+                        weights = (k2 + 1) * tf / (norm + tf) * wtq
+                    elif norm_table is not None:
+                        weights = ((k2 + 1) * tf / (norm_table[norms[doc_id]] + tf) * wtq
+                                   for doc_id, tf in zip(postings_list, tf_list))
                     else:
-                        result[doc] = (wtd * wtq)
-        result = list(zip(result.values(), result.keys()))
-        result.sort(key=lambda x: x[0], reverse=True)
+                        weights = ((k2 + 1) * tf / (k2 * ((1 - b2) + b2 * dl_all[doc_id] / avdl) + tf) * wtq
+                                   for doc_id, tf in zip(postings_list, tf_list))
+                    accumulator.add(postings_list, weights)
+            return self.top_k_documents(accumulator, k)
+
+    def doc_length_array(self):
+        """
+        Panjang dokumen (dl_all) sebagai np.ndarray yang diindeks dengan docID,
+        untuk scoring vectorized: view langsung ke statistik koleksi (tanpa
+        copy), atau dibuat dari dl_all untuk index yang belum mempunyai file
+        statistik. View tersebut tidak boleh disimpan melewati query, karena
+        statistik koleksi ditutup saat index dimuat ulang.
+        """
+        if self.stats is not None:
+            return np.frombuffer(self.dl_all, dtype = np.uint32)
+        lengths = np.zeros(len(self.doc_id_map), dtype = np.uint32)
+        lengths[list(self.dl_all)] = list(self.dl_all.values())
+        return lengths
+
+    def top_k_documents(self, accumulator, k):
+        """
+        Top-k (score, nama dokumen) dari ScoreAccumulator (atau
+        NumpyScoreAccumulator), terurut mengecil
+        berdasarkan score; hanya docID k dokumen tersebut yang diterjemahkan
+        menjadi nama dokumen. Dipanggil selama doc_id_map masih dimuat (di dalam
+        reading).
+        """
+        return [(score, self.doc_id_map[doc_id]) for score, doc_id in accumulator.top_k(k)]
+
+    def document_frequency(self, readers, term_id):
+        """
+        df sebuah term (banyaknya dokumen yang belum dihapus) di seluruh segment:
+        dari statistik koleksi jika ada, atau dari postings semua segment
+        (lihat segment_postings) untuk index yang belum mempunyai statistik.
+        """
+        if self.stats is not None:
+            return self.stats.dfs[term_id] if term_id < len(self.stats.dfs) else 0
+        return self.segment_postings(readers, term_id, arrays = True)[0]
+
+    def bm_25_wand(self, query, k = 10, counters = None):
+        """
+        Retrieval BM25 document-at-a-time dengan dynamic pruning WAND (lihat
+        util.wand): hanya dokumen yang mungkin masuk top-k yang di-score, dan
+        cursor postings melompati dokumen lainnya. Score dan top-k-nya sama
+        dengan bm_25 (kecuali urutan dokumen dengan score yang sama di batas
+        top-k).
+
+        Batas atas score sebuah term di sebuah segment dihitung dari TF maksimum
+        dan min dl / TF postings term tersebut, yang disimpan saat indexing
+        (lihat InvertedIndexWriter.add_bounds):
+
+            score(t, D) = idf * (k + 1) / (1 + k (1 - b) / tf + (k b / avdl) * dl / tf)
+                       <= idf * (k + 1) / (1 + k (1 - b) / max_tf + (k b / avdl) * min(dl / tf))
+
+        sehingga bound tersebut berlaku untuk avdl berapapun. Segment yang
+        tidak menyimpannya (index lama) memakai batas atas idf * (k + 1).
+
+        Catatan performa: WAND mengurangi banyaknya dokumen yang di-score
+        (~3% postings untuk k = 10, ~10% untuk k = 100 pada queries.txt), tetapi
+        cursor-nya bergerak satu langkah per pemanggilan method Python,
+        sedangkan bm_25 menjumlahkan seluruh postings list ke ScoreAccumulator
+        dalam satu loop yang ketat. Akibatnya bm_25_wand tidak lebih cepat dari
+        bm_25: sebanding untuk k = 10 dan ~0.4-0.6x untuk k = 100 (lihat
+        benchmark wand), juga pada postings list panjang (koleksi sintetis 20k
+        dokumen). Method ini berguna jika scoring per dokumen mahal atau untuk
+        mengukur efektivitas pruning (counters); untuk latency, pakai bm_25.
+
+        Parameters
+        ----------
+        query: str
+            Query
+        k: int
+            Banyaknya dokumen yang dikembalikan
+        counters: collections.Counter
+            Opsional, ditambah dengan "postings" (total panjang postings list
+            term-term query), "scored" (banyaknya dokumen yang di-score), dan
+            "blocks_decoded" (banyaknya block yang di-decode, untuk BlockPostings)
+
+        Result
+        ------
+        List[(float, str)]
+            Top-K (score, nama dokumen) terurut mengecil berdasarkan score
+        """
+        return self.bm_25_daat(query, k, counters, block_max = False)
+
+    def bm_25_bmw(self, query, k = 10, counters = None):
+        """
+        Seperti bm_25_wand, tetapi dengan Block-Max WAND (lihat
+        util.block_max_wand): selain batas atas setiap term, dipakai juga batas
+        atas setiap block postings (POSTINGS_BLOCK_SIZE postings), yang
+        disimpan saat indexing untuk term dengan lebih dari satu block (lihat
+        InvertedIndexWriter.add_bounds), sehingga block-block yang tidak mungkin
+        berisi dokumen top-k dilewati. Pada BlockPostings, block yang dilewati
+        tidak di-decode sama sekali. Catatan performa di bm_25_wand juga berlaku
+        di sini.
+        """
+        return self.bm_25_daat(query, k, counters, block_max = True)
+
+    def bm_25_daat(self, query, k, counters, block_max):
+        """Implementasi bm_25_wand (block_max = False) dan bm_25_bmw (block_max = True)."""
+        terms = self.analyze(query)
+        k2, b2 = BM25_K, BM25_B
+        heap = []
+        with self.reading() as readers:
+            n = self.num_docs
+            avdl = self.avdl
+            dl_all = self.dl_all
+            query_terms = []
+            for term in terms:
+                if term not in self.term_id_map:
+                    continue
+                term_id = self.term_id_map[term]
+                df = self.document_frequency(readers, term_id)
+                if df > 0:
+                    query_terms.append((term_id, math.log(n/df)))
+
+            def score(doc_id, cursors):
+                # urutan operasi sama dengan bm_25, sehingga score-nya identik
+                norm = k2 * ((1 - b2) + b2 * dl_all[doc_id] / avdl)
+                total = 0
+                for cursor in cursors:
+                    tf = cursor.tf()
+                    total += (k2 + 1) * tf / (norm + tf) * cursor.idf
+                return total
+
+            def upper_bound(idf, max_tf, min_dl_tf):
+                if max_tf == 0:
+                    return 0
+                # toleransi untuk error pembulatan floating point
+                return idf * (k2 + 1) / (1 + k2 * (1 - b2) / max_tf + k2 * b2 / avdl * min_dl_tf) * (1 + 1e-9)
+
+            for reader in readers:
+                cursors, upper_bounds, block_lasts, block_bounds = [], [], [], []
+                for term_id, idf in query_terms:
+                    if term_id not in reader.postings_dict:
+                        continue
+                    cursor = reader.get_postings_cursor(term_id)
+                    cursor.idf = idf
+                    bound = reader.term_bound(term_id)
+                    term_upper_bound = idf * (k2 + 1) if bound is None else upper_bound(idf, *bound)
+                    cursors.append(cursor)
+                    upper_bounds.append(term_upper_bound)
+                    if block_max:
+                        block_lasts.append(cursor.block_lasts())
+                        blocks = reader.block_bounds(term_id)
+                        if blocks is None:
+                            block_bounds.append([term_upper_bound] * len(block_lasts[-1]))
+                        else:
+                            block_bounds.append([upper_bound(idf, max_tf, min_dl_tf) for min_dl_tf, max_tf in zip(*blocks)])
+                    if counters is not None:
+                        counters["postings"] += len(cursor)
+                if block_max:
+                    scored = block_max_wand(cursors, upper_bounds, block_lasts, block_bounds, score, k, heap)
+                else:
+                    scored = wand(cursors, upper_bounds, score, k, heap)
+                if counters is not None:
+                    counters["scored"] += scored
+                    counters["blocks_decoded"] += sum(getattr(cursor, 'blocks_decoded', 0) for cursor in cursors)
+
+            heap.sort(key = lambda entry: (-entry[0], entry[1]))
+            return [(doc_score, self.doc_id_map[doc_id]) for doc_score, doc_id in heap]
+
+    def retrieve_phrase(self, query, k = 10):
+        """
+        Phrase query: mencari dokumen dimana term-term query muncul berurutan
+        dan bersebelahan (setelah stopwords dibuang, sama seperti saat indexing).
+        Membutuhkan positional index.
+
+        Parameters
+        ----------
+        query: str
+            Phrase yang dicari, misal "breast cancer cells"
+
+        Result
+        ------
+        List[(int, str)]
+            List of (banyaknya kemunculan phrase, nama dokumen), terurut mengecil
+        """
+        return self.retrieve_positional(query, phrase_matches, k)
 
-        return result[:k]
+    def retrieve_proximity(self, query, window, k = 10):
+        """
+        Proximity query: mencari dokumen dimana semua term query (dengan urutan
+        apapun) muncul dalam jarak paling jauh window term, yaitu selisih posisi
+        term pertama dan terakhir <= window. Membutuhkan positional index.
 
+        Parameters
+        ----------
+        query: str
+            Term-term yang dicari
+        window: int
+            Jarak maksimum (dalam term) antar term query
 
-    def index(self):
+        Result
+        ------
+        List[(int, str)]
+            List of (banyaknya window yang memenuhi, nama dokumen), terurut mengecil
+        """
+        return self.retrieve_positional(query, lambda positions: proximity_matches(positions, window),
+                                        k, unique_terms = True)
+
+    def retrieve_positional(self, query, match, k = 10, unique_terms = False):
+        """
+        Retrieval dengan positional index. Untuk setiap segment, postings list
+        semua term di-intersect terlebih dahulu dengan cursor (dimulai dari
+        term dengan df terkecil, lihat intersect_cursors), dan posisi hanya
+        di-decode untuk dokumen yang lolos intersection, yaitu dokumen yang
+        mengandung semua term query.
+
+        Parameters
+        ----------
+        query: str
+            Query
+        match: Callable[[List[List[int]]], int]
+            Fungsi yang menerima list posisi setiap term query (sesuai urutan
+            di query) di sebuah dokumen dan mengembalikan score dokumen
+            tersebut; dokumen dengan score 0 tidak dikembalikan
+        unique_terms: bool
+            Jika True, term yang muncul lebih dari sekali di query hanya
+            dihitung sekali
+
+        Result
+        ------
+        List[(int, str)]
+            Top-K (score, nama dokumen) terurut mengecil berdasarkan score
+        """
+        terms = self.analyze(query)
+        if unique_terms:
+            terms = list(dict.fromkeys(terms))
+
+        result = []
+        with self.reading() as readers:
+            if not terms or any(term not in self.term_id_map for term in terms):
+                return []
+            term_ids = [self.term_id_map[term] for term in terms]
+
+            for reader in readers:
+                if not reader.terms:
+                    continue
+                if not reader.positional:
+                    raise ValueError("index " + reader.index_file_path + " tidak menyimpan posisi term, "
+                                     "lakukan indexing dengan positional = True")
+                if any(term_id not in reader.postings_dict for term_id in term_ids):
+                    continue
+                # intersection, mulai dari postings list terpendek
+                by_df = sorted(set(term_ids), key = lambda term_id: reader.postings_dict[term_id][1])
+                candidates = intersect_cursors([reader.get_postings_cursor(term_id) for term_id in by_df])
+                if not candidates:
+                    continue
+
+                positions = {term_id: reader.get_positions(term_id, candidates) for term_id in by_df}
+                for doc_id in candidates:
+                    score = match([positions[term_id][doc_id] for term_id in term_ids])
+                    if score > 0:
+                        result.append((score, doc_id))
+            # hanya top-k yang diterjemahkan menjadi nama dokumen
+            return [(score, self.doc_id_map[doc_id]) for score, doc_id in heapq.nlargest(k, result, key = lambda x: x[0])]
+
+
+    def index(self, num_workers = 1, memory_budget = None, resume = True):
         """
         Base indexing code
         BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
@@ -385,27 +1293,317 @@ class BSBIIndex:
         Method ini scan terhadap semua data di collection, memanggil parse_block
         untuk parsing dokumen dan memanggil invert_write yang melakukan inversion
         di setiap block dan menyimpannya ke index yang baru.
+
+        Parameters
+        ----------
+        num_workers: int
+            Banyaknya worker processes untuk parsing block secara paralel
+            (lihat parse_blocks). Default 1, yaitu parsing sekuensial. Index
+            yang dihasilkan identik untuk berapapun nilai num_workers.
+        memory_budget: int
+            Jika diberikan, indexing dilakukan dengan spimi_invert (single pass,
+            sekuensial) dengan batas memori memory_budget bytes per run.
+            Main index yang dihasilkan sama dengan mode BSBI.
+        resume: bool
+            Setiap block yang selesai dicatat di build manifest (lihat checkpoint).
+            Jika True dan ada build manifest dari indexing data_dir yang terhenti,
+            block-block yang sudah selesai dilewati dan indexing dilanjutkan dari
+            block berikutnya (atau langsung ke merging). Index yang dihasilkan
+            identik dengan indexing tanpa terhenti.
         """
-        # loop untuk setiap sub-directory di dalam folder collection (setiap block)
-        for block_dir_relative in tqdm(sorted(next(os.walk(self.data_dir))[1])):
-            td_pairs = self.parse_block(block_dir_relative)
-            index_id = 'intermediate_index_'+block_dir_relative
-            self.intermediate_indices.append(index_id)
-            with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir) as index:
-                self.invert_write(td_pairs, index)
+        block_dirs = sorted(next(os.walk(self.data_dir))[1])
+        source = (os.path.abspath(self.data_dir),)
+        finished_blocks = self.restore_checkpoint(source) if resume else []
+        finished = set(finished_blocks)
+        block_dirs = [block_dir for block_dir in block_dirs if block_dir not in finished]
+        if memory_budget is not None:
+            for block_dir_relative in tqdm(block_dirs):
+                self.intermediate_indices.extend(self.spimi_invert(block_dir_relative, memory_budget))
+                finished_blocks.append(block_dir_relative)
+                self.checkpoint(source, finished_blocks)
+        else:
+            # loop untuk setiap sub-directory di dalam folder collection (setiap block)
+            for block_dir_relative, td_pairs in tqdm(self.parse_blocks(block_dirs, num_workers),
+                                                     total = len(block_dirs)):
+                self.write_intermediate(block_dir_relative, td_pairs)
                 td_pairs = None
-    
+                finished_blocks.append(block_dir_relative)
+                self.checkpoint(source, finished_blocks)
+
+        self.merge_intermediate()
+
+    def index_packed(self, packed_path, docs_per_block = 1000, memory_budget = None, resume = True, **packed_options):
+        """
+        Indexing dari sebuah packed file (TSV atau JSONL, lihat corpus.read_packed)
+        alih-alih dari satu file per dokumen di data_dir. Dokumen dibaca secara
+        streaming dengan buffer besar dan dikelompokkan menjadi block-block
+        berisi docs_per_block dokumen; nama dokumen di doc_id_map adalah id
+        dokumen pada packed file.
+
+        Parameters
+        ----------
+        packed_path: str
+            Path ke packed file
+        docs_per_block: int
+            Banyaknya dokumen per block (mode BSBI)
+        memory_budget: int
+            Jika diberikan, seluruh packed file di-index dengan spimi_invert
+            (single pass) dengan batas memori memory_budget bytes per run,
+            dan docs_per_block diabaikan.
+        resume: bool
+            Seperti pada index(); block-block yang sudah selesai tetap dibaca
+            dari packed file, tetapi tidak di-parse ulang. Pada mode SPIMI
+            seluruh packed file adalah satu block.
+        packed_options:
+            Diteruskan ke corpus.read_packed (format, id_field, text_field, buffer_size)
+        """
+        docs = read_packed(packed_path, **packed_options)
+        block_name = os.path.splitext(os.path.basename(packed_path))[0]
+        source = (os.path.abspath(packed_path), None if memory_budget is not None else docs_per_block)
+        finished_blocks = self.restore_checkpoint(source) if resume else []
+        if memory_budget is not None:
+            if block_name not in finished_blocks:
+                self.intermediate_indices.extend(self.spimi_invert(block_name, memory_budget, docs))
+                self.checkpoint(source, [block_name])
+        else:
+            for i, block in enumerate(tqdm(chunked(docs, docs_per_block))):
+                if block_name + '_' + str(i) in finished_blocks:
+                    continue
+                self.write_intermediate(block_name + '_' + str(i), self.parse_texts(block))
+                finished_blocks.append(block_name + '_' + str(i))
+                self.checkpoint(source, finished_blocks)
+
+        self.merge_intermediate()
+
+    def write_intermediate(self, block_name, td_pairs):
+        """Inversion td_pairs sebuah block ke intermediate_index_<block_name>."""
+        index_id = 'intermediate_index_'+block_name
+        self.intermediate_indices.append(index_id)
+        with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir) as index:
+            self.invert_write(td_pairs, index)
+
+    def merge_intermediate(self):
+        """
+        Menyimpan IdMap, lalu merging semua intermediate index menjadi sebuah
+        segment yang sekaligus menjadi satu-satunya segment yang live. Setelah
+        itu build manifest dihapus karena indexing sudah selesai.
+
+        Segment hasil merging bernama index_name, kecuali jika index_name sedang
+        live (rebuild saat index sedang dipakai); dalam hal itu segment ditulis
+        dengan nama baru (segment_<generation>). Segment yang live tidak pernah
+        ditulis ulang di tempat, karena mengganti file .index, .terms, dan .dict
+        tidak atomik untuk ketiganya sekaligus: reader yang membuka index di
+        tengah penggantian bisa mendapat .index lama dengan offsets .terms yang
+        baru. Segment baru hanya dipublikasikan lewat penggantian segments.dict
+        yang atomik (SegmentManager.reset), dan file-file segment lama beserta
+        tombstones-nya baru dihapus setelah itu.
+        """
         self.save()
 
-        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = self.output_dir) as merged_index:
+        merged_name = self.index_name
+        if merged_name in self.segments.live_segments():
+            merged_name = self.segments.new_segment_name()
+        with InvertedIndexWriter(merged_name, self.postings_encoding, directory = self.output_dir) as merged_index:
             with contextlib.ExitStack() as stack:
                 indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
                                for index_id in self.intermediate_indices]
                 self.merge(indices, merged_index)
+            num_docs = len(merged_index.doc_length)
+        self.segments.reset([(merged_name, num_docs)])
+        self.write_stats()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(self.output_dir, BUILD_MANIFEST))
+
+    def add_block(self, block_dir_relative, background_merge = True):
+        """
+        Incremental indexing: melakukan indexing sebuah block (sub-directory di
+        data_dir) yang berisi dokumen-dokumen baru sebagai sebuah segment baru,
+        tanpa menulis ulang index yang sudah ada. Dokumen di block tersebut
+        langsung dapat dicari setelah method ini selesai.
+
+        Setelah segment didaftarkan, segment-segment kecil di-merge di
+        background sesuai merge policy (lihat TieredMergePolicy).
+
+        Dokumen di block yang sudah pernah di-index (misal block yang sama
+        ditambahkan ulang) diperlakukan seperti update_documents: versi lamanya
+        dihapus dulu (tombstone) sebelum segment baru ditulis, sehingga setiap
+        docID hanya live di satu segment.
+
+        Parameters
+        ----------
+        block_dir_relative : str
+            Relative Path ke directory yang mengandung text files untuk sebuah block.
+        background_merge: bool
+            Jika False, merging dilakukan (dan ditunggu) di thread ini.
+
+        Returns
+        -------
+        str
+            Nama segment yang baru
+        """
+        if os.path.exists(os.path.join(self.output_dir, 'terms.dict')):
+            self.load_id_maps()
+            doc_paths = [os.path.join(block_dir_relative, file)
+                         for file in os.listdir(os.path.join(self.data_dir, block_dir_relative))]
+            self.delete_documents([path for path in doc_paths if path in self.doc_id_map])
+        return self.write_segment(self.parse_block(block_dir_relative), background_merge)
+
+    def write_segment(self, td_pairs, background_merge = True):
+        """
+        Menulis td_pairs sebagai sebuah segment baru, menyimpan IdMap, dan
+        mendaftarkan segment tersebut ke self.segments.
+
+        Returns
+        -------
+        str
+            Nama segment yang baru
+        """
+        segment_name = self.segments.new_segment_name()
+        with InvertedIndexWriter(segment_name, self.postings_encoding, directory = self.output_dir) as index:
+            self.invert_write(td_pairs, index)
+            num_docs = len(index.doc_length)
+        self.save()
+        self.segments.add_segment(segment_name, num_docs, background = background_merge)
+        self.write_stats()
+        return segment_name
+
+    def delete_documents(self, doc_paths):
+        """
+        Menghapus dokumen-dokumen dari index dengan menandainya di bitset
+        tombstones setiap segment yang mengandung dokumen tersebut. Dokumen
+        yang dihapus langsung tidak muncul di hasil retrieval, dan postings-nya
+        baru benar-benar dibuang ketika segment-nya di-merge.
+
+        Parameters
+        ----------
+        doc_paths: List[str]
+            Relative path dokumen-dokumen (terhadap data_dir), misal "1/29.txt"
+
+        Returns
+        -------
+        int
+            Banyaknya dokumen yang dihapus
+        """
+        self.load_id_maps()
+        doc_ids = set(self.doc_id_map[path] for path in doc_paths if path in self.doc_id_map)
+        deleted = set()
+        with self.segments.lock:
+            with contextlib.ExitStack() as stack:
+                readers = self.open_segments(stack)
+                for invert_map in readers:
+                    segment_doc_ids = [doc_id for doc_id in doc_ids
+                                       if doc_id in invert_map.doc_length and not invert_map.is_deleted(doc_id)]
+                    if segment_doc_ids:
+                        invert_map.delete(segment_doc_ids)
+                        deleted.update(segment_doc_ids)
+                if deleted:
+                    self.write_stats(readers)
+        return len(deleted)
+
+    def update_documents(self, doc_paths, background_merge = True):
+        """
+        Update dokumen-dokumen yang isinya berubah: versi lama dihapus (lihat
+        delete_documents) lalu versi baru di-index sebagai segment baru dengan
+        docID yang sama. Dokumen yang belum pernah di-index akan ditambahkan.
+
+        Parameters
+        ----------
+        doc_paths: List[str]
+            Relative path dokumen-dokumen (terhadap data_dir), misal "1/29.txt"
+
+        Returns
+        -------
+        str
+            Nama segment yang berisi versi baru dokumen-dokumen tersebut
+        """
+        self.delete_documents(doc_paths)
+        return self.write_segment(self.parse_docs(doc_paths), background_merge)
 
 
 if __name__ == "__main__":
 
+    # self-test: semua mode indexing (paralel, SPIMI, spill, packed, dan
+    # indexing yang terhenti lalu dilanjutkan) harus menghasilkan index yang
+    # byte-identical dengan indexing sekuensial biasa
+    import shutil
+
+    def build_files(index):
+        assert index.segments.live_segments() == [index.index_name], "segment hasil indexing salah"
+        assert not os.path.exists(os.path.join(index.output_dir, BUILD_MANIFEST)), "build manifest harus dihapus"
+        files = [index.index_name + ext for ext in ('.index', '.terms', '.dict')] + ['terms.dict', 'docs.dict']
+        contents = {}
+        for file in files:
+            with open(os.path.join(index.output_dir, file), 'rb') as f:
+                contents[file] = f.read()
+        return contents
+
+    def interrupt_after(index, num_checkpoints):
+        # simulasi crash setelah num_checkpoints block selesai
+        checkpoint = index.checkpoint
+        def interrupted_checkpoint(source, finished_blocks):
+            checkpoint(source, finished_blocks)
+            if len(finished_blocks) == num_checkpoints:
+                raise KeyboardInterrupt
+        index.checkpoint = interrupted_checkpoint
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        test_data_dir = os.path.join(temp_dir, 'collection')
+        blocks = {'1': ["the cat eats fish", "a dog eats the bone of a fish"],
+                  '2': ["cats and dogs sleep", "fish swim and fish sleep", "the bone"],
+                  '3': ["dog", "a cat, a dog and a fish eat together"]}
+        for block, texts in blocks.items():
+            os.makedirs(os.path.join(test_data_dir, block))
+            for i, text in enumerate(texts):
+                with open(os.path.join(test_data_dir, block, str(i) + '.txt'), 'w') as f:
+                    f.write(text)
+        packed_path = os.path.join(temp_dir, 'collection.tsv')
+        with open(packed_path, 'w') as f:
+            for block in sorted(blocks):
+                for doc_path, text in read_block_dir(test_data_dir, block):
+                    f.write(doc_path + '\t' + text + '\n')
+
+        def build(name, interrupt = None, spill_pairs = SPILL_PAIRS, packed = False, **index_options):
+            test_output_dir = os.path.join(temp_dir, name)
+            os.mkdir(test_output_dir)
+            index = BSBIIndex(test_data_dir, test_output_dir, VBEPostings, spill_pairs = spill_pairs)
+            run = (lambda: index.index_packed(packed_path, **index_options)) if packed else \
+                  (lambda: index.index(**index_options))
+            if interrupt is not None:
+                interrupt_after(index, interrupt)
+                try:
+                    run()
+                    assert False, "indexing harus terhenti"
+                except KeyboardInterrupt:
+                    pass
+                index = BSBIIndex(test_data_dir, test_output_dir, VBEPostings, spill_pairs = spill_pairs)
+                parsed = []
+                parse_texts = index.parse_texts
+                index.parse_texts = lambda docs: parse_texts(list(parsed.append(doc) or doc for doc in docs))
+                run = (lambda: index.index_packed(packed_path, **index_options)) if packed else \
+                      (lambda: index.index(**index_options))
+                run()
+                if packed and index_options.get('memory_budget') is None:
+                    # block yang sudah selesai tidak di-parse ulang
+                    assert len(parsed) == 7 - 2 * interrupt, "resume harus melewati block yang sudah selesai"
+            else:
+                run()
+            return build_files(index)
+
+        expected = build('sequential')
+        assert build('parallel', num_workers = 2) == expected, "index paralel harus identik"
+        assert build('spimi', memory_budget = 64) == expected, "index SPIMI harus identik"
+        assert build('spill', spill_pairs = 4) == expected, "index dengan spill harus identik"
+        assert build('packed', packed = True, docs_per_block = 3) == expected, "index dari packed file harus identik"
+        assert build('resume', interrupt = 1) == expected, "index yang dilanjutkan harus identik"
+        assert build('resume_all', interrupt = 3) == expected, "index yang dilanjutkan harus identik"
+        assert build('resume_parallel', interrupt = 2, num_workers = 2) == expected, "index yang dilanjutkan harus identik"
+        assert build('resume_spimi', interrupt = 2, memory_budget = 64) == expected, "index yang dilanjutkan harus identik"
+        assert build('resume_packed', interrupt = 2, packed = True, docs_per_block = 2) == \
+               build('packed_2', packed = True, docs_per_block = 2), "index packed yang dilanjutkan harus identik"
+    finally:
+        shutil.rmtree(temp_dir)
+
     try:
         os.mkdir("index")
     except:
@@ -1,4 +1,8 @@
+import sys
 import array
+import bisect
+import itertools
+import numpy as np
 
 class StandardPostings:
     """ 
@@ -240,6 +244,736 @@ class VBEPostings:
         """
         return VBEPostings.vb_decode(encoded_tf_list)
 
+# Stream/list yang lebih pendek dari ini di-decode/encode dengan loop Python
+# (VBEPostings), karena overhead setiap pemanggilan fungsi NumPy lebih besar
+# daripada loop-nya; hasilnya tetap berupa np.ndarray
+NUMPY_VBE_MIN_BYTES = 256
+NUMPY_VBE_MIN_NUMBERS = 64
+
+class NumpyVBEPostings:
+    """
+    Variable-Byte Encoding yang sama persis dengan VBEPostings (bytestream yang
+    dihasilkan identik, sehingga index yang ditulis dengan VBEPostings bisa
+    dibaca dengan NumpyVBEPostings dan sebaliknya), tetapi encoding dan
+    decoding dilakukan dengan operasi array NumPy, tanpa loop Python per byte.
+
+    Hasil decoding berupa np.ndarray (int64), bukan list. Codec ini ditujukan
+    untuk membaca postings saat retrieval dengan scoring vectorized (lihat
+    BSBIIndex.bm_25); retrieval tanpa vectorized mengubah array menjadi list
+    dulu (lihat BSBIIndex.segment_postings). Indexing dan merging dengan codec
+    ini menghasilkan index yang sama dengan VBEPostings (InvertedIndexWriter
+    menyimpan docID dan TF sebagai int Python).
+
+    Decoding:
+    1. Byte dengan bit awal 1 menandai byte terakhir sebuah angka, sehingga
+       np.flatnonzero(bytes >= 128) adalah posisi akhir setiap angka.
+    2. Setiap byte (7 bit) di-shift sebesar 7 * (jarak ke byte terakhir
+       angkanya), lalu dijumlahkan per angka dengan np.add.reduceat.
+    3. Untuk postings, gap dikembalikan menjadi docID dengan np.cumsum.
+    """
+
+    @staticmethod
+    def vb_encode(list_of_numbers):
+        """
+        Variable-Byte Encoding terhadap list (atau array) of numbers secara
+        vectorized. Hasilnya sama dengan VBEPostings.vb_encode.
+        """
+        numbers = np.asarray(list_of_numbers, dtype = np.int64).ravel()
+        if numbers.size < NUMPY_VBE_MIN_NUMBERS:
+            return VBEPostings.vb_encode(numbers.tolist())
+        # banyaknya byte untuk setiap angka
+        num_bytes = np.ones(numbers.size, dtype = np.int64)
+        shifted = numbers >> 7
+        while shifted.any():
+            num_bytes += shifted > 0
+            shifted >>= 7
+        ends = np.cumsum(num_bytes) - 1
+        encoded = np.zeros(ends[-1] + 1, dtype = np.uint8)
+        for k in range(int(num_bytes.max())):
+            mask = num_bytes > k
+            encoded[ends[mask] - k] = (numbers[mask] >> (7 * k)) & 127
+        encoded[ends] |= 128
+        return encoded.tobytes()
+
+    @staticmethod
+    def vb_encode_batch(lists_of_numbers):
+        """
+        Encode banyak list of numbers sekaligus dengan satu kali vb_encode,
+        lalu memotong hasilnya per list.
+
+        Returns
+        -------
+        List[bytes]
+            Hasil vb_encode untuk setiap list di lists_of_numbers
+        """
+        lengths = [len(numbers) for numbers in lists_of_numbers]
+        if sum(lengths) == 0:
+            return [b"" for _ in lengths]
+        numbers = np.concatenate([np.asarray(numbers, dtype = np.int64) for numbers in lists_of_numbers])
+        encoded = NumpyVBEPostings.vb_encode(numbers)
+        # posisi akhir (exclusive) bytes setiap list
+        ends = np.flatnonzero(np.frombuffer(encoded, dtype = np.uint8) >= 128) + 1
+        boundaries = [0] + [int(ends[i - 1]) if i > 0 else 0 for i in np.cumsum(lengths)]
+        return [encoded[boundaries[j]:boundaries[j + 1]] for j in range(len(lengths))]
+
+    @staticmethod
+    def gaps(postings_list):
+        """Mengubah postings list (terurut) menjadi gap-based array."""
+        return np.diff(np.asarray(postings_list, dtype = np.int64), prepend = 0)
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list menjadi stream of bytes (gap-based, lalu
+        Variable-Byte Encoding), sama dengan VBEPostings.encode.
+        """
+        return NumpyVBEPostings.vb_encode(NumpyVBEPostings.gaps(postings_list))
+
+    @staticmethod
+    def encode_batch(postings_lists):
+        """
+        Encode banyak postings lists sekaligus (lihat vb_encode_batch).
+
+        Returns
+        -------
+        List[bytes]
+            Hasil encode untuk setiap postings list
+        """
+        return NumpyVBEPostings.vb_encode_batch([NumpyVBEPostings.gaps(postings_list)
+                                                 for postings_list in postings_lists])
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """Encode list of term frequencies, sama dengan VBEPostings.encode_tf."""
+        return NumpyVBEPostings.vb_encode(tf_list)
+
+    @staticmethod
+    def encode_tf_batch(tf_lists):
+        """Encode banyak list of term frequencies sekaligus."""
+        return NumpyVBEPostings.vb_encode_batch(tf_lists)
+
+    @staticmethod
+    def vb_decode(encoded_bytestream):
+        """
+        Decoding sebuah bytestream Variable-Byte Encoding secara vectorized.
+
+        Returns
+        -------
+        np.ndarray
+            Array (int64) of numbers
+        """
+        if len(encoded_bytestream) < NUMPY_VBE_MIN_BYTES:
+            return np.array(VBEPostings.vb_decode(encoded_bytestream), dtype = np.int64)
+        data = np.frombuffer(encoded_bytestream, dtype = np.uint8)
+        ends = np.flatnonzero(data >= 128)
+        if ends.size == 0:
+            return np.zeros(0, dtype = np.int64)
+        data = data[:ends[-1] + 1]
+        values = (data & 127).astype(np.int64)
+        if ends.size == data.size:
+            # semua angka < 128, masing-masing satu byte
+            return values
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        # jarak setiap byte ke byte terakhir angkanya
+        distance = np.repeat(ends, ends - starts + 1) - np.arange(data.size)
+        return np.add.reduceat(values << (7 * distance), starts)
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes (gap-based).
+
+        Returns
+        -------
+        np.ndarray
+            Array (int64) of docIDs
+        """
+        if len(encoded_postings_list) < NUMPY_VBE_MIN_BYTES:
+            return np.array(VBEPostings.decode(encoded_postings_list), dtype = np.int64)
+        return np.cumsum(NumpyVBEPostings.vb_decode(encoded_postings_list))
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Returns
+        -------
+        np.ndarray
+            Array (int64) of term frequencies
+        """
+        return NumpyVBEPostings.vb_decode(encoded_tf_list)
+
+# Banyaknya docID per block pada BlockPostings
+POSTINGS_BLOCK_SIZE = 128
+
+class BlockPostings:
+    """
+    Postings list disimpan per block berisi POSTINGS_BLOCK_SIZE docID. Setiap
+    block di-encode dengan Frame of Reference (FOR): gap-gap di dalam block
+    (gap pertama relatif terhadap docID terakhir block sebelumnya) di-bit-pack
+    dengan lebar bit yang sama, yaitu lebar bit gap terbesar di block tersebut.
+
+    Stream diawali skip header (VBE): banyaknya postings, lalu untuk setiap
+    block, docID terakhir block (gap terhadap docID terakhir block sebelumnya)
+    dan panjang block dalam bytes. Dengan header ini, BlockPostingsCursor bisa
+    melompati block-block yang tidak dibutuhkan tanpa men-decode-nya.
+
+        VBE(n) + VBE(last_0, len_0, last_1 - last_0, len_1, ...) + block_0 + block_1 + ...
+        block  = (1 byte lebar bit) + gap-gap yang di-bit-pack (little endian)
+
+    TF list di-encode dengan block yang sama (block ke-j berisi TF dari docID
+    di block ke-j postings), dengan header VBE(n) + VBE(len_0, len_1, ...).
+    """
+
+    @staticmethod
+    def pack(numbers):
+        """Bit-packing list of numbers (>= 0) dengan lebar bit yang sama."""
+        width = max(numbers).bit_length()
+        packed = 0
+        for i, number in enumerate(numbers):
+            packed |= number << (i * width)
+        return bytes([width]) + packed.to_bytes((len(numbers) * width + 7) // 8, 'little')
+
+    @staticmethod
+    def unpack(block, count):
+        """Kebalikan dari pack: mengembalikan count numbers dari sebuah block."""
+        width = block[0]
+        packed = int.from_bytes(block[1:], 'little')
+        mask = (1 << width) - 1
+        numbers = []
+        for _ in range(count):
+            numbers.append(packed & mask)
+            packed >>= width
+        return numbers
+
+    @staticmethod
+    def read_header(encoded, with_lasts = True):
+        """
+        Membaca skip header.
+
+        Returns
+        -------
+        Tuple[int, List[int], List[int]]
+            (banyaknya postings, docID terakhir setiap block (kosong jika
+            with_lasts = False), offset awal setiap block dan offset akhir block
+            terakhir)
+        """
+        numbers = []
+        n = 0
+        i = 0
+        count = None
+        while count is None or len(numbers) < expected:
+            byte = encoded[i]
+            i += 1
+            if byte < 128:
+                n = 128 * n + byte
+                continue
+            n = 128 * n + (byte - 128)
+            if count is None:
+                count = n
+                expected = -(-count // POSTINGS_BLOCK_SIZE) * (2 if with_lasts else 1)
+            else:
+                numbers.append(n)
+            n = 0
+
+        step = 2 if with_lasts else 1
+        lasts = list(itertools.accumulate(numbers[0::2])) if with_lasts else []
+        offsets = [i]
+        for length in numbers[step - 1::step]:
+            offsets.append(offsets[-1] + length)
+        return count, lasts, offsets
+
+    @staticmethod
+    def block_count(count, block):
+        """Banyaknya postings di block ke-block dari count postings."""
+        return min(POSTINGS_BLOCK_SIZE, count - block * POSTINGS_BLOCK_SIZE)
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list menjadi stream of bytes (lihat docstring class)
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan urutan integer di postings_list
+        """
+        header = [len(postings_list)]
+        blocks = []
+        prev_last = 0
+        for start in range(0, len(postings_list), POSTINGS_BLOCK_SIZE):
+            block = postings_list[start:start + POSTINGS_BLOCK_SIZE]
+            gaps = [block[0] - prev_last] + [curr - prev for prev, curr in zip(block, block[1:])]
+            blocks.append(BlockPostings.pack(gaps))
+            header.append(block[-1] - prev_last)
+            header.append(len(blocks[-1]))
+            prev_last = block[-1]
+        return VBEPostings.vb_encode(header) + b"".join(blocks)
+
+    @staticmethod
+    def decode_block(encoded_postings_list, lasts, offsets, count, block):
+        """Decode docIDs di block ke-block saja."""
+        base = lasts[block - 1] if block > 0 else 0
+        gaps = BlockPostings.unpack(encoded_postings_list[offsets[block]:offsets[block + 1]],
+                                    BlockPostings.block_count(count, block))
+        return list(itertools.accumulate(gaps, initial = base))[1:]
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        count, lasts, offsets = BlockPostings.read_header(encoded_postings_list)
+        postings_list = []
+        for block in range(len(lasts)):
+            postings_list.extend(BlockPostings.decode_block(encoded_postings_list, lasts, offsets, count, block))
+        return postings_list
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode list of term frequencies menjadi stream of bytes, dengan block
+        yang sama seperti postings list-nya
+        """
+        blocks = [BlockPostings.pack(tf_list[start:start + POSTINGS_BLOCK_SIZE])
+                  for start in range(0, len(tf_list), POSTINGS_BLOCK_SIZE)]
+        return VBEPostings.vb_encode([len(tf_list)] + [len(block) for block in blocks]) + b"".join(blocks)
+
+    @staticmethod
+    def decode_tf_block(encoded_tf_list, offsets, count, block):
+        """Decode TF di block ke-block saja."""
+        return BlockPostings.unpack(encoded_tf_list[offsets[block]:offsets[block + 1]],
+                                    BlockPostings.block_count(count, block))
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        count, _, offsets = BlockPostings.read_header(encoded_tf_list, with_lasts = False)
+        tf_list = []
+        for block in range(len(offsets) - 1):
+            tf_list.extend(BlockPostings.decode_tf_block(encoded_tf_list, offsets, count, block))
+        return tf_list
+
+    @staticmethod
+    def cursor(encoded_postings_list, encoded_tf_list, is_deleted = None):
+        """Membuat BlockPostingsCursor (lihat InvertedIndexReader.get_postings_cursor)."""
+        return BlockPostingsCursor(encoded_postings_list, encoded_tf_list, is_deleted)
+
+class AdaptivePostings:
+    """
+    Memilih codec terbaik (encoding terpendek) untuk setiap postings list dan
+    setiap TF list secara terpisah saat index ditulis. Stream diawali satu byte
+    tag: 2 bit terbawah adalah codec, 6 bit sisanya parameter codec (jika
+    parameter >= 63, bytes tersebut bernilai 63 dan parameter di-encode dengan
+    VBE setelahnya). Decoding membaca tag tersebut lalu memanggil codec-nya,
+    sehingga term-term dalam satu index bisa memakai codec yang berbeda-beda.
+
+    Codec untuk postings list:
+        VBE   : sama dengan VBEPostings.encode
+        BLOCK : sama dengan BlockPostings.encode (FOR bit-packing per block),
+                cocok untuk postings list panjang yang padat (gap kecil seragam)
+        GAMMA : Elias-gamma dari gap (gap pertama = docID pertama + 1), cocok
+                untuk gap-gap kecil
+
+    Codec untuk TF list:
+        VBE   : sama dengan VBEPostings.encode_tf
+        ONES  : semua TF bernilai 1; parameter adalah banyaknya TF, tanpa payload
+        GAMMA : Elias-gamma dari TF (semua TF >= 1), 1 bit untuk setiap TF 1
+        RUNS  : run-length, VBE dari pasangan (TF, panjang run)
+
+    List kosong di-encode menjadi b"" (tanpa tag).
+    """
+    VBE, BLOCK, GAMMA = 0, 1, 2
+    TF_VBE, TF_ONES, TF_GAMMA, TF_RUNS = 0, 1, 2, 3
+    CODECS = ["VBE", "BLOCK", "GAMMA"]
+    TF_CODECS = ["VBE", "ONES", "GAMMA", "RUNS"]
+    MAX_INLINE_PARAM = 63
+
+    @staticmethod
+    def tag(codec, param = 0):
+        """Byte tag (beserta parameter dalam VBE jika tidak muat) untuk codec."""
+        if param < AdaptivePostings.MAX_INLINE_PARAM:
+            return bytes([param << 2 | codec])
+        return bytes([AdaptivePostings.MAX_INLINE_PARAM << 2 | codec]) + VBEPostings.vb_encode_number(param)
+
+    @staticmethod
+    def read_tag(encoded):
+        """
+        Returns
+        -------
+        Tuple[int, int, int]
+            (codec, parameter, offset awal payload)
+        """
+        codec, param, i = encoded[0] & 3, encoded[0] >> 2, 1
+        if param == AdaptivePostings.MAX_INLINE_PARAM:
+            param = 0
+            while encoded[i] < 128:
+                param = 128 * param + encoded[i]
+                i += 1
+            param = 128 * param + encoded[i] - 128
+            i += 1
+        return codec, param, i
+
+    @staticmethod
+    def gamma_encode(numbers):
+        """Elias-gamma coding list of numbers (>= 1), di-pad dengan bit 0 di akhir."""
+        bits = []
+        for number in numbers:
+            binary = format(number, 'b')
+            bits.append('0' * (len(binary) - 1))
+            bits.append(binary)
+        bits = ''.join(bits)
+        if not bits:
+            return b""
+        bits += '0' * (-len(bits) % 8)
+        return int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+    @staticmethod
+    def gamma_decode(encoded):
+        """Kebalikan dari gamma_encode; bit-bit 0 padding di akhir diabaikan."""
+        if not len(encoded):
+            return []
+        # bit 1 tambahan di depan agar bit-bit 0 di awal tidak hilang
+        bits = bin(int.from_bytes(encoded, 'big') | (1 << 8 * len(encoded)))[3:]
+        find = bits.find
+        numbers = []
+        start = 0
+        while True:
+            one = find('1', start)
+            if one < 0:
+                return numbers
+            end = 2 * one - start + 1
+            numbers.append(int(bits[one:end], 2))
+            start = end
+
+    @staticmethod
+    def shortest(candidates):
+        """Encoding terpendek; jika sama panjang, yang lebih dulu (lebih cepat di-decode)."""
+        return min(candidates, key = len)
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list dengan codec yang menghasilkan stream terpendek
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            Tag codec diikuti hasil encoding codec tersebut
+        """
+        if not len(postings_list):
+            return b""
+        gaps = [postings_list[0] + 1] + [curr - prev for prev, curr in zip(postings_list, postings_list[1:])]
+        return AdaptivePostings.shortest([
+            AdaptivePostings.tag(AdaptivePostings.VBE) + VBEPostings.encode(postings_list),
+            AdaptivePostings.tag(AdaptivePostings.BLOCK) + BlockPostings.encode(postings_list),
+            AdaptivePostings.tag(AdaptivePostings.GAMMA) + AdaptivePostings.gamma_encode(gaps)])
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes sesuai codec di tag-nya
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        if not len(encoded_postings_list):
+            return []
+        codec, _, i = AdaptivePostings.read_tag(encoded_postings_list)
+        payload = encoded_postings_list[i:]
+        if codec == AdaptivePostings.VBE:
+            return VBEPostings.decode(payload)
+        if codec == AdaptivePostings.BLOCK:
+            return BlockPostings.decode(payload)
+        return list(itertools.accumulate(AdaptivePostings.gamma_decode(payload), initial = -1))[1:]
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """Encode list of term frequencies dengan codec yang menghasilkan stream terpendek"""
+        if not len(tf_list):
+            return b""
+        candidates = [AdaptivePostings.tag(AdaptivePostings.TF_VBE) + VBEPostings.encode_tf(tf_list)]
+        if min(tf_list) >= 1:
+            if max(tf_list) == 1:
+                candidates.append(AdaptivePostings.tag(AdaptivePostings.TF_ONES, len(tf_list)))
+            candidates.append(AdaptivePostings.tag(AdaptivePostings.TF_GAMMA) + AdaptivePostings.gamma_encode(tf_list))
+        runs = []
+        for tf, run in itertools.groupby(tf_list):
+            runs.append(tf)
+            runs.append(sum(1 for _ in run))
+        candidates.append(AdaptivePostings.tag(AdaptivePostings.TF_RUNS) + VBEPostings.vb_encode(runs))
+        return AdaptivePostings.shortest(candidates)
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes sesuai codec di tag-nya
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        if not len(encoded_tf_list):
+            return []
+        codec, param, i = AdaptivePostings.read_tag(encoded_tf_list)
+        payload = encoded_tf_list[i:]
+        if codec == AdaptivePostings.TF_VBE:
+            return VBEPostings.vb_decode(payload)
+        if codec == AdaptivePostings.TF_ONES:
+            return [1] * param
+        if codec == AdaptivePostings.TF_GAMMA:
+            return AdaptivePostings.gamma_decode(payload)
+        runs = VBEPostings.vb_decode(payload)
+        tf_list = []
+        for j in range(0, len(runs), 2):
+            tf_list.extend([runs[j]] * runs[j + 1])
+        return tf_list
+
+class PostingsCursor:
+    """
+    Cursor untuk membaca postings list secara berurutan, dengan operasi
+    next_geq untuk intersection (conjunctive query) dan dynamic pruning.
+    Implementasi ini berlaku untuk semua postings encoding: postings dan TF
+    list di-decode seluruhnya di awal. Lihat BlockPostingsCursor untuk cursor
+    yang hanya men-decode block yang dibutuhkan.
+
+    Attributes
+    ----------
+    doc: int
+        docID saat ini, atau PostingsCursor.END jika postings sudah habis
+    is_deleted: Callable[[int], bool]
+        Opsional; docID yang dihapus (lihat InvertedIndex.is_deleted) dilewati
+    """
+    END = sys.maxsize
+
+    def __init__(self, postings_list, tf_list, is_deleted = None):
+        self.postings_list = postings_list
+        self.tf_list = tf_list
+        self.is_deleted = is_deleted
+        self.i = 0
+        self.doc = postings_list[0] if len(postings_list) > 0 else self.END
+        self.skip_deleted()
+
+    def __len__(self):
+        """Banyaknya postings (termasuk yang sudah dihapus)."""
+        return len(self.postings_list)
+
+    def skip_deleted(self):
+        while self.is_deleted is not None and self.doc != self.END and self.is_deleted(self.doc):
+            self.advance()
+
+    def advance(self):
+        self.i += 1
+        self.doc = self.postings_list[self.i] if self.i < len(self.postings_list) else self.END
+
+    def next(self):
+        """Maju ke posting berikutnya dan mengembalikan docID-nya."""
+        self.advance()
+        self.skip_deleted()
+        return self.doc
+
+    def next_geq(self, doc_id):
+        """Maju ke posting pertama dengan docID >= doc_id dan mengembalikan docID-nya."""
+        if self.doc < doc_id:
+            self.i = bisect.bisect_left(self.postings_list, doc_id, self.i)
+            self.doc = self.postings_list[self.i] if self.i < len(self.postings_list) else self.END
+            self.skip_deleted()
+        return self.doc
+
+    def tf(self):
+        """TF dari docID saat ini."""
+        return self.tf_list[self.i]
+
+    def block_lasts(self):
+        """
+        docID terakhir setiap block berisi POSTINGS_BLOCK_SIZE postings, yaitu
+        block yang sama dengan BlockPostings (dan bound BM25 per block, lihat
+        InvertedIndexWriter.add_bounds).
+        """
+        lasts = list(self.postings_list[POSTINGS_BLOCK_SIZE - 1::POSTINGS_BLOCK_SIZE])
+        if len(self.postings_list) % POSTINGS_BLOCK_SIZE:
+            lasts.append(self.postings_list[-1])
+        return lasts
+
+class BlockPostingsCursor(PostingsCursor):
+    """
+    Cursor untuk postings yang di-encode dengan BlockPostings. Hanya skip
+    header yang di-decode di awal; sebuah block (dan block TF-nya) baru
+    di-decode ketika cursor masuk ke block tersebut, dan next_geq melompati
+    block-block yang docID terakhirnya lebih kecil dari target dengan binary
+    search pada skip header.
+
+    Attributes
+    ----------
+    blocks_decoded: int
+        Banyaknya block postings yang di-decode (untuk benchmark)
+    """
+    def __init__(self, encoded_postings_list, encoded_tf_list, is_deleted = None):
+        self.encoded_postings_list = encoded_postings_list
+        self.encoded_tf_list = encoded_tf_list
+        self.count, self.lasts, self.offsets = BlockPostings.read_header(encoded_postings_list)
+        self.tf_offsets = None
+        self.is_deleted = is_deleted
+        self.blocks_decoded = 0
+        self.load_block(0)
+        self.skip_deleted()
+
+    def __len__(self):
+        return self.count
+
+    def load_block(self, block):
+        """Decode block ke-block dan menempatkan cursor di posting pertamanya."""
+        self.block = block
+        self.i = 0
+        self.tf_list = None
+        if block >= len(self.lasts):
+            self.postings_list = []
+            self.doc = self.END
+            return
+        self.postings_list = BlockPostings.decode_block(self.encoded_postings_list, self.lasts,
+                                                        self.offsets, self.count, block)
+        self.blocks_decoded += 1
+        self.doc = self.postings_list[0]
+
+    def advance(self):
+        self.i += 1
+        if self.i < len(self.postings_list):
+            self.doc = self.postings_list[self.i]
+        elif self.doc != self.END:
+            self.load_block(self.block + 1)
+
+    def next_geq(self, doc_id):
+        if self.doc >= doc_id:
+            return self.doc
+        if self.lasts[self.block] < doc_id:
+            self.load_block(bisect.bisect_left(self.lasts, doc_id, self.block + 1))
+            if self.doc == self.END:
+                return self.doc
+        self.i = bisect.bisect_left(self.postings_list, doc_id, self.i)
+        self.doc = self.postings_list[self.i]
+        self.skip_deleted()
+        return self.doc
+
+    def tf(self):
+        if self.tf_list is None:
+            if self.tf_offsets is None:
+                _, _, self.tf_offsets = BlockPostings.read_header(self.encoded_tf_list, with_lasts = False)
+            self.tf_list = BlockPostings.decode_tf_block(self.encoded_tf_list, self.tf_offsets,
+                                                         self.count, self.block)
+        return self.tf_list[self.i]
+
+    def block_lasts(self):
+        return self.lasts
+
+class VBEPositions:
+    """
+    Encoding untuk positional postings: untuk setiap dokumen di postings list
+    sebuah term, list posisi term tersebut di dokumen (terurut, dimulai dari 0).
+    Posisi setiap dokumen disimpan gap-based dan di-encode dengan Variable-Byte
+    Encoding (sama seperti VBEPostings.encode).
+
+    Agar posisi sebuah dokumen bisa di-decode tanpa men-decode posisi dokumen
+    lain, stream diawali sebuah header berisi panjang (dalam bytes) posisi
+    setiap dokumen:
+
+        VBE(panjang header) + header (VBE panjang bytes per dokumen) + posisi
+
+    Contoh:
+    [[3, 10], [0, 1, 5]] ---> header [2, 3], posisi [3, 7] dan [0, 1, 4]
+    """
+
+    @staticmethod
+    def encode(positions_lists):
+        """
+        Encode list of positions (satu list per dokumen di postings list)
+        menjadi stream of bytes
+
+        Parameters
+        ----------
+        positions_lists: List[List[int]]
+            Untuk setiap dokumen, list posisi term yang terurut
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan positions_lists
+        """
+        blocks = [VBEPostings.encode(positions) for positions in positions_lists]
+        header = VBEPostings.vb_encode([len(block) for block in blocks])
+        return VBEPostings.vb_encode_number(len(header)) + header + b"".join(blocks)
+
+    @staticmethod
+    def decode_offsets(encoded_positions):
+        """
+        Decode header dari stream positions.
+
+        Returns
+        -------
+        List[int]
+            offsets, dimana posisi dokumen ke-j berada di
+            encoded_positions[offsets[j]:offsets[j + 1]]
+        """
+        header_length = 0
+        i = 0
+        while True:
+            byte = encoded_positions[i]
+            i += 1
+            if byte < 128:
+                header_length = 128 * header_length + byte
+            else:
+                header_length = 128 * header_length + (byte - 128)
+                break
+        offsets = [i + header_length]
+        for length in VBEPostings.vb_decode(encoded_positions[i:i + header_length]):
+            offsets.append(offsets[-1] + length)
+        return offsets
+
+    @staticmethod
+    def decode_doc(encoded_positions, offsets, j):
+        """Decode posisi dokumen ke-j saja (lihat decode_offsets)."""
+        return VBEPostings.decode(encoded_positions[offsets[j]:offsets[j + 1]])
+
+    @staticmethod
+    def decode(encoded_positions):
+        """
+        Decode seluruh stream positions
+
+        Returns
+        -------
+        List[List[int]]
+            positions_lists yang merupakan hasil decoding dari encoded_positions
+        """
+        offsets = VBEPositions.decode_offsets(encoded_positions)
+        return [VBEPositions.decode_doc(encoded_positions, offsets, j) for j in range(len(offsets) - 1)]
+
 if __name__ == '__main__':
     
     postings_list = [34, 67, 89, 454, 2345738]
@@ -260,3 +994,45 @@ if __name__ == '__main__':
         assert decoded_posting_list == postings_list, "hasil decoding tidak sama dengan postings original"
         assert decoded_tf_list == tf_list, "hasil decoding tidak sama dengan postings original"
         print()
+
+    positions_lists = [[3, 10], [0, 1, 5], [200, 1000]]
+    encoded_positions = VBEPositions.encode(positions_lists)
+    assert VBEPositions.decode(encoded_positions) == positions_lists, "hasil decoding positions salah"
+    assert VBEPositions.decode_doc(encoded_positions, VBEPositions.decode_offsets(encoded_positions), 1) == [0, 1, 5], \
+           "hasil decoding positions salah"
+
+    for postings_list, tf_list in [([34, 67, 89, 454, 2345738], [12, 10, 3, 4, 1]), ([0, 1, 2], [200, 16384, 1]), ([], [])]:
+        encoded_postings_list = NumpyVBEPostings.encode(postings_list)
+        assert encoded_postings_list == VBEPostings.encode(postings_list), "hasil encoding NumpyVBEPostings salah"
+        assert NumpyVBEPostings.decode(encoded_postings_list).tolist() == postings_list, "hasil decoding salah"
+        encoded_tf_list = NumpyVBEPostings.encode_tf(tf_list)
+        assert encoded_tf_list == VBEPostings.encode_tf(tf_list), "hasil encoding NumpyVBEPostings salah"
+        assert NumpyVBEPostings.decode_tf(encoded_tf_list).tolist() == tf_list, "hasil decoding salah"
+    assert NumpyVBEPostings.encode_batch([[1, 300], [], [5]]) == [VBEPostings.encode([1, 300]), b"", VBEPostings.encode([5])], \
+           "hasil encoding batch salah"
+
+    postings_list = list(range(3, 3000, 7)) + [10 ** 7]
+    tf_list = [i % 5 + 1 for i in range(len(postings_list))]
+    encoded_postings_list = BlockPostings.encode(postings_list)
+    encoded_tf_list = BlockPostings.encode_tf(tf_list)
+    assert BlockPostings.decode(encoded_postings_list) == postings_list, "hasil decoding BlockPostings salah"
+    assert BlockPostings.decode_tf(encoded_tf_list) == tf_list, "hasil decoding BlockPostings salah"
+    assert BlockPostings.decode(BlockPostings.encode([])) == [], "hasil decoding BlockPostings salah"
+    cursor = BlockPostings.cursor(encoded_postings_list, encoded_tf_list)
+    assert (cursor.doc, cursor.tf()) == (3, 1), "BlockPostingsCursor salah"
+    assert cursor.next_geq(2000) == 2005 and cursor.tf() == tf_list[postings_list.index(2005)], "BlockPostingsCursor salah"
+    assert cursor.next() == 2012 and cursor.blocks_decoded == 2, "BlockPostingsCursor salah"
+    assert cursor.next_geq(10 ** 6) == 10 ** 7 and cursor.next() == PostingsCursor.END, "BlockPostingsCursor salah"
+
+    for postings_list, tf_list, codec, tf_codec in [([5], [1], "VBE", "ONES"),
+                                                    (list(range(1000)) + [5000], [1] * 900 + [2] * 101, "GAMMA", "RUNS"),
+                                                    (list(range(3, 30000, 61)), [i % 5 + 1 for i in range(492)], "BLOCK", "GAMMA"),
+                                                    ([7, 10 ** 6], [3, 300], "VBE", "VBE"), ([], [], None, None)]:
+        encoded_postings_list = AdaptivePostings.encode(postings_list)
+        encoded_tf_list = AdaptivePostings.encode_tf(tf_list)
+        assert AdaptivePostings.decode(encoded_postings_list) == postings_list, "hasil decoding AdaptivePostings salah"
+        assert AdaptivePostings.decode_tf(encoded_tf_list) == tf_list, "hasil decoding AdaptivePostings salah"
+        if postings_list:
+            assert AdaptivePostings.CODECS[AdaptivePostings.read_tag(encoded_postings_list)[0]] == codec, "codec salah"
+            assert AdaptivePostings.TF_CODECS[AdaptivePostings.read_tag(encoded_tf_list)[0]] == tf_codec, "codec salah"
+    assert AdaptivePostings.decode_tf(AdaptivePostings.encode_tf([1] * 1000)) == [1] * 1000, "hasil decoding AdaptivePostings salah"
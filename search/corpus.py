@@ -0,0 +1,83 @@
+import os
+import json
+import itertools
+
+'''
+Sumber-sumber dokumen untuk indexing. Setiap sumber menghasilkan pasangan
+(nama dokumen, text) secara streaming; nama dokumen inilah yang dipetakan ke
+docID oleh doc_id_map.
+
+Ada dua layout yang didukung:
+1. Satu directory per block, satu file .txt per dokumen (folder collection).
+   Nama dokumen adalah relative path file terhadap data_dir, misal "1/29.txt".
+2. Packed file: banyak dokumen di satu file, yaitu TSV (satu dokumen per baris,
+   "id<TAB>text", seperti nfcorpus/dev.docs) atau JSONL (satu JSON object per
+   baris, misal {"id": "MED-10", "text": "..."}). Nama dokumen adalah id-nya.
+'''
+
+# Ukuran buffer pembacaan packed file (bytes)
+PACKED_BUFFER_SIZE = 1 << 20
+
+
+def read_block_dir(data_dir, block_dir_relative):
+    """
+    Menghasilkan (relative path, text) untuk setiap file di sebuah block
+    directory, sesuai urutan os.listdir.
+    """
+    for file in os.listdir(os.path.join(data_dir, block_dir_relative)):
+        doc_path = os.path.join(block_dir_relative, file)
+        with open(os.path.join(data_dir, doc_path)) as f:
+            yield doc_path, f.read()
+
+
+def read_docs(data_dir, doc_paths):
+    """Menghasilkan (relative path, text) untuk setiap path di doc_paths."""
+    for doc_path in doc_paths:
+        with open(os.path.join(data_dir, doc_path)) as f:
+            yield doc_path, f.read()
+
+
+def packed_format(path):
+    """Menentukan format packed file dari ekstensinya: "jsonl" atau "tsv"."""
+    return "jsonl" if os.path.splitext(path)[1] in ('.jsonl', '.json') else "tsv"
+
+
+def read_packed(path, format = None, id_field = "id", text_field = "text", buffer_size = PACKED_BUFFER_SIZE):
+    """
+    Membaca packed file secara streaming dengan buffer besar, menghasilkan
+    (id dokumen, text) untuk setiap baris yang tidak kosong.
+
+    Parameters
+    ----------
+    path: str
+        Path ke packed file
+    format: str
+        "tsv" atau "jsonl"; jika None, ditentukan dari ekstensi file
+    id_field, text_field: str
+        Nama field id dan text untuk format JSONL
+    buffer_size: int
+        Ukuran buffer pembacaan file dalam bytes
+    """
+    if format is None:
+        format = packed_format(path)
+    with open(path, encoding = 'utf-8', buffering = buffer_size) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            if format == "jsonl":
+                doc = json.loads(line)
+                yield str(doc[id_field]), doc[text_field]
+            else:
+                doc_id, text = line.split('\t', 1)
+                yield doc_id, text
+
+
+def chunked(docs, docs_per_block):
+    """Memecah iterable of dokumen menjadi list-list berisi docs_per_block dokumen."""
+    docs = iter(docs)
+    while True:
+        block = list(itertools.islice(docs, docs_per_block))
+        if not block:
+            return
+        yield block
@@ -1,5 +1,21 @@
 import pickle
 import os
+import sys
+import mmap
+import threading
+import collections
+import array
+import struct
+import bisect
+import contextlib
+
+import numpy as np
+
+try:
+    from .compression import VBEPositions, PostingsCursor, POSTINGS_BLOCK_SIZE
+except ImportError:
+    # dijalankan langsung sebagai script (python index.py)
+    from compression import VBEPositions, PostingsCursor, POSTINGS_BLOCK_SIZE
 
 '''
 Collaborator:
@@ -7,6 +23,167 @@ Andre Septiano - 1906398313
 Matthew Tumbur Parluhutan - 1906308500
 '''
 
+class TermDictionary:
+    """
+    postings_dict versi on-disk (file .terms) yang compact dan bisa di-memory-map,
+    sehingga membuka sebuah index tidak perlu unpickle jutaan tuple.
+
+    File terdiri dari header (magic, banyaknya term, flag positional, flags
+    kolom opsional), lalu kolom-kolom array fixed-width yang terurut berdasarkan
+    termID:
+
+        offsets (Q) | term_ids (I) | dfs (I) | len_postings (I) | len_tf (I) [| len_positions (I)] [| cfs (Q)]
+        [| min_dl_tfs (d) | max_tfs (I)] [| block_bounds_offsets (Q)]
+
+    Elemen ke-i setiap kolom adalah entry postings_dict untuk term_ids[i], yaitu
+    sekitar 24 bytes per term di disk (dan di page cache), tanpa object Python.
+    Lookup dilakukan dengan binary search pada kolom term_ids, atau langsung
+    dengan index jika termID-nya 0, 1, ..., n - 1 (dense).
+
+    Class ini berperilaku seperti read-only dictionary termID -> tuple (lihat
+    InvertedIndex), sehingga bisa dipakai di tempat postings_dict. Kolom-kolom
+    opsional tidak termasuk di tuple tersebut dan bernilai None untuk file
+    .terms yang tidak menyimpannya:
+
+        cfs: collection frequency, yaitu total TF setiap term
+        max_tfs, min_dl_tfs: TF maksimum dan nilai minimum panjang dokumen / TF
+            di postings setiap term, untuk batas atas score BM25 (lihat
+            InvertedIndexWriter.term_bounds dan BSBIIndex.bm_25_wand)
+        block_bounds_offsets: posisi bound yang sama untuk setiap block postings
+            di file index (lihat InvertedIndexWriter.commit), atau 0 untuk term
+            yang postings-nya hanya satu block
+    """
+    MAGIC = b'TDIC'
+    HEADER = struct.Struct('=4sQII')
+
+    # flags kolom opsional di header
+    HAS_CFS = 1
+    HAS_BOUNDS = 2
+    HAS_BLOCK_BOUNDS = 4
+
+    def __init__(self, buffer):
+        """
+        Parameters
+        ----------
+        buffer: bytes, mmap.mmap
+            Isi file .terms
+        """
+        self.view = memoryview(buffer)
+        magic, count, self.positional, flags = self.HEADER.unpack_from(self.view)
+        if magic != self.MAGIC:
+            raise ValueError("bukan file term dictionary")
+        self.count = count
+        start = self.HEADER.size
+        self.offsets = self.view[start:start + 8 * count].cast('Q')
+        start += 8 * count
+        self.columns = []
+        for _ in range(5 if self.positional else 4):
+            self.columns.append(self.view[start:start + 4 * count].cast('I'))
+            start += 4 * count
+        self.cfs = None
+        if flags & self.HAS_CFS:
+            self.cfs = self.view[start:start + 8 * count].cast('Q')
+            start += 8 * count
+        self.min_dl_tfs = self.max_tfs = None
+        if flags & self.HAS_BOUNDS:
+            self.min_dl_tfs = self.view[start:start + 8 * count].cast('d')
+            start += 8 * count
+            self.max_tfs = self.view[start:start + 4 * count].cast('I')
+            start += 4 * count
+        self.block_bounds_offsets = None
+        if flags & self.HAS_BLOCK_BOUNDS:
+            self.block_bounds_offsets = self.view[start:start + 8 * count].cast('Q')
+        self.term_ids = self.columns[0]
+        self.dense = count == 0 or self.term_ids[count - 1] == count - 1
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map file .terms dan mengembalikan TermDictionary-nya."""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("bukan file term dictionary")
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        term_dictionary = cls(buffer)
+        term_dictionary.buffer = buffer
+        return term_dictionary
+
+    def close(self):
+        """Melepas memoryview dan menutup mmap (jika ada)."""
+        for view in [self.offsets] + self.columns + [self.cfs, self.min_dl_tfs, self.max_tfs,
+                                                     self.block_bounds_offsets, self.view]:
+            if view is not None:
+                view.release()
+        buffer = getattr(self, 'buffer', None)
+        if buffer is not None:
+            buffer.close()
+
+    @staticmethod
+    def write(path, postings_dict, cfs = None, bounds = None, block_bounds_offsets = None):
+        """
+        Menulis postings_dict (python's dictionary, lihat InvertedIndexWriter)
+        sebagai file .terms, beserta cfs (dictionary termID -> collection
+        frequency), bounds (dictionary termID -> (max TF, min dl / TF)), dan
+        block_bounds_offsets (dictionary termID -> posisi bound per block di
+        file index, tanpa term yang hanya satu block) jika diberikan.
+        """
+        term_ids = sorted(postings_dict)
+        positional = len(next(iter(postings_dict.values()), ())) > 4
+        flags = ((TermDictionary.HAS_CFS if cfs is not None else 0) |
+                 (TermDictionary.HAS_BOUNDS if bounds is not None else 0) |
+                 (TermDictionary.HAS_BLOCK_BOUNDS if block_bounds_offsets is not None else 0))
+        with open(path, 'wb') as f:
+            f.write(TermDictionary.HEADER.pack(TermDictionary.MAGIC, len(term_ids), positional, flags))
+            array.array('Q', (postings_dict[term_id][0] for term_id in term_ids)).tofile(f)
+            array.array('I', term_ids).tofile(f)
+            for column in range(1, 5 if positional else 4):
+                array.array('I', (postings_dict[term_id][column] for term_id in term_ids)).tofile(f)
+            if cfs is not None:
+                array.array('Q', (cfs[term_id] for term_id in term_ids)).tofile(f)
+            if bounds is not None:
+                array.array('d', (bounds[term_id][1] for term_id in term_ids)).tofile(f)
+                array.array('I', (bounds[term_id][0] for term_id in term_ids)).tofile(f)
+            if block_bounds_offsets is not None:
+                array.array('Q', (block_bounds_offsets.get(term_id, 0) for term_id in term_ids)).tofile(f)
+
+    def find(self, term):
+        """Posisi term di kolom-kolom, atau -1 jika term tidak ada."""
+        if self.dense:
+            return term if 0 <= term < self.count else -1
+        i = bisect.bisect_left(self.term_ids, term)
+        return i if i < self.count and self.term_ids[i] == term else -1
+
+    def entry(self, i):
+        return (self.offsets[i],) + tuple(column[i] for column in self.columns[1:])
+
+    def __contains__(self, term):
+        return self.find(term) >= 0
+
+    def __getitem__(self, term):
+        i = self.find(term)
+        if i < 0:
+            raise KeyError(term)
+        return self.entry(i)
+
+    def get(self, term, default = None):
+        i = self.find(term)
+        return self.entry(i) if i >= 0 else default
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.term_ids)
+
+    def keys(self):
+        return iter(self.term_ids)
+
+    def values(self):
+        return (self.entry(i) for i in range(self.count))
+
+    def items(self):
+        return ((self.term_ids[i], self.entry(i)) for i in range(self.count))
+
+
 class InvertedIndex:
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
@@ -26,6 +203,11 @@ class InvertedIndex:
         Inverted Index. postings_dict ini diasumsikan dapat dimuat semuanya
         di memori.
 
+        Saat index ditulis (InvertedIndexWriter), postings_dict disimpan di file
+        .terms (lihat TermDictionary), dan saat index dibaca, postings_dict adalah
+        TermDictionary yang di-memory-map dari file tersebut. Index lama yang
+        postings_dict-nya di-pickle di file .dict tetap bisa dibaca.
+
         Seperti namanya, "Dictionary" diimplementasikan sebagai python's Dictionary
         yang memetakan term ID (integer) ke 4-tuple:
            1. start_position_in_index_file : (dalam satuan bytes) posisi dimana
@@ -38,10 +220,25 @@ class InvertedIndex:
            4. length_in_bytes_of_tf_list : panjang list of term frequencies dari
               postings list terkait dalam satuan byte
 
+        Pada positional index, tuple mempunyai elemen ke-5:
+           5. length_in_bytes_of_positions : panjang stream posisi term di
+              setiap dokumen (lihat VBEPositions), yang disimpan tepat setelah
+              list of term frequencies
+
     terms: List[int]
         List of terms IDs, untuk mengingat urutan terms yang dimasukan ke
         dalam Inverted Index.
 
+    deleted: bytearray
+        Bitset docIDs yang sudah dihapus (tombstones), disimpan di file .del di
+        samping file .dict. Bit ke-(docID % 8) dari byte ke-(docID // 8) bernilai 1
+        jika dokumen tersebut sudah dihapus dari index ini. Bitset hanya
+        bertambah panjang ketika ada dokumen yang dihapus, sehingga bitset
+        kosong berarti tidak ada dokumen yang dihapus.
+
+    positional: bool
+        Apakah index menyimpan posisi term di setiap dokumen (positional index).
+
     """
     def __init__(self, index_name, postings_encoding, directory=''):
         """
@@ -55,6 +252,8 @@ class InvertedIndex:
 
         self.index_file_path = os.path.join(directory, index_name+'.index')
         self.metadata_file_path = os.path.join(directory, index_name+'.dict')
+        self.terms_file_path = os.path.join(directory, index_name+'.terms')
+        self.deleted_file_path = os.path.join(directory, index_name+'.del')
 
         self.postings_encoding = postings_encoding
         self.directory = directory
@@ -64,6 +263,8 @@ class InvertedIndex:
         self.doc_length = {}    # key: doc ID (int), value: document length (number of tokens)
                                 # Ini nantinya akan berguna untuk normalisasi Score terhadap panjang
                                 # dokumen saat menghitung score dengan TF-IDF atau BM25
+        self.deleted = bytearray()
+        self.positional = False
 
     def __enter__(self):
         """
@@ -78,7 +279,12 @@ class InvertedIndex:
                 scoring regime; berguna untuk untuk mengetahui nilai N saat hitung IDF,
                 dimana N adalah banyaknya dokumen di koleksi
 
-        Metadata disimpan ke file dengan bantuan library "pickle"
+        Metadata disimpan ke file dengan bantuan library "pickle", kecuali
+        postings_dict dan urutan term yang dibaca dari file .terms (TermDictionary)
+
+        Semua file dibuka read-only ('rb') dan tidak ada yang ditulis saat keluar
+        context, sehingga banyak reader (misal beberapa web worker yang melayani
+        query) bisa membuka index yang sama secara bersamaan.
 
         Perlu memahani juga special method __enter__(..) pada Python dan juga
         konsep Context Manager di Python. Silakan pelajari link berikut:
@@ -86,30 +292,229 @@ class InvertedIndex:
         https://docs.python.org/3/reference/datamodel.html#object.__enter__
         """
         # Membuka index file
-        self.index_file = open(self.index_file_path, 'rb+')
+        self.index_file = open(self.index_file_path, 'rb')
 
         # Kita muat postings dict dan terms iterator dari file metadata
         with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms, self.doc_length = pickle.load(f)
-            self.term_iter = self.terms.__iter__()
+            metadata = pickle.load(f)
+        if isinstance(metadata, list):
+            # format lama: [postings_dict, terms, doc_length]
+            self.postings_dict, self.terms, self.doc_length = metadata
+            self.positional = len(next(iter(self.postings_dict.values()), ())) > 4
+        else:
+            self.doc_length = metadata["doc_length"]
+            self.postings_dict = TermDictionary.open(self.terms_file_path)
+            self.terms = self.postings_dict.term_ids
+            self.positional = bool(self.postings_dict.positional)
+        self.term_iter = self.terms.__iter__()
+        self.deleted = self.read_deleted()
 
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
-        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
+        """Menutup index_file (dan TermDictionary) ketika keluar context"""
         # Menutup index file
         self.index_file.close()
+        if isinstance(self.postings_dict, TermDictionary):
+            self.term_iter = None
+            self.terms = []
+            self.postings_dict.close()
+            self.postings_dict = {}
+
+
+    def read_deleted(self):
+        """Membaca bitset tombstones dari file .del (kosong jika tidak ada)."""
+        try:
+            with open(self.deleted_file_path, 'rb') as f:
+                return bytearray(f.read())
+        except FileNotFoundError:
+            return bytearray()
+
+    def is_deleted(self, doc_id):
+        """Apakah dokumen doc_id sudah dihapus dari index ini."""
+        byte = doc_id >> 3
+        return byte < len(self.deleted) and bool(self.deleted[byte] & (1 << (doc_id & 7)))
+
+    def delete(self, doc_ids):
+        """
+        Menandai dokumen-dokumen doc_ids sebagai terhapus dan menyimpan bitset
+        ke file .del secara atomik (tulis ke file sementara lalu os.replace).
+        Postings dokumen tersebut tetap ada di file index, tetapi dilewati
+        saat dibaca, dan baru benar-benar dibuang saat index di-merge.
+        """
+        for doc_id in doc_ids:
+            byte = doc_id >> 3
+            if byte >= len(self.deleted):
+                self.deleted.extend(bytes(byte + 1 - len(self.deleted)))
+            self.deleted[byte] |= 1 << (doc_id & 7)
+        tmp_path = self.deleted_file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.deleted)
+        os.replace(tmp_path, self.deleted_file_path)
+
+    def filter_deleted(self, postings_list, *other_lists):
+        """
+        Membuang postings (dan TF serta posisi terkait, other_lists) dari dokumen
+        yang sudah dihapus. Jika tidak ada dokumen yang dihapus, list dikembalikan
+        apa adanya. Hasil decoding berupa np.ndarray (misal NumpyVBEPostings)
+        difilter dengan mask bitset, sehingga hasilnya tetap np.ndarray.
+        """
+        if not self.deleted:
+            return (postings_list,) + other_lists
+        if all(isinstance(values, np.ndarray) for values in (postings_list,) + other_lists):
+            bits = np.unpackbits(np.frombuffer(bytes(self.deleted), dtype = np.uint8), bitorder = 'little')
+            deleted = np.zeros(len(postings_list), dtype = bool)
+            inside = postings_list < bits.size
+            deleted[inside] = bits[postings_list[inside]]
+            return tuple(values[~deleted] for values in (postings_list,) + other_lists)
+        keep = [j for j in range(len(postings_list)) if not self.is_deleted(postings_list[j])]
+        return tuple([values[j] for j in keep] for values in (postings_list,) + other_lists)
+
+
+class PostingsCache:
+    """
+    LRU cache untuk postings list dan TF list yang sudah di-decode, dipakai
+    bersama oleh banyak InvertedIndexReader (misal satu cache untuk semua query
+    di sebuah web worker), sehingga postings dari term-term yang sering muncul
+    di query (misal "cancer", "cell", "patients") tidak di-decode ulang.
+
+    Ukuran cache dibatasi oleh memory budget dalam bytes (perkiraan ukuran
+    object hasil decoding, lihat cost); entry yang paling lama tidak dipakai
+    dibuang sampai total ukuran cache tidak melebihi budget.
+
+    Key cache memuat version stamp index (lihat InvertedIndexReader.version),
+    yang berubah setiap kali index dengan nama yang sama ditulis ulang,
+    sehingga entry dari versi index yang lama tidak pernah dipakai lagi dan
+    akhirnya terbuang oleh LRU. Yang di-cache adalah postings sebelum dokumen
+    yang dihapus dibuang, sehingga tombstones tidak mengubah isi cache.
+    List-list di cache dipakai bersama oleh semua pemanggil get_postings_list,
+    sehingga tidak boleh diubah (in-place).
 
-        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
-        with open(self.metadata_file_path, 'wb') as f:
-            pickle.dump([self.postings_dict, self.terms, self.doc_length], f)
+    Attributes
+    ----------
+    max_bytes(int): Memory budget cache dalam bytes
+    hits, misses, evictions(int): Statistik pemakaian cache
+    """
+    def __init__(self, max_bytes = 64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()    # key -> (value, cost)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def cost(lists):
+        """
+        Perkiraan ukuran (bytes) di memori dari lists (list of int Python atau
+        np.ndarray): ukuran list-nya sendiri ditambah object int di dalamnya.
+        """
+        return sum(sys.getsizeof(values) + (28 * len(values) if isinstance(values, list) else 0)
+                   for values in lists)
+
+    def get(self, key):
+        """Value untuk key (dan menandainya sebagai baru dipakai), atau None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Menyimpan value (tuple of lists), lalu membuang entry LRU jika melebihi budget."""
+        cost = self.cost(value)
+        if cost > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (value, cost)
+            self.bytes += cost
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_cost) = self.entries.popitem(last = False)
+                self.bytes -= evicted_cost
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Statistik cache: hits, misses, hit_rate, evictions, entries, dan bytes."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "entries": len(self.entries), "bytes": self.bytes}
 
 
 class InvertedIndexReader(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Jika use_mmap = True, file index di-memory-map secara read-only dan bytes
+    postings diberikan ke postings_encoding sebagai slice memoryview (tanpa
+    seek, read, maupun copy). Page cache sistem operasi untuk file tersebut
+    dipakai bersama oleh semua process yang membaca index yang sama. Semua
+    postings encoding di compression.py menerima memoryview.
+
+    Jika cache (PostingsCache) diberikan, hasil decoding get_postings_list
+    disimpan di cache tersebut dan dipakai ulang oleh reader-reader lain yang
+    memakai cache yang sama untuk versi index yang sama (lihat version).
     """
+    def __init__(self, index_name, postings_encoding, directory='', use_mmap = False, cache = None):
+        super().__init__(index_name, postings_encoding, directory = directory)
+        self.use_mmap = use_mmap
+        self.index_map = None
+        self.index_view = None
+        self.cache = cache
+        self.version = None
+
+    def __enter__(self):
+        super().__enter__()
+        # version stamp: writer mengganti file index dengan os.replace (lihat
+        # InvertedIndexWriter.commit), sehingga index yang ditulis ulang
+        # mempunyai inode (dan mtime) yang berbeda
+        stat = os.fstat(self.index_file.fileno())
+        self.version = (os.path.abspath(self.index_file_path), stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self.use_mmap:
+            if os.fstat(self.index_file.fileno()).st_size > 0:
+                self.index_map = mmap.mmap(self.index_file.fileno(), 0, access = mmap.ACCESS_READ)
+                self.index_view = memoryview(self.index_map)
+            else:
+                # file kosong tidak bisa di-memory-map
+                self.index_view = memoryview(b"")
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if self.index_view is not None:
+            self.index_view.release()
+            self.index_view = None
+        if self.index_map is not None:
+            # jika masih ada slice yang dipakai (misal oleh sebuah cursor),
+            # mmap ditutup oleh garbage collector setelah slice tersebut dilepas
+            with contextlib.suppress(BufferError):
+                self.index_map.close()
+            self.index_map = None
+        super().__exit__(exception_type, exception_value, traceback)
+
+    def read(self, start, length):
+        """
+        Membaca length bytes mulai dari posisi start di file index: berupa
+        bytes, atau slice memoryview (tanpa copy) pada mode mmap.
+        """
+        if self.index_view is not None:
+            return self.index_view[start:start + length]
+        self.index_file.seek(start)
+        return self.index_file.read(length)
+
     def __iter__(self):
         self._initialization_hook()
         return self
@@ -135,16 +540,28 @@ class InvertedIndexReader(InvertedIndex):
         Ketika instance dari kelas InvertedIndexReader ini digunakan
         sebagai iterator pada sebuah loop scheme, special method __next__(...)
         bertugas untuk mengembalikan pasangan (term, postings_list, tf_list) berikutnya
-        pada inverted index.
+        pada inverted index. Pada positional index, yang dikembalikan adalah
+        (term, postings_list, tf_list, positions) dimana positions berisi list
+        posisi term untuk setiap dokumen di postings_list. Postings dari dokumen
+        yang sudah dihapus tidak ikut dikembalikan, sehingga merging membuang
+        postings tersebut.
 
         PERHATIAN! method ini harus mengembalikan sebagian kecil data dari
         file index yang besar. Mengapa hanya sebagian kecil? karena agar muat
         diproses di memori. JANGAN MEMUAT SEMUA INDEX DI MEMORI!
         """
         curr_term = next(self.term_iter)
-        pos, number_of_postings, len_in_bytes_of_postings, len_in_bytes_of_tf = self.postings_dict[curr_term]
-        postings_list = self.postings_encoding.decode(self.index_file.read(len_in_bytes_of_postings))
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(len_in_bytes_of_tf))
+        entry = self.postings_dict[curr_term]
+        pos, number_of_postings, len_in_bytes_of_postings, len_in_bytes_of_tf = entry[:4]
+        # posisi dibaca eksplisit: __iter__ bisa terpanggil lagi di tengah iterasi
+        # (misal oleh heapq.merge) dan mengembalikan file pointer ke awal
+        postings_list = self.postings_encoding.decode(self.read(pos, len_in_bytes_of_postings))
+        pos += len_in_bytes_of_postings
+        tf_list = self.postings_encoding.decode_tf(self.read(pos, len_in_bytes_of_tf))
+        if self.positional:
+            positions = VBEPositions.decode(self.read(pos + len_in_bytes_of_tf, entry[4]))
+            return (curr_term,) + self.filter_deleted(postings_list, tf_list, positions)
+        postings_list, tf_list = self.filter_deleted(postings_list, tf_list)
         return (curr_term, postings_list, tf_list)
 
     def get_postings_list(self, term):
@@ -157,31 +574,233 @@ class InvertedIndexReader(InvertedIndex):
         dari awal hingga akhir. Method ini harus langsung loncat ke posisi
         byte tertentu pada file (index file) dimana postings list (dan juga
         list of TF) dari term disimpan.
+
+        Postings dari dokumen yang sudah dihapus (lihat delete) dilewati.
         """
         # TODO
-        if term >= len(self.postings_dict):
-            return []
-        start, times, leng, leng_tf = self.postings_dict[term]
-        self.index_file.seek(start, 0)
-        posting_list = self.postings_encoding.decode(self.index_file.read(leng))
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(leng_tf))
-        return (posting_list, tf_list)
+        if term not in self.postings_dict:
+            return ([], [])
+        return self.filter_deleted(*self.decode_postings(term))
+
+    def decode_postings(self, term):
+        """
+        Decode postings list dan TF list term (termasuk dokumen yang sudah
+        dihapus), lewat cache jika ada.
+        """
+        if self.cache is not None:
+            key = (self.version, self.postings_encoding, term)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        start, times, leng, leng_tf = self.postings_dict[term][:4]
+        posting_list = self.postings_encoding.decode(self.read(start, leng))
+        tf_list = self.postings_encoding.decode_tf(self.read(start + leng, leng_tf))
+        if self.cache is not None:
+            self.cache.put(key, (posting_list, tf_list))
+        return posting_list, tf_list
+
+    def term_bound(self, term):
+        """
+        (TF maksimum, min dl / TF) dari postings term di index ini (lihat
+        InvertedIndexWriter.term_bounds), atau None jika term tidak ada atau
+        index tidak menyimpannya (index lama).
+        """
+        term_dictionary = self.postings_dict
+        if not isinstance(term_dictionary, TermDictionary) or term_dictionary.max_tfs is None:
+            return None
+        i = term_dictionary.find(term)
+        if i < 0:
+            return None
+        return term_dictionary.max_tfs[i], term_dictionary.min_dl_tfs[i]
+
+    def block_bounds(self, term):
+        """
+        (min dl / TF, TF maksimum) setiap block postings term di index ini (lihat
+        InvertedIndexWriter.add_bounds), atau None jika postings term tersebut
+        hanya satu block (bound-nya sama dengan term_bound) atau index tidak
+        menyimpannya.
+
+        Returns
+        -------
+        Tuple[Sequence[float], Sequence[int]]
+        """
+        term_dictionary = self.postings_dict
+        if not isinstance(term_dictionary, TermDictionary) or term_dictionary.block_bounds_offsets is None:
+            return None
+        i = term_dictionary.find(term)
+        if i < 0 or term_dictionary.block_bounds_offsets[i] == 0:
+            return None
+        num_blocks = -(-term_dictionary.columns[1][i] // POSTINGS_BLOCK_SIZE)
+        encoded = self.read(term_dictionary.block_bounds_offsets[i], 12 * num_blocks)
+        return (array.array('d', encoded[:8 * num_blocks]), array.array('I', encoded[8 * num_blocks:]))
+
+    def get_postings_cursor(self, term):
+        """
+        Mengembalikan cursor (lihat PostingsCursor) untuk postings list sebuah
+        term, yang melewati dokumen-dokumen yang sudah dihapus. Jika
+        postings_encoding mempunyai method cursor (misal BlockPostings), cursor
+        tersebut hanya men-decode block yang dibutuhkan; jika tidak, postings
+        dan TF list di-decode seluruhnya.
+        """
+        is_deleted = self.is_deleted if self.deleted else None
+        if term not in self.postings_dict:
+            return PostingsCursor([], [])
+        if hasattr(self.postings_encoding, 'cursor'):
+            start, _, leng, leng_tf = self.postings_dict[term][:4]
+            return self.postings_encoding.cursor(self.read(start, leng), self.read(start + leng, leng_tf), is_deleted)
+        # cursor bergerak satu posting per langkah di Python, sehingga hasil
+        # decoding codec NumPy (np.ndarray) diubah menjadi list
+        return PostingsCursor(*(values.tolist() if isinstance(values, np.ndarray) else values
+                                for values in self.decode_postings(term)), is_deleted)
+
+    def get_positions(self, term, doc_ids):
+        """
+        Mengembalikan posisi term di dokumen-dokumen doc_ids saja (positional
+        index). Header stream posisi memuat panjang posisi setiap dokumen,
+        sehingga hanya posisi dari dokumen yang diminta yang di-decode; misal
+        untuk phrase query, hanya dokumen yang mengandung semua term.
+
+        Parameters
+        ----------
+        term:
+            termID
+        doc_ids: Iterable[int]
+            docIDs yang posisinya dibutuhkan
+
+        Returns
+        -------
+        Dict[int, List[int]]
+            docID -> list posisi term di dokumen tersebut, untuk setiap docID
+            di doc_ids yang mengandung term
+        """
+        if term not in self.postings_dict:
+            return {}
+        start, _, leng, leng_tf, leng_positions = self.postings_dict[term]
+        posting_list = self.postings_encoding.decode(self.read(start, leng))
+        encoded_positions = self.read(start + leng + leng_tf, leng_positions)
+        offsets = VBEPositions.decode_offsets(encoded_positions)
+
+        positions = {}
+        for doc_id in doc_ids:
+            j = bisect.bisect_left(posting_list, doc_id)
+            if j < len(posting_list) and posting_list[j] == doc_id and not self.is_deleted(doc_id):
+                positions[doc_id] = VBEPositions.decode_doc(encoded_positions, offsets, j)
+        return positions
 
 
 class InvertedIndexWriter(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya menulis secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Semua file ditulis ke file sementara (<path>.tmp) dan baru menggantikan
+    file index dengan nama yang sama saat commit, dengan os.replace (atomik),
+    sehingga reader tidak pernah melihat file yang setengah ditulis. Reader
+    yang sudah membuka index lama tetap membaca file lama sampai ditutup.
     """
     def __enter__(self):
-        self.index_file = open(self.index_file_path, 'wb+')
+        self.index_file = open(self.index_file_path + '.tmp', 'wb+')
+        self.cfs = {}           # key: termID, value: collection frequency (total TF)
+        self.final_doc_length = None
+        self.bounds = {}        # key: termID, value: (TF maksimum, min dl / TF), lihat term_bounds
+        self.block_bounds = {}  # key: termID, value: bound setiap block (bytes), lihat term_bounds
+        self.committed = False
         return self
 
-    def append(self, term, postings_list, tf_list):
+    def __exit__(self, exception_type, exception_value, traceback):
+        """
+        Commit index ketika keluar context secara normal (jika belum di-commit
+        secara eksplisit), atau membuang file-file sementara jika terjadi exception.
+        """
+        if self.committed:
+            return
+        if exception_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def commit(self):
+        """
+        Menutup index_file, menyimpan metadata (postings_dict dan cfs ke file .terms
+        dengan TermDictionary dan doc_length ke file .dict dengan pickle), lalu
+        mengganti file-file index dengan file-file sementara. Setiap file diganti
+        secara atomik, tetapi ketiganya tidak diganti sekaligus, sehingga nama
+        index yang sedang dibaca (segment yang live) tidak boleh ditulis ulang;
+        index baru ditulis dengan nama baru dan dipublikasikan lewat
+        SegmentManager. Tombstones (.del) sisa index lama dengan nama yang sama
+        tidak berlaku untuk index baru, sehingga dihapus setelah penggantian.
+        """
+        if self.final_doc_length is None:
+            self.term_bounds()
+        # bound per block ditulis setelah semua postings
+        self.index_file.seek(0, os.SEEK_END)
+        block_bounds_offsets = {}
+        for term in sorted(self.block_bounds):
+            block_bounds_offsets[term] = self.index_file.tell()
+            self.index_file.write(self.block_bounds[term])
+        self.index_file.close()
+        TermDictionary.write(self.terms_file_path + '.tmp', self.postings_dict, self.cfs, self.bounds,
+                             block_bounds_offsets)
+        with open(self.metadata_file_path + '.tmp', 'wb') as f:
+            pickle.dump({"doc_length": self.doc_length}, f)
+        for path in (self.index_file_path, self.terms_file_path, self.metadata_file_path):
+            os.replace(path + '.tmp', path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.deleted_file_path)
+        self.committed = True
+
+    def term_bounds(self):
+        """
+        Menghitung bound semua term (lihat add_bounds) dari postings dan TF
+        list yang dibaca ulang dari index_file, karena panjang dokumen baru
+        final setelah semua term di-append. Jika panjang akhir setiap dokumen
+        sudah diberikan sebelum append (final_doc_length, misal saat merging),
+        bound dihitung langsung di append dan method ini tidak diperlukan.
+        """
+        for term, entry in self.postings_dict.items():
+            start, _, leng, leng_tf = entry[:4]
+            self.index_file.seek(start)
+            postings_list = self.postings_encoding.decode(self.index_file.read(leng))
+            tf_list = self.postings_encoding.decode_tf(self.index_file.read(leng_tf))
+            self.add_bounds(term, postings_list, tf_list, self.doc_length)
+
+    def add_bounds(self, term, postings_list, tf_list, doc_length):
+        """
+        Menyimpan (TF maksimum, min dl / TF) dari postings sebuah term di
+        self.bounds, yang menentukan batas atas score BM25 term tersebut untuk
+        avdl berapapun (lihat BSBIIndex.bm_25_wand). Untuk postings yang lebih
+        dari satu block (POSTINGS_BLOCK_SIZE postings, sama dengan block
+        BlockPostings), bound yang sama untuk setiap block disimpan di
+        self.block_bounds (lihat BSBIIndex.bm_25_bmw):
+
+            min dl / TF setiap block (d) | TF maksimum setiap block (I)
+        """
+        if len(tf_list) == 0:
+            self.bounds[term] = (0, 0.0)
+            return
+        ratios = [doc_length[doc_id] / tf for doc_id, tf in zip(postings_list, tf_list)]
+        self.bounds[term] = (max(tf_list), min(ratios))
+        if len(tf_list) > POSTINGS_BLOCK_SIZE:
+            starts = range(0, len(tf_list), POSTINGS_BLOCK_SIZE)
+            self.block_bounds[term] = (array.array('d', (min(ratios[start:start + POSTINGS_BLOCK_SIZE]) for start in starts)).tobytes() +
+                                       array.array('I', (max(tf_list[start:start + POSTINGS_BLOCK_SIZE]) for start in starts)).tobytes())
+
+    def abort(self):
+        """Menutup index_file dan membuang file-file sementara tanpa mengubah index."""
+        self.index_file.close()
+        for path in (self.index_file_path, self.terms_file_path, self.metadata_file_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path + '.tmp')
+
+    def append(self, term, postings_list, tf_list, positions = None):
         """
         Menambahkan (append) sebuah term, postings_list, dan juga TF list 
         yang terasosiasi ke posisi akhir index file.
 
+        Jika positions diberikan (positional index), posisi term di setiap
+        dokumen di-encode dengan VBEPositions dan ditulis setelah TF list,
+        dan panjangnya disimpan sebagai elemen ke-5 di postings_dict.
+
         Method ini melakukan 4 hal:
         1. Encode postings_list menggunakan self.postings_encoding (method encode),
         2. Encode tf_list menggunakan self.postings_encoding (method encode_tf),
@@ -212,14 +831,26 @@ class InvertedIndexWriter(InvertedIndex):
             List of docIDs dimana term muncul
         tf_list: List[Int]
             List of term frequencies
+        positions: List[List[Int]]
+            Opsional, list posisi term (terurut) untuk setiap docID di postings_list
         """
         # TODO
+        # hasil decoding codec NumPy (misal NumpyVBEPostings saat merging) bisa
+        # berupa np.ndarray atau list of np.int64; doc_length disimpan dengan
+        # int Python (lihat loop di bawah)
+        if isinstance(postings_list, np.ndarray):
+            postings_list = postings_list.tolist()
+        if isinstance(tf_list, np.ndarray):
+            tf_list = tf_list.tolist()
 
         self.terms.append(term)
+        self.cfs[term] = sum(tf_list)
+        if self.final_doc_length is not None:
+            self.add_bounds(term, postings_list, tf_list, self.final_doc_length)
         for i in range(len(postings_list)):
-            docId = postings_list[i]
+            docId = int(postings_list[i])
             try:
-                tf = tf_list[i]
+                tf = int(tf_list[i])
                 self.doc_length.setdefault(docId, 0)
                 self.doc_length[docId] += tf
             except IndexError:
@@ -237,6 +868,12 @@ class InvertedIndexWriter(InvertedIndex):
         self.index_file.write(byte_list)
         self.index_file.write(byte_list_tf)
 
+        if positions is not None:
+            byte_list_positions = VBEPositions.encode(positions)
+            self.postings_dict[term] += (len(byte_list_positions),)
+            self.index_file.write(byte_list_positions)
+            self.positional = True
+
 
 if __name__ == "__main__":
 
@@ -265,3 +902,56 @@ if __name__ == "__main__":
         index.index_file.seek(index.postings_dict[2][0])
         assert VBEPostings.decode(index.index_file.read(len(VBEPostings.encode([3,4,5])))) == [3,4,5], "terdapat kesalahan"
         assert VBEPostings.decode_tf(index.index_file.read(len(VBEPostings.encode_tf([34,23,56])))) == [34,23,56], "terdapat kesalahan"
+
+    with InvertedIndexWriter('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        index.append(1, [2, 3], [2, 1], [[0, 5], [3]])
+        index.append(2, [3, 4], [1, 2], [[4], [1, 2]])
+
+    with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        assert index.positional, "index seharusnya positional"
+        assert list(index) == [(1, [2, 3], [2, 1], [[0, 5], [3]]), (2, [3, 4], [1, 2], [[4], [1, 2]])], "terdapat kesalahan"
+        assert index.get_postings_list(2) == ([3, 4], [1, 2]), "terdapat kesalahan"
+        assert index.get_positions(2, [1, 4]) == {4: [1, 2]}, "terdapat kesalahan"
+        assert isinstance(index.postings_dict, TermDictionary), "postings_dict seharusnya dibaca dari file .terms"
+        assert 1 in index.postings_dict and 3 not in index.postings_dict, "terdapat kesalahan"
+        assert index.term_bound(1) == (2, 1.0) and index.term_bound(2) == (2, 1.0), "bound term salah"
+        assert index.postings_dict[2][1:] == (2, len(VBEPostings.encode([3, 4])), len(VBEPostings.encode_tf([1, 2])), \
+                                              len(VBEPositions.encode([[4], [1, 2]]))), "terdapat kesalahan"
+
+    with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/', use_mmap=True) as index:
+        assert isinstance(index.read(0, 1), memoryview), "mode mmap seharusnya mengembalikan memoryview"
+        assert list(index) == [(1, [2, 3], [2, 1], [[0, 5], [3]]), (2, [3, 4], [1, 2], [[4], [1, 2]])], "terdapat kesalahan"
+        assert index.get_postings_list(1) == ([2, 3], [2, 1]), "terdapat kesalahan"
+        assert index.get_positions(1, [3]) == {3: [3]}, "terdapat kesalahan"
+
+    cache = PostingsCache()
+    for _ in range(2):
+        with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/', cache=cache) as index:
+            assert index.get_postings_list(2) == ([3, 4], [1, 2]), "terdapat kesalahan"
+    assert (cache.hits, cache.misses) == (1, 1), "statistik cache salah"
+    with InvertedIndexWriter('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        index.append(1, [2, 3], [2, 1], [[0, 5], [3]])
+        index.append(2, [3, 4, 9], [1, 2, 1], [[4], [1, 2], [0]])
+    with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/', cache=cache) as index:
+        assert index.get_postings_list(2) == ([3, 4, 9], [1, 2, 1]), "cache seharusnya invalid setelah index ditulis ulang"
+    assert (cache.hits, cache.misses) == (1, 2), "statistik cache salah"
+
+    try:
+        with InvertedIndexWriter('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+            index.append(7, [1], [1], [[0]])
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+    assert not os.path.exists('./tmp/test_positional.index.tmp'), "file sementara seharusnya dibuang"
+    with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        assert list(index.postings_dict) == [1, 2], "index tidak boleh berubah jika writer gagal"
+
+    with InvertedIndexWriter('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        index.append(1, list(range(300)), [1 + doc_id % 7 for doc_id in range(300)])
+        index.append(2, [5], [3])
+    with InvertedIndexReader('test_positional', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        assert index.term_bound(1) == (7, 1.0) and index.term_bound(2) == (3, 3.0), "bound term salah"
+        min_dl_tfs, max_tfs = index.block_bounds(1)
+        assert list(min_dl_tfs) == [1.0, 1.0, 1.0] and list(max_tfs) == [7, 7, 7], "bound per block salah"
+        assert index.block_bounds(2) is None, "postings satu block tidak perlu bound per block"
+        assert index.get_postings_list(1) == (list(range(300)), [1 + doc_id % 7 for doc_id in range(300)]), "terdapat kesalahan"
@@ -1,12 +1,30 @@
 import re
 from .bsbi import BSBIIndex
 from .compression import VBEPostings
+from .searcher import Searcher
 from .letor import LetorClass
 import numpy as np
 import joblib
 import sys
 import os
 
+# Searcher untuk index di folder index, dibuat sekali per process (lihat get_searcher)
+_searcher = None
+
+
+def get_searcher():
+    """
+    Searcher yang dipakai bersama oleh semua request, sehingga index tidak
+    dimuat ulang untuk setiap query (hanya jika index di disk berubah).
+    """
+    global _searcher
+    if _searcher is None:
+        this_dir = os.path.dirname(__file__)
+        _searcher = Searcher(BSBIIndex(data_dir=os.path.join(this_dir, 'collection'),
+                                       postings_encoding=VBEPostings,
+                                       output_dir=os.path.join(this_dir,'index')))
+    return _searcher
+
 
 def eval_letor_content(k = 100, query = "the crystalline lens in vertebrates, including humans."):
 
@@ -17,15 +35,11 @@ def eval_letor_content(k = 100, query = "the crystalline lens in vertebrates, in
     letor.ranker = joblib.load(os.path.join(this_dir, "ranker.pkl"))
     letor.model = joblib.load(os.path.join(this_dir, "model.pkl"))
 
-    BSBI_instance = BSBIIndex(data_dir=os.path.join(this_dir, 'collection'),
-                              postings_encoding=VBEPostings,
-                              output_dir=os.path.join(this_dir,'index'))
-
     X_unseen = []
 
     docs = []
 
-    for (_, doc) in BSBI_instance.bm_25(query, k=k):
+    for (_, doc) in get_searcher().bm_25(query, k=k):
         text = open(os.path.join(this_dir, "collection/") + doc).read()
         text = text.lower()
         did = int(re.search(r'.*\/(.*)\.txt', doc).group(1))
@@ -0,0 +1,122 @@
+import re
+import math
+
+'''
+Strategi reordering docID (lihat BSBIIndex.reorder_documents). docID yang
+berdekatan untuk dokumen-dokumen yang mirip membuat gap di postings list
+lebih kecil, sehingga index lebih kecil (VBE dan codec berbasis gap lainnya)
+dan lebih cepat dibaca.
+
+Setiap strategi mengembalikan urutan baru dokumen, yaitu list of docID lama
+dimana elemen ke-i mendapatkan docID baru i.
+'''
+
+# Parameter recursive graph bisection
+BISECTION_ITERATIONS = 20
+BISECTION_MIN_PARTITION = 16
+
+
+def natural_key(name):
+    """Key untuk natural sort, misal "1/9.txt" < "1/10.txt" < "2/1.txt"."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def path_order(doc_ids, doc_names):
+    """
+    Urutan berdasarkan nama dokumen (path atau id di packed file), dengan
+    natural sort.
+
+    Parameters
+    ----------
+    doc_ids: List[int]
+        docID lama dokumen-dokumen yang di-reorder
+    doc_names: Callable[[int], str]
+        Nama dokumen untuk sebuah docID, misal doc_id_map.__getitem__
+    """
+    return sorted(doc_ids, key = lambda doc_id: natural_key(doc_names(doc_id)))
+
+
+def bisection_order(doc_terms, iterations = BISECTION_ITERATIONS, min_partition = BISECTION_MIN_PARTITION):
+    """
+    Recursive graph bisection (Dhulipala et al., KDD 2016): dokumen dibagi
+    dua, lalu pasangan dokumen ditukar antar partisi selama pertukaran tersebut
+    mengurangi perkiraan ukuran index (log-gap cost), yaitu untuk setiap term
+    dengan deg_A dan deg_B dokumen di partisi A dan B:
+
+        cost = deg_A * log2(n_A / (deg_A + 1)) + deg_B * log2(n_B / (deg_B + 1))
+
+    Hal yang sama dilakukan secara rekursif untuk setiap partisi sampai ukurannya
+    kurang dari min_partition.
+
+    Parameters
+    ----------
+    doc_terms: Dict[int, List[int]]
+        docID lama -> termIDs yang muncul di dokumen tersebut (forward index),
+        dengan urutan awal dokumen sesuai urutan key
+    iterations: int
+        Banyaknya iterasi pertukaran per bisection
+
+    Returns
+    -------
+    List[int]
+        Urutan baru (docID lama)
+    """
+    order = list(doc_terms)
+    stack = [(0, len(order))]
+    while stack:
+        start, end = stack.pop()
+        if end - start < min_partition:
+            continue
+        middle = (start + end) // 2
+        left, right = order[start:middle], order[middle:end]
+        for _ in range(iterations):
+            if not swap_partitions(left, right, doc_terms):
+                break
+        order[start:end] = left + right
+        stack.append((middle, end))
+        stack.append((start, middle))
+    return order
+
+
+def swap_partitions(left, right, doc_terms):
+    """
+    Satu iterasi graph bisection: menghitung gain setiap dokumen jika dipindah
+    ke partisi lain, lalu menukar pasangan dokumen (gain terbesar di left dengan
+    gain terbesar di right) selama total gain-nya positif.
+
+    Returns
+    -------
+    bool
+        Apakah ada dokumen yang ditukar
+    """
+    n_left, n_right = len(left), len(right)
+    degrees = {}
+    for side, docs in ((0, left), (1, right)):
+        for doc_id in docs:
+            for term_id in doc_terms[doc_id]:
+                degree = degrees.setdefault(term_id, [0, 0])
+                degree[side] += 1
+
+    def cost(deg_left, deg_right):
+        return deg_left * math.log2(n_left / (deg_left + 1)) + deg_right * math.log2(n_right / (deg_right + 1))
+
+    # gain pemindahan sebuah dokumen yang mengandung term ke partisi lain
+    move_left, move_right = {}, {}
+    for term_id, (deg_left, deg_right) in degrees.items():
+        before = cost(deg_left, deg_right)
+        if deg_left:
+            move_left[term_id] = before - cost(deg_left - 1, deg_right + 1)
+        if deg_right:
+            move_right[term_id] = before - cost(deg_left + 1, deg_right - 1)
+
+    gains_left = sorted(((sum(move_left[term_id] for term_id in doc_terms[doc_id]), i)
+                         for i, doc_id in enumerate(left)), reverse = True)
+    gains_right = sorted(((sum(move_right[term_id] for term_id in doc_terms[doc_id]), i)
+                          for i, doc_id in enumerate(right)), reverse = True)
+    swapped = False
+    for (gain_left, i), (gain_right, j) in zip(gains_left, gains_right):
+        if gain_left + gain_right <= 0:
+            break
+        left[i], right[j] = right[j], left[i]
+        swapped = True
+    return swapped
@@ -0,0 +1,185 @@
+import os
+import contextlib
+import threading
+
+from .util import IdMap
+
+'''
+Searcher yang berumur panjang untuk melayani banyak query dengan sebuah
+BSBIIndex, tanpa memuat ulang index untuk setiap query.
+'''
+
+# File-file di output directory yang berubah setiap kali isi index berubah
+# (lihat BSBIIndex.save, BSBIIndex.write_stats, dan SegmentManager)
+VERSION_FILES = ('segments.dict', 'terms.ids', 'docs.ids', 'terms.dict', 'docs.dict', 'collection.stats')
+
+
+def file_version(path):
+    """(inode, mtime, ukuran) file di path, atau None jika file tidak ada."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class Searcher:
+    """
+    Memuat id maps, statistik koleksi (BSBIIndex.load), dan InvertedIndexReader
+    setiap segment yang live sekali saja, lalu memakainya untuk semua query.
+    Sebelum setiap query hanya dicek versi index di disk (os.stat beberapa file,
+    lihat index_version); index dimuat ulang hanya jika versi tersebut berubah,
+    misal setelah index, add_block, delete_documents, merging segment, atau
+    reorder_documents. Semua file tersebut ditulis ulang dengan os.replace,
+    sehingga readers yang sedang terbuka tetap membaca versi lama yang
+    konsisten sampai dimuat ulang.
+
+    Selama Searcher terbuka, retrieval method BSBIIndex (retrieve_tfidf, bm_25,
+    retrieve_phrase, dsb.) memakai state Searcher ini (lihat
+    BSBIIndex.reading). Query-query di sebuah Searcher dijalankan bergantian
+    (dengan lock), sehingga sebuah Searcher aman dipakai bersama oleh beberapa
+    thread.
+
+    contoh:
+        with Searcher(BSBIIndex(data_dir, output_dir, VBEPostings)) as searcher:
+            searcher.bm_25("lung cancer")
+
+    Attributes
+    ----------
+    index(BSBIIndex): Index yang dilayani
+    readers(List[InvertedIndexReader]): Readers segment-segment yang live
+    version(tuple): Versi index di disk saat terakhir dimuat
+    reloads(int): Banyaknya index dimuat (ulang)
+    """
+    def __init__(self, index):
+        self.index = index
+        self.lock = threading.Lock()
+        self.stack = None
+        self.readers = None
+        self.version = None
+        self.reloads = 0
+        index.searcher = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def index_version(self):
+        """
+        Versi index di disk: versi file-file VERSION_FILES, serta file .index dan
+        .del (tombstones) setiap segment yang sedang dibuka.
+        """
+        return self.files_version() + self.segments_version()
+
+    def files_version(self):
+        """Versi file-file VERSION_FILES (manifest, id maps, dan statistik koleksi)."""
+        directory = self.index.output_dir
+        return tuple(file_version(os.path.join(directory, name)) for name in VERSION_FILES)
+
+    def segments_version(self):
+        """Versi file .index dan .del setiap segment yang sedang dibuka."""
+        version = []
+        for reader in self.readers or []:
+            version.append(file_version(reader.index_file_path))
+            version.append(file_version(reader.deleted_file_path))
+        return tuple(version)
+
+    def refresh(self):
+        """
+        Memuat ulang index jika versinya di disk berubah (atau belum pernah
+        dimuat).
+
+        Returns
+        -------
+        bool
+            True jika index dimuat ulang
+        """
+        if self.readers is not None and self.index_version() == self.version:
+            return False
+        # versi dicatat sebelum memuat, sehingga perubahan index selama memuat
+        # menyebabkan satu reload tambahan, bukan state lama yang tidak pernah
+        # dimuat ulang. Versi file segment diambil selama segments.lock dipegang,
+        # karena tombstones dan merging hanya ditulis selama lock tersebut dipegang.
+        version = self.files_version()
+        self.close_readers()
+        old_state = self.loaded_state()
+        self.index.load()
+        self.close_state(old_state)
+        self.stack = contextlib.ExitStack()
+        with self.index.segments.lock:
+            self.readers = self.index.open_segments(self.stack)
+            version += self.segments_version()
+        self.version = version
+        self.reloads += 1
+        return True
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Context manager untuk sebuah query: readers index versi terbaru."""
+        with self.lock:
+            self.refresh()
+            yield self.readers
+
+    def loaded_state(self):
+        """Id maps dan statistik koleksi yang sedang dimuat di index."""
+        return (self.index.term_id_map, self.index.doc_id_map, getattr(self.index, 'stats', None))
+
+    @staticmethod
+    def close_state(state):
+        """Menutup id maps (FrozenIdMap) dan statistik koleksi (mmap) di state."""
+        for old in state:
+            if old is not None and hasattr(old, 'close'):
+                old.close()
+
+    def close_readers(self):
+        if self.stack is not None:
+            self.stack.close()
+        self.stack = None
+        self.readers = None
+
+    def close(self):
+        """
+        Menutup semua readers, id maps, dan statistik koleksi yang dimuat oleh
+        refresh, lalu melepaskan BSBIIndex dari Searcher ini (id maps index
+        dikembalikan kosong, sehingga dimuat ulang saat dipakai lagi).
+        """
+        with self.lock:
+            self.close_readers()
+            if self.version is not None:
+                self.close_state(self.loaded_state())
+                self.index.term_id_map = IdMap()
+                self.index.doc_id_map = IdMap()
+                self.index.stats = None
+                self.version = None
+            if self.index.searcher is self:
+                self.index.searcher = None
+
+    def retrieve_tfidf(self, query, k = 10, vectorized = False):
+        """Lihat BSBIIndex.retrieve_tfidf."""
+        return self.index.retrieve_tfidf(query, k, vectorized)
+
+    def retrieve_tfidf_binary_unary(self, query, k = 10):
+        """Lihat BSBIIndex.retrieve_tfidf_binary_unary."""
+        return self.index.retrieve_tfidf_binary_unary(query, k)
+
+    def bm_25(self, query, k = 10, quantized_norms = False, vectorized = False):
+        """Lihat BSBIIndex.bm_25."""
+        return self.index.bm_25(query, k, quantized_norms, vectorized)
+
+    def bm_25_wand(self, query, k = 10, counters = None):
+        """Lihat BSBIIndex.bm_25_wand."""
+        return self.index.bm_25_wand(query, k, counters)
+
+    def bm_25_bmw(self, query, k = 10, counters = None):
+        """Lihat BSBIIndex.bm_25_bmw."""
+        return self.index.bm_25_bmw(query, k, counters)
+
+    def retrieve_phrase(self, query, k = 10):
+        """Lihat BSBIIndex.retrieve_phrase."""
+        return self.index.retrieve_phrase(query, k)
+
+    def retrieve_proximity(self, query, window, k = 10):
+        """Lihat BSBIIndex.retrieve_proximity."""
+        return self.index.retrieve_proximity(query, window, k)
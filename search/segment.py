@@ -0,0 +1,315 @@
+import os
+import math
+import pickle
+import contextlib
+import threading
+
+from .index import InvertedIndex, InvertedIndexReader, InvertedIndexWriter
+
+
+class TieredMergePolicy:
+    """
+    Kebijakan merging segment berdasarkan tier ukuran. Sebuah segment dengan
+    num_docs dokumen berada di tier floor(log_{segments_per_tier}(num_docs / floor_docs)),
+    sehingga segment-segment kecil hasil add_block berada di tier 0. Ketika
+    sebuah tier berisi minimal segments_per_tier segment, segment-segment di
+    tier tersebut di-merge menjadi satu segment di tier berikutnya.
+
+    Attributes
+    ----------
+    segments_per_tier(int): Banyaknya segment per tier sebelum di-merge
+    floor_docs(int): Segment yang lebih kecil dari ini dianggap berukuran floor_docs
+    """
+    def __init__(self, segments_per_tier = 4, floor_docs = 100):
+        self.segments_per_tier = segments_per_tier
+        self.floor_docs = floor_docs
+
+    def tier(self, num_docs):
+        """Mengembalikan tier dari sebuah segment dengan num_docs dokumen."""
+        return int(math.log(max(num_docs, self.floor_docs) / self.floor_docs, self.segments_per_tier))
+
+    def find_merge(self, segments):
+        """
+        Memilih segment-segment yang perlu di-merge, mulai dari tier terkecil.
+
+        Parameters
+        ----------
+        segments: List[Tuple[str, int]]
+            List of (nama segment, banyaknya dokumen) yang live
+
+        Returns
+        -------
+        List[str]
+            Nama-nama segment yang perlu di-merge, atau [] jika tidak ada
+        """
+        tiers = {}
+        for name, num_docs in segments:
+            tiers.setdefault(self.tier(num_docs), []).append(name)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.segments_per_tier:
+                return tiers[tier][:self.segments_per_tier]
+        return []
+
+
+class SegmentManager:
+    """
+    Mengelola index yang terdiri dari beberapa segment immutable, masing-masing
+    berupa pasangan file .index/.dict biasa (InvertedIndexWriter). Daftar segment
+    yang live disimpan di manifest segments.dict dan selalu ditulis ulang secara
+    atomik (tulis ke file sementara lalu os.replace), sehingga reader selalu
+    melihat daftar segment yang konsisten.
+
+    Jika manifest belum ada (index lama yang dibangun dengan BSBIIndex.index),
+    satu-satunya segment yang live adalah default_segment.
+
+    Attributes
+    ----------
+    directory(str): Directory tempat index dan manifest berada
+    postings_encoding: Lihat di compression.py
+    merge: Fungsi merge(indices, merged_index), lihat BSBIIndex.merge
+    merge_policy(TieredMergePolicy): Kebijakan pemilihan segment untuk di-merge
+    default_segment(str): Nama index ketika manifest belum ada
+    """
+    MANIFEST = 'segments.dict'
+
+    def __init__(self, directory, postings_encoding, merge, merge_policy = None, default_segment = "main_index"):
+        self.directory = directory
+        self.postings_encoding = postings_encoding
+        self.merge = merge
+        self.merge_policy = merge_policy if merge_policy is not None else TieredMergePolicy()
+        self.default_segment = default_segment
+        self.lock = threading.Lock()
+        self.merge_thread = None
+
+    def manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def read_manifest(self):
+        """
+        Mengembalikan manifest berupa dictionary dengan key "generation"
+        (counter untuk penamaan segment) dan "segments" (list of (nama, num_docs)).
+        """
+        try:
+            with open(self.manifest_path(), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            segments = []
+            if os.path.exists(os.path.join(self.directory, self.default_segment + '.dict')):
+                with InvertedIndexReader(self.default_segment, self.postings_encoding,
+                                         directory = self.directory) as index:
+                    segments.append((self.default_segment, len(index.doc_length)))
+            return {"generation": 0, "segments": segments}
+
+    def write_manifest(self, manifest):
+        """Menyimpan manifest secara atomik."""
+        tmp_path = self.manifest_path() + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path())
+
+    def live_segments(self):
+        """Mengembalikan nama-nama segment yang live."""
+        return [name for name, _ in self.read_manifest()["segments"]]
+
+    def new_segment_name(self):
+        """Mengalokasikan nama segment baru yang unik (segment_<generation>)."""
+        with self.lock:
+            manifest = self.read_manifest()
+            manifest["generation"] += 1
+            self.write_manifest(manifest)
+            return 'segment_' + str(manifest["generation"])
+
+    def reset(self, segments):
+        """
+        Mengganti seluruh segment yang live dengan segments (list of
+        (nama, num_docs)), misal setelah full rebuild dengan BSBIIndex.index.
+        File-file segment lama yang tidak lagi live dihapus.
+        """
+        self.wait()
+        with self.lock:
+            manifest = self.read_manifest()
+            old_names = [name for name, _ in manifest["segments"]]
+            manifest["segments"] = list(segments)
+            self.write_manifest(manifest)
+        self.delete_segments(set(old_names) - set(name for name, _ in segments))
+
+    def add_segment(self, name, num_docs, background = True):
+        """
+        Mendaftarkan segment yang sudah selesai ditulis sebagai segment live,
+        kemudian menjalankan merging (di background thread jika background = True)
+        jika merge_policy menemukan tier yang penuh.
+        """
+        with self.lock:
+            manifest = self.read_manifest()
+            manifest["segments"].append((name, num_docs))
+            self.write_manifest(manifest)
+        self.maybe_merge(background)
+
+    def maybe_merge(self, background = True):
+        """Menjalankan merge loop, kecuali jika sudah ada merge yang berjalan."""
+        if not background:
+            self.wait()
+            self.merge_loop()
+            return
+        with self.lock:
+            if self.merge_thread is not None and self.merge_thread.is_alive():
+                return
+            self.merge_thread = threading.Thread(target = self.merge_loop, name = "segment-merge")
+            self.merge_thread.start()
+
+    def wait(self):
+        """Menunggu background merge (jika ada) selesai."""
+        merge_thread = self.merge_thread
+        if merge_thread is not None:
+            merge_thread.join()
+
+    def merge_loop(self):
+        """Merge segment-segment sampai tidak ada tier yang penuh."""
+        while True:
+            with self.lock:
+                names = self.merge_policy.find_merge(self.read_manifest()["segments"])
+            if not names:
+                return
+            self.merge_segments(names)
+
+    def merge_segments(self, names):
+        """
+        Merge beberapa segment menjadi sebuah segment baru. Segment lama tetap
+        live (dan bisa dibaca query) selama merging; manifest baru di-commit
+        setelah segment baru selesai ditulis, dan barulah segment lama dihapus.
+
+        Postings dari dokumen yang sudah dihapus dibuang saat merging. Dokumen
+        yang dihapus dari segment lama selama merging berlangsung ditandai
+        sebagai terhapus di segment baru sebelum manifest di-commit.
+
+        Returns
+        -------
+        str
+            Nama segment hasil merging
+        """
+        merged_name = self.new_segment_name()
+        with InvertedIndexWriter(merged_name, self.postings_encoding, directory = self.directory) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(name, self.postings_encoding,
+                                                                   directory = self.directory))
+                           for name in names]
+                merged_deleted = [bytes(index.deleted) for index in indices]
+                self.merge(indices, merged_index)
+            num_docs = len(merged_index.doc_length)
+
+        with self.lock:
+            newly_deleted = []
+            for name, old_deleted in zip(names, merged_deleted):
+                deleted = InvertedIndex(name, self.postings_encoding, directory = self.directory).read_deleted()
+                for byte in range(len(deleted)):
+                    bits = deleted[byte] & ~(old_deleted[byte] if byte < len(old_deleted) else 0)
+                    newly_deleted.extend(byte * 8 + bit for bit in range(8) if bits & (1 << bit))
+            if newly_deleted:
+                InvertedIndex(merged_name, self.postings_encoding, directory = self.directory).delete(newly_deleted)
+
+            manifest = self.read_manifest()
+            segments = []
+            for name, segment_docs in manifest["segments"]:
+                if name == names[0]:
+                    segments.append((merged_name, num_docs))
+                elif name not in names:
+                    segments.append((name, segment_docs))
+            manifest["segments"] = segments
+            self.write_manifest(manifest)
+        self.delete_segments(names)
+        return merged_name
+
+    def delete_segments(self, names):
+        """Menghapus file .index, .dict, .terms, dan .del dari segment-segment yang tidak live."""
+        for name in names:
+            for ext in ('.index', '.dict', '.terms', '.del'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, name + ext))
+
+
+if __name__ == '__main__':
+    # dijalankan sebagai module dari root repository: python -m search.segment
+    import shutil
+    import tempfile
+    from .bsbi import BSBIIndex
+    from .compression import VBEPostings
+
+    policy = TieredMergePolicy(segments_per_tier = 4, floor_docs = 100)
+    assert [policy.tier(n) for n in (1, 100, 399, 400, 1599, 1600)] == [0, 0, 0, 1, 1, 2], "tier salah"
+    assert policy.find_merge([("s1", 10), ("s2", 20), ("s3", 500)]) == [], "find_merge salah"
+    assert policy.find_merge([("s1", 10), ("s2", 500), ("s3", 20), ("s4", 30), ("s5", 40), ("s6", 50)]) == \
+           ["s1", "s3", "s4", "s5"], "find_merge salah"
+    assert policy.find_merge([("s1", 500), ("s2", 10), ("s3", 600), ("s4", 700), ("s5", 800)]) == \
+           ["s1", "s3", "s4", "s5"], "find_merge salah"
+
+    def write_doc(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def names(results):
+        return sorted(doc for _, doc in results)
+
+    def df(index, term):
+        with index.reading() as readers:
+            return index.document_frequency(readers, index.term_id_map[term]) if term in index.term_id_map else 0
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        data_dir = os.path.join(temp_dir, 'collection')
+        output_dir = os.path.join(temp_dir, 'index')
+        os.mkdir(output_dir)
+        write_doc(os.path.join(data_dir, 'a', 'a1.txt'), "cat eats fish")
+        write_doc(os.path.join(data_dir, 'a', 'a2.txt'), "dog eats bone")
+        # merge policy yang tidak pernah merging sendiri, merging dipaksa di bawah
+        index = BSBIIndex(data_dir, output_dir, VBEPostings,
+                          merge_policy = TieredMergePolicy(segments_per_tier = 100))
+        index.index()
+        assert index.segments.live_segments() == ["main_index"], "index salah"
+
+        write_doc(os.path.join(data_dir, 'b', 'b1.txt'), "cat sleeps")
+        write_doc(os.path.join(data_dir, 'b', 'b2.txt'), "fish swims")
+        index.add_block('b', background_merge = False)
+        assert len(index.segments.live_segments()) == 2, "add_block salah"
+        assert names(index.bm_25("cat")) == ["a/a1.txt", "b/b1.txt"], "retrieval setelah add_block salah"
+        assert df(index, "cat") == 2 and df(index, "fish") == 2 and index.num_docs == 4, "df/N salah"
+
+        assert index.delete_documents(["a/a1.txt", "x/unknown.txt"]) == 1, "delete_documents salah"
+        assert index.delete_documents(["a/a1.txt"]) == 0, "delete_documents salah"
+        assert names(index.bm_25("cat")) == ["b/b1.txt"], "retrieval setelah delete salah"
+        assert df(index, "cat") == 1 and df(index, "fish") == 1 and index.num_docs == 3, "df/N setelah delete salah"
+
+        doc_id = index.doc_id_map["b/b1.txt"]
+        write_doc(os.path.join(data_dir, 'b', 'b1.txt'), "dog sleeps")
+        index.update_documents(["b/b1.txt"], background_merge = False)
+        index.load()
+        assert index.doc_id_map["b/b1.txt"] == doc_id, "update harus memakai docID yang sama"
+        assert index.bm_25("cat") == [], "retrieval setelah update salah"
+        assert names(index.bm_25("dog")) == ["a/a2.txt", "b/b1.txt"], "retrieval setelah update salah"
+        assert df(index, "dog") == 2 and df(index, "cat") == 0 and index.num_docs == 3, "df/N setelah update salah"
+        assert len(index.segments.live_segments()) == 3, "update_documents salah"
+
+        # dokumen yang dihapus selama merging berlangsung harus tetap terhapus
+        # di segment hasil merging (tombstones di-carry over)
+        def merge_and_delete(indices, merged_index):
+            index.merge(indices, merged_index)
+            index.delete_documents(["a/a2.txt"])
+        index.segments.merge = merge_and_delete
+        merged_name = index.segments.merge_segments(index.segments.live_segments())
+        index.segments.merge = index.merge
+        assert index.segments.live_segments() == [merged_name], "merge_segments salah"
+        assert not [file for file in os.listdir(output_dir)
+                    if file.startswith(("main_index", "segment_")) and not file.startswith(merged_name + '.')], \
+               "segment lama harus dihapus"
+        with InvertedIndexReader(merged_name, VBEPostings, directory = output_dir) as merged:
+            # postings dokumen yang sudah dihapus sebelum merging dibuang
+            assert sorted(merged.doc_length) == sorted(index.doc_id_map[doc] for doc in ("a/a2.txt", "b/b1.txt", "b/b2.txt")), \
+                   "postings dokumen yang dihapus harus dibuang"
+            assert index.term_id_map["cat"] not in merged.postings_dict, "postings dokumen yang dihapus harus dibuang"
+            assert merged.is_deleted(index.doc_id_map["a/a2.txt"]), "tombstone harus di-carry over"
+            assert len([doc_id for doc_id in merged.doc_length if not merged.is_deleted(doc_id)]) == 2, "doc_length salah"
+        assert names(index.bm_25("dog")) == ["b/b1.txt"], "retrieval setelah merging salah"
+        assert names(index.bm_25("fish")) == ["b/b2.txt"], "retrieval setelah merging salah"
+        assert df(index, "dog") == 1 and df(index, "eat") == 0 and index.num_docs == 2, "df/N setelah merging salah"
+    finally:
+        shutil.rmtree(temp_dir)
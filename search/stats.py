@@ -0,0 +1,209 @@
+import os
+import mmap
+import math
+import array
+import struct
+
+from .index import TermDictionary
+
+'''
+Statistik koleksi yang dihitung saat indexing dan disimpan di file, sehingga
+retrieval tidak perlu menghitung ulang N dan avdl dari doc_length setiap segment
+untuk setiap query.
+'''
+
+# Panjang dokumen < NORM_EXACT_LENGTHS disimpan apa adanya di norm 1 byte; panjang
+# yang lebih besar disimpan dalam skala logaritmik dengan rasio NORM_RATIO antar kode
+NORM_EXACT_LENGTHS = 64
+NORM_RATIO = 1.1
+
+# Panjang dokumen (hasil dequantize) untuk setiap kode norm 0..255
+NORM_LENGTHS = [code if code < NORM_EXACT_LENGTHS else NORM_EXACT_LENGTHS * NORM_RATIO ** (code - NORM_EXACT_LENGTHS)
+                for code in range(256)]
+
+
+def quantize_length(length):
+    """Kode norm 1 byte (0..255) untuk panjang dokumen length, lihat NORM_LENGTHS."""
+    if length < NORM_EXACT_LENGTHS:
+        return length
+    code = NORM_EXACT_LENGTHS + round(math.log(length / NORM_EXACT_LENGTHS, NORM_RATIO))
+    return min(code, 255)
+
+
+class CollectionStats:
+    """
+    Statistik koleksi untuk semua segment yang live (dokumen yang sudah dihapus
+    tidak dihitung), disimpan di satu file yang bisa di-memory-map:
+
+        header (magic, N, total tokens, banyaknya slot docID, banyaknya slot termID, avdl)
+        cfs (Q, per termID) | doc_lengths (I, per docID) | dfs (I, per termID) | norms (B, per docID)
+
+    doc_lengths adalah array panjang dokumen yang diindeks langsung dengan docID
+    (0 untuk docID yang tidak ada atau sudah dihapus), sehingga normalisasi
+    panjang dokumen saat scoring cukup berupa satu akses array. norms adalah
+    panjang dokumen yang di-quantize menjadi 1 byte (lihat quantize_length):
+    faktor normalisasi BM25 untuk 256 kode tersebut cukup dihitung sekali per
+    query (lihat bm25_norms), lalu setiap posting cukup mengambil
+    norms[docID] sebagai index ke tabel tersebut.
+
+    Attributes
+    ----------
+    num_docs(int): N, banyaknya dokumen (yang belum dihapus)
+    total_tokens(int): Total panjang semua dokumen
+    avdl(float): Rata-rata panjang dokumen
+    dfs, cfs: Document frequency dan collection frequency (total TF) setiap termID
+    """
+    MAGIC = b'CSTA'
+    HEADER = struct.Struct('=4sQQQQd')
+
+    def __init__(self, buffer):
+        """
+        Parameters
+        ----------
+        buffer: bytes, mmap.mmap
+            Isi file statistik (lihat write)
+        """
+        self.view = memoryview(buffer)
+        magic, self.num_docs, self.total_tokens, doc_slots, term_slots, self.avdl = self.HEADER.unpack_from(self.view)
+        if magic != self.MAGIC:
+            raise ValueError("bukan file statistik koleksi")
+        start = self.HEADER.size
+        self.cfs = self.view[start:start + 8 * term_slots].cast('Q')
+        start += 8 * term_slots
+        self.doc_lengths = self.view[start:start + 4 * doc_slots].cast('I')
+        start += 4 * doc_slots
+        self.dfs = self.view[start:start + 4 * term_slots].cast('I')
+        start += 4 * term_slots
+        self.norms = self.view[start:start + doc_slots]
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map file statistik dan mengembalikan CollectionStats-nya."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        stats = cls(buffer)
+        stats.buffer = buffer
+        return stats
+
+    def close(self):
+        """Melepas memoryview dan menutup mmap (jika ada)."""
+        for view in (self.cfs, self.doc_lengths, self.dfs, self.norms, self.view):
+            view.release()
+        buffer = getattr(self, 'buffer', None)
+        if buffer is not None:
+            buffer.close()
+
+    def bm25_norms(self, k, b):
+        """
+        Faktor normalisasi BM25, k * ((1 - b) + b * dl / avdl), untuk setiap
+        kode norm 0..255 (lihat norms).
+        """
+        return [k * ((1 - b) + b * length / self.avdl) for length in NORM_LENGTHS]
+
+    @staticmethod
+    def compute(readers):
+        """
+        Menghitung statistik dari segment-segment (InvertedIndexReader yang
+        sudah dibuka). df dan cf sebuah segment diambil dari TermDictionary-nya,
+        kecuali jika segment tersebut mempunyai dokumen yang dihapus (atau
+        file .terms-nya tidak menyimpan cf), yang postings-nya di-scan.
+
+        Returns
+        -------
+        Tuple[int, int, array.array, array.array, array.array]
+            (N, total tokens, doc_lengths, dfs, cfs)
+        """
+        num_docs = 0
+        total_tokens = 0
+        doc_lengths = array.array('I')
+        dfs = array.array('I')
+        cfs = array.array('Q')
+        for reader in readers:
+            for doc_id, length in reader.doc_length.items():
+                # dokumen yang dihapus tetap mendapat slot (berisi 0)
+                if doc_id >= len(doc_lengths):
+                    doc_lengths.extend([0] * (doc_id + 1 - len(doc_lengths)))
+                if reader.is_deleted(doc_id):
+                    continue
+                doc_lengths[doc_id] = length
+                num_docs += 1
+                total_tokens += length
+
+            term_dictionary = reader.postings_dict
+            if reader.deleted or not isinstance(term_dictionary, TermDictionary) or term_dictionary.cfs is None:
+                term_stats = ((entry[0], len(entry[1]), sum(entry[2])) for entry in reader)
+            else:
+                term_stats = zip(term_dictionary.term_ids, term_dictionary.columns[1], term_dictionary.cfs)
+            for term_id, df, cf in term_stats:
+                if term_id >= len(dfs):
+                    dfs.extend([0] * (term_id + 1 - len(dfs)))
+                    cfs.extend([0] * (term_id + 1 - len(cfs)))
+                dfs[term_id] += df
+                cfs[term_id] += cf
+        return num_docs, total_tokens, doc_lengths, dfs, cfs
+
+    @classmethod
+    def write(cls, path, readers):
+        """
+        Menghitung statistik dari readers (lihat compute) dan menyimpannya ke
+        path secara atomik (tulis ke file sementara lalu os.replace).
+        """
+        num_docs, total_tokens, doc_lengths, dfs, cfs = cls.compute(readers)
+        avdl = total_tokens / num_docs if num_docs else 0
+        norms = bytes(quantize_length(length) for length in doc_lengths)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, num_docs, total_tokens, len(doc_lengths), len(dfs), avdl))
+            cfs.tofile(f)
+            doc_lengths.tofile(f)
+            dfs.tofile(f)
+            f.write(norms)
+        os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    # dijalankan sebagai module dari root repository: python -m search.stats
+    import shutil
+    import tempfile
+    from .index import InvertedIndexReader, InvertedIndexWriter
+    from .compression import VBEPostings
+
+    for length in range(NORM_EXACT_LENGTHS):
+        assert NORM_LENGTHS[quantize_length(length)] == length, "panjang < NORM_EXACT_LENGTHS harus eksak"
+    for length in range(NORM_EXACT_LENGTHS, 200000):
+        error = abs(NORM_LENGTHS[quantize_length(length)] - length) / length
+        assert error <= 0.05, "error quantization dl = " + str(length) + " lebih dari 5%"
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        with InvertedIndexWriter('segment_1', VBEPostings, directory = temp_dir) as index:
+            index.append(0, [0, 1, 2], [1, 2, 3])
+            index.append(1, [1, 2], [4, 1])
+        with InvertedIndexWriter('segment_2', VBEPostings, directory = temp_dir) as index:
+            index.append(1, [3, 5], [2, 70])
+            index.append(2, [5], [10])
+        path = os.path.join(temp_dir, 'collection.stats')
+
+        with InvertedIndexReader('segment_1', VBEPostings, directory = temp_dir) as segment_1, \
+             InvertedIndexReader('segment_2', VBEPostings, directory = temp_dir) as segment_2:
+            CollectionStats.write(path, [segment_1, segment_2])
+            stats = CollectionStats.open(path)
+            assert (stats.num_docs, stats.total_tokens) == (5, 93) and stats.avdl == 93 / 5, "N/avdl salah"
+            assert list(stats.doc_lengths) == [1, 6, 4, 2, 0, 80], "doc_lengths salah"
+            assert list(stats.dfs) == [3, 4, 1] and list(stats.cfs) == [6, 77, 10], "df/cf salah"
+            assert list(stats.norms) == [1, 6, 4, 2, 0, quantize_length(80)], "norms salah"
+            assert stats.bm25_norms(1.2, 0.75)[stats.norms[5]] == 1.2 * (0.25 + 0.75 * NORM_LENGTHS[quantize_length(80)] / stats.avdl), \
+                   "bm25_norms salah"
+            stats.close()
+
+            # dokumen yang dihapus tidak dihitung di N, avdl, df, dan cf
+            segment_1.delete([1])
+            segment_2.delete([5])
+            CollectionStats.write(path, [segment_1, segment_2])
+            stats = CollectionStats.open(path)
+            assert (stats.num_docs, stats.total_tokens) == (3, 7) and stats.avdl == 7 / 3, "N/avdl setelah delete salah"
+            assert list(stats.doc_lengths) == [1, 0, 4, 2, 0, 0], "doc_lengths setelah delete salah"
+            assert list(stats.dfs) == [2, 2, 0] and list(stats.cfs) == [4, 3, 0], "df/cf setelah delete salah"
+            stats.close()
+        assert not os.path.exists(path + '.tmp'), "file statistik harus ditulis secara atomik"
+    finally:
+        shutil.rmtree(temp_dir)
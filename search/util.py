@@ -1,3 +1,13 @@
+import zlib
+import mmap
+import array
+import struct
+import heapq
+import bisect
+import numbers
+
+import numpy as np
+
 class IdMap:
     """
     Ingat kembali di kuliah, bahwa secara praktis, sebuah dokumen dan
@@ -58,16 +68,258 @@ class IdMap:
 
         https://stackoverflow.com/questions/43627405/understanding-getitem-method
 
-        Jika key adalah integer, gunakan __get_str;
-        jika key adalah string, gunakan __get_id
+        Jika key adalah integer (termasuk integer NumPy, misal hasil decoding
+        NumpyVBEPostings), gunakan __get_str; jika key adalah string, gunakan __get_id
         """
-        if type(key) is int:
+        if type(key) is int or isinstance(key, numbers.Integral):
             return self.__get_str(key)
         elif type(key) is str:
             return self.__get_id(key)
         else:
             raise TypeError
 
+    def __contains__(self, s):
+        """Apakah string s sudah mempunyai id di IdMap (tanpa meng-assign id baru)."""
+        return s in self.str_to_id
+
+
+class FrozenIdMap:
+    """
+    IdMap read-only yang compact untuk serving: semua string disimpan sebagai
+    satu blob UTF-8 dan diakses lewat array offsets, sehingga tidak ada satu
+    object str (dan entry dict) per term atau dokumen. File-nya bisa di-memory-map,
+    sehingga memuat IdMap tidak perlu unpickle apa pun.
+
+    Layout file (lihat write):
+
+        header (magic, n, m) | offsets (Q, n + 1) | table (I, m) | blob UTF-8
+
+    String dengan id i adalah blob[offsets[i]:offsets[i + 1]]. table adalah hash
+    table open addressing (linear probing) berukuran m (pangkat 2, minimal 2n)
+    berisi id + 1 (0 berarti slot kosong), dengan hash zlib.crc32 dari bytes
+    string-nya (tidak seperti hash(), nilainya sama di setiap process), sehingga
+    mapping string ke id rata-rata hanya membandingkan satu atau dua string.
+
+    Aksesnya sama dengan IdMap: id_map[int] -> str dan id_map[str] -> int,
+    bedanya string yang tidak ada tidak di-assign id baru, tetapi raise KeyError.
+    """
+    MAGIC = b'IDMP'
+    HEADER = struct.Struct('=4sQQ')
+
+    def __init__(self, buffer):
+        """
+        Parameters
+        ----------
+        buffer: bytes, mmap.mmap
+            Isi file hasil FrozenIdMap.write
+        """
+        self.view = memoryview(buffer)
+        magic, count, table_size = self.HEADER.unpack_from(self.view)
+        if magic != self.MAGIC:
+            raise ValueError("bukan file FrozenIdMap")
+        self.count = count
+        self.mask = table_size - 1
+        start = self.HEADER.size
+        self.offsets = self.view[start:start + 8 * (count + 1)].cast('Q')
+        start += 8 * (count + 1)
+        self.table = self.view[start:start + 4 * table_size].cast('I')
+        self.blob = self.view[start + 4 * table_size:]
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map file FrozenIdMap dan mengembalikan FrozenIdMap-nya."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        id_map = cls(buffer)
+        id_map.buffer = buffer
+        return id_map
+
+    @classmethod
+    def from_id_map(cls, id_map):
+        """FrozenIdMap (di memori) dengan isi yang sama dengan IdMap id_map."""
+        return cls(b''.join(cls.serialize(id_map.id_to_str)))
+
+    @classmethod
+    def write(cls, path, id_map):
+        """Menulis isi IdMap id_map sebagai file FrozenIdMap."""
+        with open(path, 'wb') as f:
+            f.writelines(cls.serialize(id_map.id_to_str))
+
+    @classmethod
+    def serialize(cls, id_to_str):
+        """Menghasilkan potongan-potongan bytes file FrozenIdMap untuk list of strings id_to_str."""
+        encoded = [s.encode('utf-8', 'surrogateescape') for s in id_to_str]
+        offsets = array.array('Q', [0])
+        for b in encoded:
+            offsets.append(offsets[-1] + len(b))
+        table_size = 1
+        while table_size < 2 * len(encoded):
+            table_size *= 2
+        mask = table_size - 1
+        table = array.array('I', bytes(4 * table_size))
+        for i, b in enumerate(encoded):
+            slot = zlib.crc32(b) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = i + 1
+        yield cls.HEADER.pack(cls.MAGIC, len(encoded), table_size)
+        yield offsets.tobytes()
+        yield table.tobytes()
+        yield from encoded
+
+    def close(self):
+        """Melepas memoryview dan menutup mmap (jika ada)."""
+        for view in (self.offsets, self.table, self.blob, self.view):
+            view.release()
+        buffer = getattr(self, 'buffer', None)
+        if buffer is not None:
+            buffer.close()
+
+    def __len__(self):
+        return self.count
+
+    def __get_bytes(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def __find(self, s):
+        """id dari string s (lookup di hash table), atau -1 jika s tidak ada."""
+        target = s.encode('utf-8', 'surrogateescape')
+        slot = zlib.crc32(target) & self.mask
+        while True:
+            i = self.table[slot] - 1
+            if i < 0:
+                return -1
+            if self.blob[self.offsets[i]:self.offsets[i + 1]] == target:
+                return i
+            slot = (slot + 1) & self.mask
+
+    def __getitem__(self, key):
+        """Sama seperti IdMap, tetapi string yang tidak ada menghasilkan KeyError."""
+        if type(key) is int or isinstance(key, numbers.Integral):
+            if not -self.count <= key < self.count:
+                raise IndexError(key)
+            return str(self.__get_bytes(key % self.count), 'utf-8', 'surrogateescape')
+        elif type(key) is str:
+            i = self.__find(key)
+            if i < 0:
+                raise KeyError(key)
+            return i
+        else:
+            raise TypeError
+
+    def __contains__(self, s):
+        return type(s) is str and self.__find(s) >= 0
+
+    @property
+    def id_to_str(self):
+        """Semua string, urut berdasarkan id (seperti IdMap.id_to_str)."""
+        return [self[i] for i in range(self.count)]
+
+class ScoreAccumulator:
+    """
+    Accumulator score untuk retrieval term-at-a-time: array float yang
+    dialokasikan sekali dan diindeks langsung dengan docID, sehingga setiap
+    posting cukup menambah scores[docID] tanpa dictionary atau lookup nama
+    dokumen. docID yang sudah mendapatkan score dicatat (sesuai urutan pertama
+    kali muncul) sebagai kandidat, dan top-k dipilih dari kandidat tersebut
+    dengan heapq.nlargest tanpa mengurutkan semua kandidat.
+
+    contoh:
+        accumulator = ScoreAccumulator(4)
+        accumulator.add([0, 2], [1.0, 3.0])
+        accumulator.add([2, 3], [0.5, 2.0])
+        accumulator.top_k(2) ---> [(3.5, 2), (2.0, 3)]
+
+    Attributes
+    ----------
+    scores(array.array): Score setiap docID
+    candidates(List[int]): docID yang sudah mendapatkan score
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size: int
+            Banyaknya docID (docID terbesar + 1), misal len(doc_id_map)
+        """
+        self.scores = array.array('d', bytes(8 * size))
+        self.seen = bytearray(size)
+        self.candidates = []
+
+    def add(self, postings_list, weights):
+        """Menambahkan weights (iterable, sesuai urutan postings_list) ke score setiap docID."""
+        scores, seen, candidates = self.scores, self.seen, self.candidates
+        for doc_id, weight in zip(postings_list, weights):
+            if not seen[doc_id]:
+                seen[doc_id] = 1
+                candidates.append(doc_id)
+            scores[doc_id] += weight
+
+    def top_k(self, k):
+        """
+        k kandidat dengan score terbesar, terurut mengecil; kandidat dengan score
+        yang sama tetap sesuai urutan pertama kali muncul.
+
+        Returns
+        -------
+        List[Tuple[float, int]]
+            (score, docID)
+        """
+        scores = self.scores
+        return [(scores[doc_id], doc_id) for doc_id in heapq.nlargest(k, self.candidates, key = scores.__getitem__)]
+
+class NumpyScoreAccumulator:
+    """
+    ScoreAccumulator untuk scoring vectorized: score dan penanda kandidat
+    disimpan sebagai np.ndarray yang diindeks dengan docID, weights sebuah
+    postings list ditambahkan sekaligus dengan scatter-add (np.add.at), dan
+    top-k dipilih dengan np.partition tanpa mengurutkan semua kandidat.
+    Kandidat dengan score yang sama dipilih dan diurutkan berdasarkan docID
+    (docID terkecil lebih dulu), sehingga hasilnya deterministik.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size: int
+            Banyaknya docID (docID terbesar + 1), misal len(doc_id_map)
+        """
+        self.scores = np.zeros(size, dtype = np.float64)
+        self.seen = np.zeros(size, dtype = bool)
+
+    def add(self, postings_list, weights):
+        """Menambahkan weights (np.ndarray, sesuai urutan postings_list) ke score setiap docID."""
+        postings = np.asarray(postings_list, dtype = np.intp)
+        np.add.at(self.scores, postings, weights)
+        self.seen[postings] = True
+
+    def top_k(self, k):
+        """
+        k kandidat dengan score terbesar, terurut mengecil.
+
+        Returns
+        -------
+        List[Tuple[float, int]]
+            (score, docID)
+        """
+        candidates = np.flatnonzero(self.seen)
+        if k <= 0 or candidates.size == 0:
+            return []
+        scores = self.scores[candidates]
+        if k < candidates.size:
+            # semua kandidat dengan score di atas score ke-k, lalu kandidat dengan
+            # score sama dengan score ke-k sesuai urutan docID sampai k kandidat
+            threshold = -np.partition(-scores, k - 1)[k - 1]
+            top = np.flatnonzero(scores > threshold)
+            top = np.concatenate((top, np.flatnonzero(scores == threshold)[:k - top.size]))
+            top.sort()
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-scores[top], kind = 'stable')]
+        return list(zip(scores[top].tolist(), candidates[top].tolist()))
+
 def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     """
     Menggabung (merge) dua lists of tuples (doc id, tf) dan mengembalikan
@@ -80,6 +332,8 @@ def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
             return   [(1, 34+11), (2, 4), (3, 2), (4, 23+3), (6, 13)]
                    = [(1, 45), (2, 4), (3, 2), (4, 26), (6, 13)]
 
+    Merging dilakukan dengan two-pointer dalam waktu linear.
+
     Parameters
     ----------
     list1: List[(Comparable, int)]
@@ -91,46 +345,339 @@ def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     List[(Comparablem, int)]
         Penggabungan yang sudah terurut
     """
-    # TODO
-    if len(posts_tfs1) >= len(posts_tfs2):
-        counter = 0
-        for item in posts_tfs2:
-            exist = False
-            for tupl in posts_tfs1:
-                if item[0] == tupl[0]:
-                    tupl_list = list(tupl)
-                    tupl_list[1] = tupl_list[1] + item[1]
-                    posts_tfs1[counter] = tuple(tupl_list)
-                    exist = True
-            if exist:
-                counter += 1
-                continue
-            else:
-                posts_tfs1.append(item)
-                counter += 1
-                continue
-        # print(sorted(posts_tfs1))
-        return(sorted(posts_tfs1))
-            
-    elif(len(posts_tfs2) > len(posts_tfs1)):
-        counter = 0
-        for item in posts_tfs1:
-            exist = False
-            for tupl in posts_tfs2:
-                if item[0] == tupl[0]:
-                    tupl_list = list(tupl)
-                    tupl_list[1] = tupl_list[1] + item[1]
-                    posts_tfs2[counter] = tuple(tupl_list)
-                    exist = True
-            if exist:
-                counter += 1
-                continue
+    result = []
+    i, j = 0, 0
+    while i < len(posts_tfs1) and j < len(posts_tfs2):
+        doc1, tf1 = posts_tfs1[i]
+        doc2, tf2 = posts_tfs2[j]
+        if doc1 == doc2:
+            result.append((doc1, tf1 + tf2))
+            i += 1
+            j += 1
+        elif doc1 < doc2:
+            result.append((doc1, tf1))
+            i += 1
+        else:
+            result.append((doc2, tf2))
+            j += 1
+    result.extend(posts_tfs1[i:])
+    result.extend(posts_tfs2[j:])
+    return result
+
+def merge_postings_and_tfs(postings_lists, tf_lists, positions_lists = None):
+    """
+    K-way merge beberapa sorted postings list beserta TF list-nya sekaligus,
+    tanpa membentuk list of tuples. TF untuk doc id yang sama diakumulasikan.
+
+    Jika postings lists tidak saling overlap (kasus umum pada BSBI, karena
+    setiap block mempunyai rentang docID sendiri), hasilnya cukup berupa
+    konkatenasi. Jika overlap, merging dilakukan dengan heap berisi posisi
+    terdepan setiap list, O(n log k) untuk total n postings dari k list.
+
+    contoh: merge_postings_and_tfs([[1, 3, 4], [1, 2, 4, 6]], [[34, 2, 23], [11, 4, 3, 13]])
+            ---> ([1, 2, 3, 4, 6], [45, 4, 2, 26, 13])
+
+    Jika positions_lists diberikan (positional index), list posisi setiap
+    posting ikut di-merge; posisi untuk doc id yang sama digabung dan diurutkan.
+
+    Parameters
+    ----------
+    postings_lists: List[List[int]]
+        List of sorted postings lists
+    tf_lists: List[List[int]]
+        List of TF lists yang bersesuaian dengan postings_lists
+    positions_lists: List[List[List[int]]]
+        Opsional, list posisi untuk setiap posting di postings_lists
+
+    Returns
+    -------
+    Tuple[List[int], List[int]]
+        (postings_list, tf_list) hasil merging yang sudah terurut, atau
+        (postings_list, tf_list, positions) jika positions_lists diberikan
+    """
+    if len(postings_lists) == 1:
+        if positions_lists is not None:
+            return list(postings_lists[0]), list(tf_lists[0]), list(positions_lists[0])
+        return list(postings_lists[0]), list(tf_lists[0])
+
+    order = sorted((i for i in range(len(postings_lists)) if len(postings_lists[i]) > 0),
+                   key = lambda i: postings_lists[i][0])
+    if all(postings_lists[prev][-1] < postings_lists[curr][0] for prev, curr in zip(order, order[1:])):
+        postings, tfs, positions_merged = [], [], []
+        for i in order:
+            postings.extend(postings_lists[i])
+            tfs.extend(tf_lists[i])
+            if positions_lists is not None:
+                positions_merged.extend(positions_lists[i])
+        if positions_lists is not None:
+            return postings, tfs, positions_merged
+        return postings, tfs
+
+    postings, tfs, positions_merged = [], [], []
+    positions = [0] * len(postings_lists)
+    heap = [(postings_lists[i][0], i) for i in order]
+    heapq.heapify(heap)
+    while heap:
+        doc_id, i = heap[0]
+        pos = positions[i]
+        if postings and postings[-1] == doc_id:
+            tfs[-1] += tf_lists[i][pos]
+            if positions_lists is not None:
+                positions_merged[-1] = sorted(positions_merged[-1] + positions_lists[i][pos])
+        else:
+            postings.append(doc_id)
+            tfs.append(tf_lists[i][pos])
+            if positions_lists is not None:
+                positions_merged.append(positions_lists[i][pos])
+        pos += 1
+        positions[i] = pos
+        if pos < len(postings_lists[i]):
+            heapq.heapreplace(heap, (postings_lists[i][pos], i))
+        else:
+            heapq.heappop(heap)
+    if positions_lists is not None:
+        return postings, tfs, positions_merged
+    return postings, tfs
+
+def intersect_cursors(cursors):
+    """
+    Intersection beberapa postings list dengan cursor (lihat
+    compression.PostingsCursor): cursor pertama (sebaiknya postings list
+    terpendek) menentukan kandidat docID, dan cursor lain melompat ke kandidat
+    tersebut dengan next_geq. Jika sebuah cursor melewati kandidat, docID-nya
+    menjadi kandidat berikutnya.
+
+    Returns
+    -------
+    List[int]
+        docIDs yang ada di semua postings list, terurut
+    """
+    result = []
+    lead, others = cursors[0], cursors[1:]
+    end = lead.END
+    while lead.doc != end:
+        target = lead.doc
+        for cursor in others:
+            if cursor.next_geq(target) != target:
+                lead.next_geq(cursor.doc)
+                break
+        else:
+            result.append(target)
+            lead.next()
+    return result
+
+def wand(cursors, upper_bounds, score, k, heap):
+    """
+    Top-k retrieval document-at-a-time dengan dynamic pruning WAND (Broder et
+    al., 2003). Setiap iterasi, cursor diurutkan berdasarkan docID, lalu
+    upper_bounds dijumlahkan sesuai urutan tersebut sampai melebihi threshold
+    (score terkecil di heap jika heap sudah berisi k dokumen); docID cursor
+    tersebut adalah pivot. Dokumen sebelum pivot tidak mungkin masuk top-k,
+    sehingga cursor-cursor di depan pivot langsung melompat ke pivot dengan
+    next_geq, dan hanya pivot yang di-score. Hasilnya sama dengan scoring
+    exhaustive, kecuali urutan dokumen dengan score yang sama di batas top-k.
+
+    Parameters
+    ----------
+    cursors: List[PostingsCursor]
+        Cursor setiap term query (lihat compression.PostingsCursor)
+    upper_bounds: List[float]
+        Batas atas score setiap term di dokumen manapun
+    score: Callable[[int, List[PostingsCursor]], float]
+        Score sebuah docID, dari cursor-cursor (sesuai urutan di cursors) yang
+        sedang berada di docID tersebut
+    k: int
+        Banyaknya dokumen yang dikembalikan
+    heap: List[Tuple[float, int]]
+        Min-heap (score, docID) top-k yang di-update in-place, sehingga bisa
+        dipakai bersama oleh beberapa segment (threshold-nya ikut terbawa)
+
+    Returns
+    -------
+    int
+        Banyaknya dokumen yang di-score
+    """
+    if not cursors or k <= 0:
+        return 0
+    end = cursors[0].END
+    order = list(range(len(cursors)))
+    threshold = heap[0][0] if len(heap) >= k else -float('inf')
+    scored = 0
+    while True:
+        order.sort(key = lambda i: cursors[i].doc)
+        total = 0
+        pivot = -1
+        for p, i in enumerate(order):
+            if cursors[i].doc == end:
+                break
+            total += upper_bounds[i]
+            if total > threshold:
+                pivot = p
+                break
+        if pivot < 0:
+            break
+        pivot_doc = cursors[order[pivot]].doc
+        if cursors[order[0]].doc == pivot_doc:
+            matched = [cursor for cursor in cursors if cursor.doc == pivot_doc]
+            doc_score = score(pivot_doc, matched)
+            scored += 1
+            if len(heap) < k:
+                heapq.heappush(heap, (doc_score, pivot_doc))
+            elif doc_score > heap[0][0]:
+                heapq.heapreplace(heap, (doc_score, pivot_doc))
+            if len(heap) >= k:
+                threshold = heap[0][0]
+            for cursor in matched:
+                cursor.next()
+        else:
+            for p in range(pivot):
+                cursors[order[p]].next_geq(pivot_doc)
+    return scored
+
+def block_max_wand(cursors, upper_bounds, block_lasts, block_bounds, score, k, heap):
+    """
+    Block-Max WAND (Ding dan Suel, 2011): seperti wand, tetapi setelah pivot
+    ditemukan dengan batas atas setiap term, batas atas block postings (yang
+    mungkin berisi docID pivot) dari cursor-cursor sampai pivot juga
+    dijumlahkan. Block dicari dari block_lasts saja tanpa men-decode postings
+    (shallow move). Jika jumlahnya tidak melebihi threshold, tidak ada dokumen
+    mulai dari pivot sampai akhir block terpendek yang bisa masuk top-k,
+    sehingga cursor-cursor tersebut langsung melompat ke setelah block itu.
+
+    Parameters
+    ----------
+    cursors, upper_bounds, score, k, heap
+        Lihat wand
+    block_lasts: List[List[int]]
+        docID terakhir setiap block postings, untuk setiap cursor
+    block_bounds: List[List[float]]
+        Batas atas score setiap block postings, untuk setiap cursor
+
+    Returns
+    -------
+    int
+        Banyaknya dokumen yang di-score
+    """
+    if not cursors or k <= 0:
+        return 0
+    end = cursors[0].END
+    num_cursors = len(cursors)
+    order = list(range(num_cursors))
+    # block terakhir diikuti sentinel END (dengan batas atas 0), sehingga
+    # bisect selalu menemukan block
+    block_lasts = [list(lasts) + [end] for lasts in block_lasts]
+    block_bounds = [list(bounds) + [0] for bounds in block_bounds]
+    blocks = [0] * num_cursors
+    current_lasts = [lasts[0] for lasts in block_lasts]
+    current_bounds = [bounds[0] for bounds in block_bounds]
+    threshold = heap[0][0] if len(heap) >= k else -float('inf')
+    scored = 0
+    while True:
+        order.sort(key = lambda i: cursors[i].doc)
+        total = 0
+        pivot = -1
+        for p, i in enumerate(order):
+            if cursors[i].doc == end:
+                break
+            total += upper_bounds[i]
+            if total > threshold:
+                pivot = p
+                break
+        if pivot < 0:
+            break
+        pivot_doc = cursors[order[pivot]].doc
+        while pivot + 1 < num_cursors and cursors[order[pivot + 1]].doc == pivot_doc:
+            pivot += 1
+
+        # shallow move: block setiap cursor sampai pivot yang mungkin berisi pivot_doc
+        block_total = 0
+        for p in range(pivot + 1):
+            i = order[p]
+            if current_lasts[i] < pivot_doc:
+                block = bisect.bisect_left(block_lasts[i], pivot_doc, blocks[i] + 1)
+                blocks[i] = block
+                current_lasts[i] = block_lasts[i][block]
+                current_bounds[i] = block_bounds[i][block]
+            block_total += current_bounds[i]
+
+        if block_total > threshold:
+            if cursors[order[0]].doc == pivot_doc:
+                matched = [cursor for cursor in cursors if cursor.doc == pivot_doc]
+                doc_score = score(pivot_doc, matched)
+                scored += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, (doc_score, pivot_doc))
+                elif doc_score > heap[0][0]:
+                    heapq.heapreplace(heap, (doc_score, pivot_doc))
+                if len(heap) >= k:
+                    threshold = heap[0][0]
+                for cursor in matched:
+                    cursor.next()
             else:
-                posts_tfs2.append(item)
-                counter += 1
-                continue
-        # print(sorted(posts_tfs2))
-        return(sorted(posts_tfs2))
+                for p in range(pivot):
+                    cursors[order[p]].next_geq(pivot_doc)
+        else:
+            next_doc = min(current_lasts[order[p]] for p in range(pivot + 1)) + 1
+            if pivot + 1 < num_cursors:
+                next_doc = min(next_doc, cursors[order[pivot + 1]].doc)
+            for p in range(pivot + 1):
+                cursors[order[p]].next_geq(next_doc)
+    return scored
+
+def phrase_matches(positions_lists):
+    """
+    Menghitung banyaknya kemunculan phrase di sebuah dokumen, yaitu banyaknya
+    posisi p sehingga term ke-i phrase muncul di posisi p + i.
+
+    contoh: phrase_matches([[1, 5, 9], [2, 7, 10]]) ---> 2 (posisi 1 dan 9)
+
+    Parameters
+    ----------
+    positions_lists: List[List[int]]
+        List posisi setiap term phrase (sesuai urutan di phrase) di dokumen
+    """
+    starts = set(positions_lists[0])
+    for offset, positions in enumerate(positions_lists[1:], 1):
+        starts.intersection_update(position - offset for position in positions)
+        if not starts:
+            break
+    return len(starts)
+
+def proximity_matches(positions_lists, window):
+    """
+    Menghitung banyaknya window minimal di sebuah dokumen yang memuat semua
+    term (dengan urutan apapun) dan selisih posisi term pertama dan terakhirnya
+    paling besar window. Window dicari dengan sliding window pada gabungan
+    posisi semua term yang terurut.
+
+    contoh: proximity_matches([[1, 20], [4, 30]], 3) ---> 1 (posisi 1 dan 4)
+
+    Parameters
+    ----------
+    positions_lists: List[List[int]]
+        List posisi setiap term (yang berbeda) di dokumen
+    window: int
+        Jarak maksimum antar term
+    """
+    occurrences = list(heapq.merge(*[[(position, i) for position in positions]
+                                     for i, positions in enumerate(positions_lists)]))
+    counts = [0] * len(positions_lists)
+    covered = 0
+    left = 0
+    matches = 0
+    for position, i in occurrences:
+        if counts[i] == 0:
+            covered += 1
+        counts[i] += 1
+        while covered == len(positions_lists):
+            left_position, left_i = occurrences[left]
+            if counts[left_i] == 1 and position - left_position <= window:
+                matches += 1
+            counts[left_i] -= 1
+            if counts[left_i] == 0:
+                covered -= 1
+            left += 1
+    return matches
 
 def test(output, expected):
     """ simple function for testing """
@@ -152,5 +699,78 @@ if __name__ == '__main__':
     doc_id_map = IdMap()
     assert [doc_id_map[docname] for docname in docs] == [0, 1, 2], "docs_id salah"
 
+    frozen = FrozenIdMap.from_id_map(term_id_map)
+    assert len(frozen) == 4 and frozen[1] == "semua" and frozen["pagi"] == 3, "FrozenIdMap salah"
+    assert "selamat" in frozen and "malam" not in frozen, "FrozenIdMap salah"
+    assert [frozen[term] for term in doc] == [0, 1, 2, 3, 1], "FrozenIdMap salah"
+    assert FrozenIdMap.from_id_map(doc_id_map).id_to_str == docs, "FrozenIdMap salah"
+
+    accumulator = ScoreAccumulator(5)
+    accumulator.add([0, 2, 4], [1.0, 3.0, 0.0])
+    accumulator.add([2, 3], [0.5, 3.5])
+    assert accumulator.top_k(2) == [(3.5, 2), (3.5, 3)], "ScoreAccumulator salah"
+    assert accumulator.top_k(10) == [(3.5, 2), (3.5, 3), (1.0, 0), (0.0, 4)], "ScoreAccumulator salah"
+    accumulator = NumpyScoreAccumulator(5)
+    accumulator.add([0, 2, 4], np.array([1.0, 3.0, 0.0]))
+    accumulator.add([2, 3], np.array([0.5, 3.5]))
+    assert accumulator.top_k(2) == [(3.5, 2), (3.5, 3)], "NumpyScoreAccumulator salah"
+    assert accumulator.top_k(10) == [(3.5, 2), (3.5, 3), (1.0, 0), (0.0, 4)], "NumpyScoreAccumulator salah"
+    assert accumulator.top_k(0) == [] and NumpyScoreAccumulator(3).top_k(5) == [], "NumpyScoreAccumulator salah"
+    accumulator = NumpyScoreAccumulator(40)
+    accumulator.add(list(range(39, -1, -1)), np.array([2.0 if doc_id % 3 == 0 else 1.0 for doc_id in range(39, -1, -1)]))
+    assert accumulator.top_k(16) == [(2.0, doc_id) for doc_id in range(0, 40, 3)] + [(1.0, 1), (1.0, 2)], \
+           "NumpyScoreAccumulator harus memilih score yang sama berdasarkan docID"
+
     assert sorted_merge_posts_and_tfs([(1, 34), (3, 2), (4, 23)], \
                                       [(1, 11), (2, 4), (4, 3 ), (6, 13)]) == [(1, 45), (2, 4), (3, 2), (4, 26), (6, 13)], "sorted_merge_posts_and_tfs salah"
+
+    assert merge_postings_and_tfs([[1, 3, 4], [1, 2, 4, 6]], [[34, 2, 23], [11, 4, 3, 13]]) == \
+           ([1, 2, 3, 4, 6], [45, 4, 2, 26, 13]), "merge_postings_and_tfs salah"
+    assert merge_postings_and_tfs([[7, 9], [1, 2], [4]], [[1, 2], [3, 4], [5]]) == \
+           ([1, 2, 4, 7, 9], [3, 4, 5, 1, 2]), "merge_postings_and_tfs salah"
+    assert merge_postings_and_tfs([[1, 3], [1, 2]], [[2, 1], [1, 1]], [[[0, 4], [2]], [[2], [0]]]) == \
+           ([1, 2, 3], [3, 1, 1], [[0, 2, 4], [0], [2]]), "merge_postings_and_tfs salah"
+
+    assert phrase_matches([[1, 5, 9], [2, 7, 10]]) == 2, "phrase_matches salah"
+    assert phrase_matches([[0, 1, 2], [0, 1, 2]]) == 2, "phrase_matches salah"
+    assert proximity_matches([[1, 20], [4, 30]], 3) == 1, "proximity_matches salah"
+    assert proximity_matches([[1, 20], [4, 30]], 2) == 0, "proximity_matches salah"
+    assert proximity_matches([[5], [3], [4]], 2) == 1, "proximity_matches salah"
+
+    from compression import PostingsCursor
+    import random
+    rng = random.Random(1906292881)
+    postings_lists = [sorted(rng.sample(range(500), n)) for n in (400, 60, 8)]
+    tf_lists = [[rng.randint(1, 3) for _ in postings_list] for postings_list in postings_lists]
+    weights = [0.1, 1.0, 4.0]
+    expected = {}
+    for postings_list, tf_list, weight in zip(postings_lists, tf_lists, weights):
+        for doc_id, tf in zip(postings_list, tf_list):
+            expected[doc_id] = expected.get(doc_id, 0) + weight * tf
+    cursors = []
+    for postings_list, tf_list, weight in zip(postings_lists, tf_lists, weights):
+        cursors.append(PostingsCursor(postings_list, tf_list))
+        cursors[-1].weight = weight
+    heap = []
+    scored = wand(cursors, [weight * 3 for weight in weights],
+                  lambda doc_id, matched: sum(cursor.weight * cursor.tf() for cursor in matched), 10, heap)
+    expected_top = sorted(expected.values(), reverse = True)[:10]
+    assert sorted((score for score, _ in heap), reverse = True) == expected_top, "wand salah"
+    assert all(expected[doc_id] == score for score, doc_id in heap), "wand salah"
+    assert scored < len(expected), "wand seharusnya tidak men-score semua dokumen"
+
+    block_lasts, block_bounds = [], []
+    for postings_list, tf_list, weight in zip(postings_lists, tf_lists, weights):
+        starts = range(0, len(postings_list), 16)
+        block_lasts.append([postings_list[min(start + 15, len(postings_list) - 1)] for start in starts])
+        block_bounds.append([weight * max(tf_list[start:start + 16]) for start in starts])
+    cursors = []
+    for postings_list, tf_list, weight in zip(postings_lists, tf_lists, weights):
+        cursors.append(PostingsCursor(postings_list, tf_list))
+        cursors[-1].weight = weight
+    heap = []
+    block_scored = block_max_wand(cursors, [weight * 3 for weight in weights], block_lasts, block_bounds,
+                                  lambda doc_id, matched: sum(cursor.weight * cursor.tf() for cursor in matched), 10, heap)
+    assert sorted((score for score, _ in heap), reverse = True) == expected_top, "block_max_wand salah"
+    assert all(expected[doc_id] == score for score, doc_id in heap), "block_max_wand salah"
+    assert block_scored <= scored, "block_max_wand seharusnya tidak men-score lebih banyak dari wand"